@@ -0,0 +1,167 @@
+"""
+Benchmark de las rutas de traducción, sin red.
+
+Usa el proveedor 'local' (traductor determinista con latencia simulada) y
+un DatabaseAdapter sin DynamoDB (la cache vive en la LRU en memoria), y
+compara:
+
+- Pre-traducción en el scraper vs. traducir al hacer clic.
+- Cache por contenido: el mismo resumen pedido por varios comandos/guilds.
+- Memoria por segmentos: un aviso nuevo que repite líneas del anterior.
+- Fragmentos en paralelo (translate_multi) vs. un idioma tras otro.
+
+Uso:
+    python bench_translation.py [--latency 0.15] [--posts 3] [--output bench_output.txt]
+"""
+
+import argparse
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database import DatabaseAdapter
+from translation import LocalProvider, translate_multi, translate_with_memory
+
+LANGS = {'es': 'es', 'pt': 'pt', 'zh': 'zh-cn'}
+
+
+def make_summary(n, reward):
+    """Resumen con el formato de format_as_bullets (~1800 caracteres)."""
+    bullets = [
+        "Maintenance schedule: 2025-01-14 (Tue) 10:00 ~ 14:00 (UTC+8)",
+        "Affected regions: ASIA, INMENA, EU, SA, NA. All servers will be unavailable during maintenance.",
+        f"Patch {n}: the following changes will be applied after the maintenance is complete. " + "Details " * 30,
+        "Compensation: Darksteel x100,000 and Copper x5,000 will be sent to all characters Lv.40 or higher.",
+        f"Event reward: {reward}. " + "Please check the in-game mailbox after logging in. " * 8,
+        "The schedule may change depending on the progress of the maintenance. " * 4,
+    ]
+    return '\n\n'.join(f"• {b}" for b in bullets)
+
+
+def offline_db():
+    with patch('boto3.resource', side_effect=Exception("offline")):
+        return DatabaseAdapter()
+
+
+def measure(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def bench_pretranslate(provider, posts):
+    """Latencia del clic: traducción en el clic vs. pre-traducida por el scraper."""
+    summaries = [make_summary(i, f"Reward box #{i}") for i in range(posts)]
+    rows = []
+
+    # Antes: cada primer clic por idioma traduce el resumen completo
+    provider.calls = 0
+    elapsed, _ = measure(lambda: [provider.translate(s, dest) for s in summaries for dest in LANGS.values()])
+    clicks = posts * len(LANGS)
+    rows.append(("clic sin pre-traducción (por clic)", elapsed / clicks, provider.calls))
+
+    # Ahora: el scraper traduce todo en paralelo y el clic lee la cache
+    db = offline_db()
+    provider.calls = 0
+    elapsed, _ = measure(lambda: [
+        db.store_translations({(s, lang): t for lang, t in translate_with_memory(s, LANGS, db, provider.translate).items()})
+        for s in summaries
+    ])
+    rows.append((f"pre-traducción en el scraper ({posts} posts x {len(LANGS)} idiomas)", elapsed, provider.calls))
+    elapsed, _ = measure(lambda: [db.get_translation(s, lang) for s in summaries for lang in LANGS])
+    rows.append(("clic con pre-traducción (por clic)", elapsed / clicks, 0))
+    return rows
+
+
+def bench_content_cache(provider, requests):
+    """El mismo resumen pedido por varios comandos/guilds."""
+    summary = make_summary(0, "Reward box")
+    rows = []
+
+    provider.calls = 0
+    elapsed, _ = measure(lambda: [provider.translate(summary, 'es') for _ in range(requests)])
+    rows.append((f"sin cache por contenido ({requests} pedidos)", elapsed, provider.calls))
+
+    db = offline_db()
+    provider.calls = 0
+
+    def cached():
+        for _ in range(requests):
+            if db.get_translation(summary, 'es') is None:
+                db.set_translation(summary, 'es', provider.translate(summary, 'es'))
+
+    elapsed, _ = measure(cached)
+    rows.append((f"con cache por contenido ({requests} pedidos)", elapsed, provider.calls))
+    return rows
+
+
+def bench_segment_memory(provider):
+    """Un aviso nuevo que repite casi todas las líneas del anterior."""
+    first = make_summary(1, "Reward box")
+    second = make_summary(1, "Legendary box")
+    rows = []
+
+    db = offline_db()
+    translate_with_memory(first, LANGS, db, provider.translate)
+
+    provider.calls = 0
+    elapsed, _ = measure(lambda: [provider.translate(second, dest) for dest in LANGS.values()])
+    rows.append(("aviso repetido, texto completo", elapsed, provider.calls))
+
+    provider.calls = 0
+    elapsed, _ = measure(lambda: translate_with_memory(second, LANGS, db, provider.translate))
+    rows.append(("aviso repetido, memoria por segmentos", elapsed, provider.calls))
+    return rows
+
+
+def bench_chunking(provider):
+    """Traducción a es/zh: en serie vs. fragmentos e idiomas en paralelo."""
+    summary = make_summary(2, "Reward box")
+    langs = {'es': 'es', 'zh': 'zh-cn'}
+    rows = []
+
+    provider.calls = 0
+    elapsed, _ = measure(lambda: [provider.translate(summary, dest) for dest in langs.values()])
+    rows.append(("secuencial (un idioma tras otro)", elapsed, provider.calls))
+
+    provider.calls = 0
+    elapsed, _ = measure(lambda: translate_multi(summary, langs, provider.translate))
+    rows.append(("translate_multi (fragmentos en paralelo)", elapsed, provider.calls))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline de traducción")
+    parser.add_argument('--latency', type=float, default=0.15, help="latencia simulada por petición (s)")
+    parser.add_argument('--posts', type=int, default=3, help="posts nuevos por ejecución del scraper")
+    parser.add_argument('--requests', type=int, default=10, help="pedidos del mismo resumen")
+    parser.add_argument('--output', help="archivo donde guardar también el reporte")
+    args = parser.parse_args()
+
+    provider = LocalProvider(latency=args.latency)
+    sections = [
+        ("Pre-traducción", bench_pretranslate(provider, args.posts)),
+        ("Cache por contenido", bench_content_cache(provider, args.requests)),
+        ("Memoria por segmentos", bench_segment_memory(provider)),
+        ("Fragmentos en paralelo", bench_chunking(provider)),
+    ]
+
+    lines = [f"Proveedor: {provider.name}, latencia simulada {args.latency:.3f}s por petición", ""]
+    for title, rows in sections:
+        lines.append(f"== {title}")
+        for label, elapsed, calls in rows:
+            lines.append(f"  {label:<58} {elapsed * 1000:9.1f} ms  {calls:4d} peticiones")
+        lines.append("")
+
+    report = '\n'.join(lines)
+    print(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report + '\n')
+
+
+if __name__ == '__main__':
+    main()
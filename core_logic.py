@@ -1,167 +1,497 @@
-import requests
-from bs4 import BeautifulSoup
-from newspaper import Article
-from googletrans import Translator
+import http_client
+import html_parsers
+import text_filters
+from translation import get_provider
+import codecs
+import hashlib
 import logging
+import os
+import re
+from html.parser import HTMLParser
 
 # Configuración de logging
 logger = logging.getLogger('BicheonCore')
 logger.setLevel(logging.INFO)
 
-translator = Translator()
+# Valor devuelto por get_latest_post_by_tag cuando el foro responde 304
+NOT_MODIFIED = 'not_modified'
 
-def get_latest_post_by_tag(tag_buscado):
-    """Obtiene el último post del foro MIR4 para un tag específico."""
-    url_map = {
-        'patch note': "https://forum.mir4global.com/board/patchnote",
-        'notice': "https://forum.mir4global.com/board/notice",
-        'event': "https://forum.mir4global.com/board/newevent?category_id=1"
+BOARD_URLS = {
+    'patch note': "https://forum.mir4global.com/board/patchnote",
+    'notice': "https://forum.mir4global.com/board/notice",
+    'event': "https://forum.mir4global.com/board/newevent?category_id=1"
+}
+
+# Máximo de posts nuevos por tag en una pasada cuando no se encuentra
+# ningún post ya visto en el listado (evita inundar los canales)
+MAX_NEW_POSTS = 5
+
+# Modo streaming: leer el tablero por chunks y cortar la descarga en cuanto
+# aparece el post buscado. Por defecto solo lo usan los comandos; el scraper
+# lo activa con BOARD_STREAMING=1 (incompatible con el fingerprint del
+# listado, que necesita la región completa).
+BOARD_STREAMING = os.environ.get('BOARD_STREAMING', '').lower() in ('1', 'true', 'yes')
+STREAM_CHUNK_SIZE = 8192
+
+# Marcadores de la región del listado dentro del HTML crudo del tablero
+LISTING_START = re.compile(rb'<article\s+class=["\']article')
+LISTING_END = b'</article>'
+
+def listing_fingerprint(raw):
+    """Hash de los bytes crudos de la región del listado (de la primera a la
+    última <article class="article">), o None si no se encuentran los marcadores.
+
+    Ignora el resto de la página (tokens, banners, scripts) para que el hash
+    solo cambie cuando cambia el listado.
+    """
+    start = LISTING_START.search(raw)
+    end = raw.rfind(LISTING_END)
+    if not start or end < start.start():
+        return None
+    return hashlib.sha1(raw[start.start():end + len(LISTING_END)]).hexdigest()
+
+def _conditional_headers(validators):
+    """Cabeceras If-None-Match/If-Modified-Since a partir de los validadores."""
+    headers = {}
+    if validators is not None:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+def _response_validators(response):
+    return {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified')
     }
-    
-    url = url_map.get(tag_buscado)
+
+def _fetch_board(url, validators=None):
+    """Descarga el HTML de un tablero (petición condicional si hay validadores).
+
+    Además de ETag/Last-Modified, `validators` puede traer el 'fingerprint'
+    del listado de la ejecución anterior: si coincide, se trata como un 304
+    aunque el servidor ignore las cabeceras condicionales.
+
+    Devuelve (html, validadores_nuevos), o NOT_MODIFIED si no hubo cambios.
+    Lanza excepción ante errores HTTP.
+    """
+    headers = _conditional_headers(validators)
+    response = http_client.get(url, headers=headers, timeout=(3.05, 10))
+
+    if response.status_code == 304:
+        logger.debug(f"📭 {url} sin cambios (304)")
+        return NOT_MODIFIED
+
+    response.raise_for_status()
+
+    new_validators = _response_validators(response)
+
+    if validators is not None:
+        fingerprint = listing_fingerprint(response.content)
+        if fingerprint and fingerprint == validators.get('fingerprint'):
+            logger.debug(f"📭 {url} listado sin cambios (fingerprint)")
+            # Los validadores HTTP pueden haber cambiado aunque el listado no
+            validators.update(new_validators)
+            return NOT_MODIFIED
+        new_validators['fingerprint'] = fingerprint
+
+    return response.text, new_validators
+
+def _is_board_post(category_text, post_text, tag_buscado):
+    """Indica si un post del listado es del tag buscado y no es de redes sociales."""
+    if category_text.strip().lower() != tag_buscado:
+        return False
+
+    # Filtrar posts de redes sociales
+    return not text_filters.social_filter.matches(post_text)
+
+def _absolute_link(href):
+    if not href.startswith('http'):
+        href = f"https://forum.mir4global.com{href}"
+    return href
+
+def iter_board_posts(soup, tag_buscado):
+    """Itera (título, link) de los posts del listado con ese tag, del más nuevo al más viejo."""
+    for post in soup.select('article.article'):
+        tag = post.select_one('em.article_category')
+        if not tag:
+            continue
+
+        if not _is_board_post(tag.text, post.get_text(strip=True), tag_buscado):
+            continue
+
+        href = _absolute_link(post.select_one('a')['href'])
+        full_title = post.select_one('span.subject').text.strip()
+        yield full_title, href
+
+class BoardStreamParser(HTMLParser):
+    """Parser incremental del listado de un tablero.
+
+    Se alimenta con feed() a medida que llegan los chunks y va agregando a
+    `posts` cada (título, link) en cuanto se cierra su <article class="article">,
+    con los mismos criterios que iter_board_posts.
+    """
+
+    def __init__(self, tag_buscado):
+        super().__init__(convert_charrefs=True)
+        self.tag_buscado = tag_buscado
+        self.posts = []
+        self._article_depth = 0
+        self._reset_post()
+
+    def _reset_post(self):
+        self._strings = []
+        self._pending = []
+        self._category = None
+        self._category_depth = 0
+        self._subject = None
+        self._subject_depth = 0
+        self._href = None
+        self._skip_depth = 0
+
+    @staticmethod
+    def _has_class(attrs, name):
+        classes = dict(attrs).get('class') or ''
+        return name in classes.split()
+
+    def _flush(self):
+        # html.parser puede partir un mismo texto en varios handle_data
+        if self._pending:
+            text = ''.join(self._pending)
+            self._pending = []
+            self._strings.append(text)
+            if self._category_depth:
+                self._category.append(text)
+            if self._subject_depth:
+                self._subject.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        if not self._article_depth:
+            if tag == 'article' and self._has_class(attrs, 'article'):
+                self._article_depth = 1
+            return
+
+        self._flush()
+        if tag == 'article':
+            self._article_depth += 1
+        elif tag in html_parsers.NON_TEXT_TAGS:
+            self._skip_depth += 1
+        elif tag == 'em':
+            if self._category_depth:
+                self._category_depth += 1
+            elif self._category is None and self._has_class(attrs, 'article_category'):
+                self._category = []
+                self._category_depth = 1
+        elif tag == 'span':
+            if self._subject_depth:
+                self._subject_depth += 1
+            elif self._subject is None and self._has_class(attrs, 'subject'):
+                self._subject = []
+                self._subject_depth = 1
+        elif tag == 'a' and self._href is None:
+            self._href = dict(attrs).get('href') or ''
+
+    def handle_endtag(self, tag):
+        if not self._article_depth:
+            return
+
+        self._flush()
+        if tag == 'article':
+            self._article_depth -= 1
+            if not self._article_depth:
+                self._finish_post()
+        elif tag in html_parsers.NON_TEXT_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == 'em' and self._category_depth:
+            self._category_depth -= 1
+        elif tag == 'span' and self._subject_depth:
+            self._subject_depth -= 1
+
+    def handle_data(self, data):
+        if self._article_depth and not self._skip_depth:
+            self._pending.append(data)
+
+    def _finish_post(self):
+        if self._category is not None and self._href is not None and self._subject is not None:
+            post_text = ''.join(s.strip() for s in self._strings)
+            if _is_board_post(''.join(self._category), post_text, self.tag_buscado):
+                self.posts.append((''.join(self._subject).strip(), _absolute_link(self._href)))
+        self._reset_post()
+
+def _stream_board_posts(url, tag_buscado, validators, stop):
+    """Descarga el tablero en streaming y corta en cuanto `stop(posts)` es verdadero.
+
+    Devuelve (posts, validadores_nuevos) con los posts leídos hasta el corte,
+    o NOT_MODIFIED ante un 304. Lanza excepción ante errores HTTP.
+    """
+    headers = _conditional_headers(validators)
+    response = http_client.get(url, headers=headers, timeout=(3.05, 10), stream=True)
+    try:
+        if response.status_code == 304:
+            logger.debug(f"📭 {url} sin cambios (304)")
+            return NOT_MODIFIED
+
+        response.raise_for_status()
+
+        parser = BoardStreamParser(tag_buscado)
+        decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+        read = 0
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            read += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if stop(parser.posts):
+                logger.debug(f"✂️ {url}: corte anticipado tras {read} bytes")
+                break
+        else:
+            parser.feed(decoder.decode(b'', final=True))
+            parser.close()
+
+        return parser.posts, _response_validators(response)
+    finally:
+        # Cerrar sin leer el resto: la conexión no vuelve al pool, pero se
+        # evita descargar el resto de la página
+        response.close()
+
+def get_latest_post_by_tag(tag_buscado, validators=None, stream=True):
+    """Obtiene el último post del foro MIR4 para un tag específico.
+
+    Si se pasa `validators` (dict con 'etag' y/o 'last_modified'), la petición
+    es condicional: ante un 304 devuelve NOT_MODIFIED sin parsear el HTML.
+    El dict se actualiza in-place con los validadores de la nueva respuesta.
+
+    Con `stream` la página se lee por chunks y la conexión se cierra en
+    cuanto aparece el primer post que cumple los criterios.
+    """
+    url = BOARD_URLS.get(tag_buscado)
     if not url:
         logger.error(f"❌ Tag inválido: {tag_buscado}")
         return None
     
     try:
         logger.debug(f"📡 Scrapeando {url} para tag '{tag_buscado}'")
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        posts = soup.select('article.article')
-        
-        if not posts:
-            logger.warning(f"⚠️ No se encontraron posts en {url}")
-            return None
+        if stream:
+            fetched = _stream_board_posts(url, tag_buscado, validators, stop=bool)
+            if fetched == NOT_MODIFIED:
+                return NOT_MODIFIED
+            posts, new_validators = fetched
+            post = posts[0] if posts else None
+        else:
+            fetched = _fetch_board(url, validators)
+            if fetched == NOT_MODIFIED:
+                return NOT_MODIFIED
+            html, new_validators = fetched
 
-        for post in posts:
-            tag = post.select_one('em.article_category')
-            if not tag:
-                continue
+            soup = html_parsers.parse_html(html)
+            post = next(iter_board_posts(soup, tag_buscado), None)
 
-            tag_text = tag.text.strip().lower()
-            if tag_text != tag_buscado:
-                continue
+        if not post:
+            logger.warning(f"⚠️ No se encontraron posts de '{tag_buscado}' en {url}")
 
-            # Filtrar posts de redes sociales
-            title = post.get_text(strip=True).lower()
-            if any(s in title for s in ['facebook', 'instagram', 'youtube']):
-                continue
+        # Los validadores solo avanzan si el parseo terminó bien
+        if validators is not None:
+            validators.update(new_validators)
+        return post
+        
+    except Exception as e:
+        logger.error(f"❌ Error en scraping de '{tag_buscado}': {e}")
+        return None
+
+def get_new_posts_by_tag(tag_buscado, seen_links, validators=None, max_new=MAX_NEW_POSTS, stream=None):
+    """Devuelve los posts del tablero más nuevos que el último ya visto.
 
-            href = post.find('a')['href']
-            if not href.startswith('http'):
-                href = f"https://forum.mir4global.com{href}"
+    Parsea el listado una sola vez y recorre los posts del más nuevo al más
+    viejo hasta encontrar uno que esté en `seen_links`. Si ninguno está
+    (primera ejecución o el set se quedó atrás), se limita a `max_new` posts,
+    o a solo el más reciente si `seen_links` está vacío.
 
-            full_title = post.find('span', class_='subject').text.strip()
-            return full_title, href
+    Con `stream` (por defecto BOARD_STREAMING) la descarga se corta al
+    llegar al primer post visto; `links_del_listado` cubre solo lo leído.
 
+    Devuelve (nuevos, links_del_listado), con `nuevos` ordenado del más viejo
+    al más nuevo; NOT_MODIFIED si el tablero no cambió (304 o mismo
+    fingerprint del listado); o None si hubo error.
+    """
+    if stream is None:
+        stream = BOARD_STREAMING
+    url = BOARD_URLS.get(tag_buscado)
+    if not url:
+        logger.error(f"❌ Tag inválido: {tag_buscado}")
         return None
-        
+
+    try:
+        logger.debug(f"📡 Scrapeando {url} para tag '{tag_buscado}'")
+        seen = set(seen_links or ())
+        limit = max_new if seen else 1
+
+        if stream:
+            def stop(posts):
+                return len(posts) >= limit or any(link in seen for _, link in posts)
+
+            fetched = _stream_board_posts(url, tag_buscado, validators, stop)
+            if fetched == NOT_MODIFIED:
+                return NOT_MODIFIED
+            posts, new_validators = fetched
+        else:
+            fetched = _fetch_board(url, validators)
+            if fetched == NOT_MODIFIED:
+                return NOT_MODIFIED
+            html, new_validators = fetched
+
+            soup = html_parsers.parse_html(html)
+            posts = list(iter_board_posts(soup, tag_buscado))
+
+        links = [link for _, link in posts]
+
+        nuevos = []
+        found_seen = False
+        for titulo, link in posts:
+            if link in seen:
+                found_seen = True
+                break
+            nuevos.append((titulo, link))
+
+        if not found_seen:
+            nuevos = nuevos[:limit]
+
+        nuevos.reverse()
+
+        # Los validadores solo avanzan si el parseo terminó bien
+        if validators is not None:
+            validators.update(new_validators)
+        return nuevos, links
+
     except Exception as e:
         logger.error(f"❌ Error en scraping de '{tag_buscado}': {e}")
         return None
 
-def extract_and_summarize_article(url):
-    """Extrae y resume el contenido de un artículo del foro MIR4."""
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-    }
+ARTICLE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+}
+
+EXTRACTION_FAILED = "No se pudo extraer el contenido."
+EXTRACTION_ERROR = "Error al procesar el artículo."
+
+def summarize_article_html(html, url):
+    """Extrae y resume el contenido de un artículo a partir de su HTML."""
+    soup = html_parsers.parse_html(html)
     
-    try:
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        content_selectors = [
-            'div.article_content', 'div.article-content', 
-            'div.board_content', 'div.post_content', 'article.article'
-        ]
+    content_selectors = [
+        'div.article_content', 'div.article-content', 
+        'div.board_content', 'div.post_content', 'article.article'
+    ]
+    
+    content = None
+    for selector in content_selectors:
+        content = soup.select_one(selector)
+        if content: break
+    
+    if not content:
+        # Detector por densidad de texto: una sola pasada sobre el árbol
+        content = html_parsers.find_main_content(soup, min_chars=200)
+    
+    if content:
+        content.remove_tags(['script', 'style', 'meta', 'link'])
         
-        content = None
-        for selector in content_selectors:
-            content = soup.select_one(selector)
-            if content: break
+        # Usar doble salto de línea para separar bloques (párrafos)
+        text = content.get_text(separator='\n\n', strip=True)
         
-        if not content:
-            all_divs = soup.find_all('div')
-            for div in all_divs:
-                text = div.get_text(strip=True)
-                if len(text) > 200:
-                    content = div
-                    break
+        # Limpiar líneas vacías pero preservar la estructura de párrafos
+        lines = [line.strip() for line in text.split('\n\n') if line.strip()]
         
-        if content:
-            for unwanted in content(['script', 'style', 'meta', 'link']):
-                unwanted.decompose()
-            
-            # Usar doble salto de línea para separar bloques (párrafos)
-            text = content.get_text(separator='\n\n', strip=True)
+        # Filtrar boilerplate común (filtro compilado, una pasada por línea)
+        cleaned_lines = [line for line in lines if not text_filters.boilerplate_filter.matches(line)]
             
-            # Limpiar líneas vacías pero preservar la estructura de párrafos
-            lines = [line.strip() for line in text.split('\n\n') if line.strip()]
-            
-            # Filtrar boilerplate común
-            boilerplate_phrases = [
-                "from my battle to our war",
-                "greetings, this is mir4",
-                "thank you",
-                "please refer to the details below",
-                "we look forward to",
-                "go to"
-            ]
-            
-            cleaned_lines = []
-            for line in lines:
-                lower_line = line.lower()
-                if any(phrase in lower_line for phrase in boilerplate_phrases):
-                    continue
-                cleaned_lines.append(line)
-                
-            text = '\n\n'.join(cleaned_lines)
+        text = '\n\n'.join(cleaned_lines)
+        
+        if text and len(text) > 50:
+            # Lógica mejorada de resumen (1800 chars)
+            paragraphs = text.split('\n\n')
+            summary_parts = []
+            total_length = 0
+            max_length = 1800
             
-            if text and len(text) > 50:
-                # Lógica mejorada de resumen (1800 chars)
-                paragraphs = text.split('\n\n')
-                summary_parts = []
-                total_length = 0
-                max_length = 1800
+            for para in paragraphs:
+                if len(para) > max_length:
+                    if total_length == 0:
+                        summary_parts.append(para[:max_length] + "...")
+                    break
                 
-                for para in paragraphs:
-                    if len(para) > max_length:
-                        if total_length == 0:
-                            summary_parts.append(para[:max_length] + "...")
-                        break
+                if total_length + len(para) > max_length:
+                    break
                     
-                    if total_length + len(para) > max_length:
-                        break
-                        
-                    summary_parts.append(para)
-                    total_length += len(para) + 2
-                
-                if summary_parts:
-                    return '\n\n'.join(summary_parts)
-                else:
-                    return text[:max_length] + ("..." if len(text) > max_length else "")
-        
-        # Fallback newspaper3k
-        try:
-            article = Article(url)
-            article.download()
-            article.parse()
-            if article.text:
-                return article.text[:1800] + "..."
-        except:
-            pass
+                summary_parts.append(para)
+                total_length += len(para) + 2
             
-        return "No se pudo extraer el contenido."
+            if summary_parts:
+                return '\n\n'.join(summary_parts)
+            else:
+                return text[:max_length] + ("..." if len(text) > max_length else "")
+    
+    # Fallback newspaper3k sobre el HTML ya descargado (sin segunda petición).
+    # Se importa aquí: es pesado y solo hace falta en este camino.
+    try:
+        from newspaper import Article
+        article = Article(url)
+        article.download(input_html=html)
+        article.parse()
+        if article.text:
+            return article.text[:1800] + "..."
+    except:
+        pass
+        
+    return EXTRACTION_FAILED
+
+def extract_and_summarize_article(url):
+    """Extrae y resume el contenido de un artículo del foro MIR4."""
+    try:
+        response = http_client.get(url, headers=ARTICLE_HEADERS, timeout=(3.05, 15))
+        response.raise_for_status()
+        return summarize_article_html(response.text, url)
         
     except Exception as e:
         logger.error(f"Error extrayendo artículo: {e}")
-        return "Error al procesar el artículo."
+        return EXTRACTION_ERROR
+
+def fetch_article_summary(url, cached=None):
+    """Descarga, extrae y resume un artículo revalidando contra la cache.
+
+    Si `cached` (entrada de la cache de artículos) trae validadores y el foro
+    responde 304, o el HTML descargado tiene el mismo 'content_hash', devuelve
+    NOT_MODIFIED sin volver a extraer. Si no, devuelve un dict con 'text',
+    'bullets', 'content_hash', 'etag' y 'last_modified'.
+    """
+    headers = dict(ARTICLE_HEADERS)
+    headers.update(_conditional_headers(cached))
+
+    try:
+        response = http_client.get(url, headers=headers, timeout=(3.05, 15))
+
+        if cached and response.status_code == 304:
+            return NOT_MODIFIED
+
+        response.raise_for_status()
+
+        content_hash = hashlib.sha1(response.content).hexdigest()
+        if cached and content_hash == cached.get('content_hash'):
+            return NOT_MODIFIED
+
+        text = summarize_article_html(response.text, url)
+        summary = {'text': text, 'bullets': format_as_bullets(text), 'content_hash': content_hash}
+        summary.update(_response_validators(response))
+        return summary
+
+    except Exception as e:
+        logger.error(f"Error extrayendo artículo: {e}")
+        return {
+            'text': EXTRACTION_ERROR,
+            'bullets': format_as_bullets(EXTRACTION_ERROR),
+            'content_hash': None,
+            'etag': None,
+            'last_modified': None
+        }
 
 def format_as_bullets(text):
     """Formatea el texto como bullets interpretados."""
@@ -240,12 +570,9 @@ def format_as_bullets(text):
     
     return '\n\n'.join(bullets)
 
-def traducir(texto):
-    """Traduce texto a español y chino."""
-    try:
-        es = translator.translate(texto, dest='es').text
-        zh = translator.translate(texto, dest='zh-cn').text
-        return es, zh
-    except Exception as e:
-        logger.warning(f"Error traducción: {e}")
-        return texto, texto
+def translate_text(texto, dest):
+    """Traduce texto a un idioma con el proveedor configurado.
+
+    Propaga la excepción si la traducción falla.
+    """
+    return get_provider().translate(texto, dest)
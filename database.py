@@ -1,12 +1,67 @@
 import boto3
+from botocore.exceptions import ClientError
 import os
 import json
+import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 logger = logging.getLogger('BicheonDB')
 logger.setLevel(logging.INFO)
 
+# Cache de artículos: tiempo durante el cual una entrada se usa sin
+# revalidar contra el foro, y retención total del item en DynamoDB (TTL)
+ARTICLE_CACHE_FRESH_SECONDS = int(os.environ.get('ARTICLE_CACHE_FRESH_SECONDS', '3600'))
+ARTICLE_CACHE_RETENTION_DAYS = 7
+
+# Traducciones direccionadas por contenido: hash(texto, idioma) -> traducción.
+# El mismo texto se traduce una vez por idioma sin importar el mensaje o guild.
+TRANSLATION_CACHE_TTL_DAYS = int(os.environ.get('TRANSLATION_CACHE_TTL_DAYS', '30'))
+# Máximo de claves por batch_get_item de DynamoDB, y reintentos (con
+# backoff exponencial) de las UnprocessedKeys que devuelve bajo throttling
+TRANSLATION_BATCH_SIZE = 100
+BATCH_GET_MAX_ATTEMPTS = 6
+BATCH_GET_BACKOFF_SECONDS = 0.05
+
+# Fallos permanentes consecutivos (403/404) tras los que un canal se deshabilita
+CHANNEL_FAILURE_THRESHOLD = int(os.environ.get('CHANNEL_FAILURE_THRESHOLD', '3'))
+
+# Registro de envíos (post, canal): retención para detectar reenvíos
+DELIVERY_LEDGER_TTL_DAYS = int(os.environ.get('DELIVERY_LEDGER_TTL_DAYS', '7'))
+
+class LRUCache:
+    """Cache LRU en memoria, thread-safe, que sobrevive entre invocaciones calientes."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
 class DatabaseAdapter:
     def __init__(self):
         # Si estamos en local (sin AWS), usamos mocks o archivos? 
@@ -25,25 +80,48 @@ class DatabaseAdapter:
             logger.warning(f"No se pudo conectar a DynamoDB: {e}. Modo offline/local limitado.")
             self.dynamodb = None
 
-    def get_config(self):
-        """Obtiene la configuración de canales (guild_id -> channel_id)."""
+        # Capa en memoria delante de DynamoDB (por contenedor)
+        self.article_lru = LRUCache(maxsize=64)
+        self.translation_lru = LRUCache(maxsize=256)
+
+    def get_channels(self):
+        """Canales configurados con su estado de entrega.
+
+        Devuelve {guild_id: {'channel_id', 'failure_count', 'disabled'}},
+        incluidos los deshabilitados. Recorre todas las páginas del scan.
+        """
         if not self.dynamodb:
             return {}
-            
+
         try:
-            # Scan es costoso, pero para pocos servers (<100) está bien.
-            response = self.table_config.scan()
-            items = response.get('Items', [])
-            config = {}
-            for item in items:
-                config[item['guild_id']] = int(item['channel_id'])
-            return config
+            channels = {}
+            scan_kwargs = {}
+            while True:
+                response = self.table_config.scan(**scan_kwargs)
+                for item in response.get('Items', []):
+                    channels[item['guild_id']] = {
+                        'channel_id': int(item['channel_id']),
+                        'failure_count': int(item.get('failure_count', 0)),
+                        'disabled': bool(item.get('disabled', False))
+                    }
+                if 'LastEvaluatedKey' not in response:
+                    return channels
+                scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
         except Exception as e:
             logger.error(f"Error leyendo config de DynamoDB: {e}")
             return {}
 
+    @staticmethod
+    def enabled_channels(channels):
+        """guild_id -> channel_id de los canales no deshabilitados."""
+        return {guild_id: info['channel_id'] for guild_id, info in channels.items() if not info['disabled']}
+
+    def get_config(self):
+        """Obtiene la configuración de canales activos (guild_id -> channel_id)."""
+        return self.enabled_channels(self.get_channels())
+
     def set_channel(self, guild_id, channel_id):
-        """Guarda el canal para un servidor."""
+        """Guarda el canal para un servidor (y lo reactiva si estaba deshabilitado)."""
         if not self.dynamodb:
             return
             
@@ -58,6 +136,63 @@ class DatabaseAdapter:
         except Exception as e:
             logger.error(f"Error guardando config en DynamoDB: {e}")
 
+    def record_channel_failure(self, guild_id, channel_id, status):
+        """Suma un fallo permanente (403/404) al canal del servidor.
+
+        Al llegar a CHANNEL_FAILURE_THRESHOLD fallos consecutivos el canal
+        queda deshabilitado y sale del envío. Solo afecta a la config si el
+        servidor sigue usando ese canal. Devuelve True si se deshabilitó.
+        """
+        if not self.dynamodb:
+            return False
+
+        try:
+            response = self.table_config.update_item(
+                Key={'guild_id': str(guild_id)},
+                UpdateExpression='ADD failure_count :one SET last_status = :s, last_failure_at = :t',
+                ConditionExpression='channel_id = :c',
+                ExpressionAttributeValues={
+                    ':one': 1, ':s': status, ':t': datetime.now().isoformat(), ':c': int(channel_id)
+                },
+                ReturnValues='UPDATED_NEW'
+            )
+            failures = int(response.get('Attributes', {}).get('failure_count', 0))
+            if failures < CHANNEL_FAILURE_THRESHOLD:
+                return False
+            self.table_config.update_item(
+                Key={'guild_id': str(guild_id)},
+                UpdateExpression='SET disabled = :d, disabled_at = :t',
+                ConditionExpression='channel_id = :c',
+                ExpressionAttributeValues={':d': True, ':t': datetime.now().isoformat(), ':c': int(channel_id)}
+            )
+            logger.warning(f"🚫 Canal {channel_id} de {guild_id} deshabilitado tras {failures} fallos ({status})")
+            return True
+        except ClientError as e:
+            if not self._is_conditional_failure(e):
+                logger.error(f"Error registrando fallo del canal {channel_id}: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"Error registrando fallo del canal {channel_id}: {e}")
+            return False
+
+    def reset_channel_failures(self, guild_id, channel_id):
+        """Vuelve a cero los fallos de un canal que recibió un mensaje."""
+        if not self.dynamodb:
+            return
+
+        try:
+            self.table_config.update_item(
+                Key={'guild_id': str(guild_id)},
+                UpdateExpression='REMOVE failure_count, last_status, last_failure_at',
+                ConditionExpression='channel_id = :c',
+                ExpressionAttributeValues={':c': int(channel_id)}
+            )
+        except ClientError as e:
+            if not self._is_conditional_failure(e):
+                logger.error(f"Error reiniciando fallos del canal {channel_id}: {e}")
+        except Exception as e:
+            logger.error(f"Error reiniciando fallos del canal {channel_id}: {e}")
+
     def get_last_post_info(self, tag):
         """Obtiene información completa del último post (link y fecha)."""
         if not self.dynamodb:
@@ -97,6 +232,43 @@ class DatabaseAdapter:
         except Exception as e:
             logger.error(f"Error guardando estado en DynamoDB: {e}")
     
+    def get_board_state(self, tag):
+        """Obtiene el estado de un tablero: validadores HTTP, fingerprint y links ya vistos."""
+        if not self.dynamodb:
+            return {}
+
+        try:
+            response = self.table_state.get_item(Key={'key': f"board_{tag}"})
+            item = response.get('Item') or {}
+            return {
+                'etag': item.get('etag'),
+                'last_modified': item.get('last_modified'),
+                'fingerprint': item.get('fingerprint'),
+                'seen': list(item.get('seen') or [])
+            }
+        except Exception as e:
+            logger.error(f"Error leyendo estado de tablero: {e}")
+            return {}
+
+    def update_board_state(self, tag, **fields):
+        """Actualiza campos del estado de un tablero sin pisar los demás."""
+        if not self.dynamodb or not fields:
+            return
+
+        try:
+            fields['updated_at'] = datetime.now().isoformat()
+            names = {f"#f{i}": name for i, name in enumerate(fields)}
+            values = {f":v{i}": value for i, value in enumerate(fields.values())}
+            assignments = ', '.join(f"#f{i} = :v{i}" for i in range(len(fields)))
+            self.table_state.update_item(
+                Key={'key': f"board_{tag}"},
+                UpdateExpression=f"SET {assignments}",
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values
+            )
+        except Exception as e:
+            logger.error(f"Error guardando estado de tablero: {e}")
+    
     def cache_translation(self, message_id, original_content, translations, metadata=None):
         """Guarda traducciones en cache con TTL de 1 hora."""
         if not self.dynamodb:
@@ -126,12 +298,384 @@ class DatabaseAdapter:
             response = self.table_state.get_item(Key={'key': f"cache_{message_id}"})
             item = response.get('Item')
             if item:
-                return {
-                    'original': item.get('original_content'),
-                    'translations': item.get('translations', {}),
-                    'metadata': item.get('metadata', {})
-                }
+                return self._cached_translation_entry(item)
             return None
         except Exception as e:
             logger.error(f"Error leyendo cache: {e}")
             return None
+
+    @staticmethod
+    def _cached_translation_entry(item):
+        return {
+            'original': item.get('original_content'),
+            'translations': item.get('translations', {}),
+            'metadata': item.get('metadata', {})
+        }
+
+    def set_cached_translation(self, message_id, lang, translated):
+        """Agrega una traducción al cache de un mensaje con un único UpdateItem.
+
+        Solo escribe translations.<lang>, así que traducciones concurrentes a
+        distintos idiomas no se pisan. Devuelve el item actualizado (mismo
+        formato que get_cached_translation), o None si expiró o no existe.
+        """
+        if not self.dynamodb:
+            return None
+
+        try:
+            response = self.table_state.update_item(
+                Key={'key': f"cache_{message_id}"},
+                UpdateExpression='SET translations.#lang = :v',
+                ConditionExpression='attribute_exists(translations)',
+                ExpressionAttributeNames={'#lang': lang},
+                ExpressionAttributeValues={':v': translated},
+                ReturnValues='ALL_NEW'
+            )
+            return self._cached_translation_entry(response.get('Attributes', {}))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                logger.info(f"Cache de traducción {message_id} expirado, no se actualiza")
+            else:
+                logger.error(f"Error actualizando cache: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error actualizando cache: {e}")
+            return None
+
+    @staticmethod
+    def _translation_key(text, lang):
+        digest = hashlib.sha1(f"{lang}\x00{text}".encode()).hexdigest()
+        return f"translation_{digest}"
+
+    def _batch_get_state(self, keys, projection, consistent=False):
+        """Items de BicheonState para `keys` con batch_get_item.
+
+        Lee de a TRANSLATION_BATCH_SIZE claves y reintenta las UnprocessedKeys
+        con backoff hasta leerlas todas; lanza RuntimeError si siguen sin
+        leerse tras BATCH_GET_MAX_ATTEMPTS intentos.
+        """
+        items = []
+        for i in range(0, len(keys), TRANSLATION_BATCH_SIZE):
+            table_request = {
+                'Keys': [{'key': key} for key in keys[i:i + TRANSLATION_BATCH_SIZE]],
+                'ProjectionExpression': projection,
+                'ExpressionAttributeNames': {'#k': 'key'}
+            }
+            if consistent:
+                table_request['ConsistentRead'] = True
+            request = {self.table_state_name: table_request}
+            attempt = 0
+            while request:
+                if attempt:
+                    if attempt >= BATCH_GET_MAX_ATTEMPTS:
+                        raise RuntimeError(f"batch_get_item dejó claves sin leer tras {attempt} intentos")
+                    time.sleep(BATCH_GET_BACKOFF_SECONDS * 2 ** (attempt - 1))
+                response = self.dynamodb.batch_get_item(RequestItems=request)
+                items.extend(response.get('Responses', {}).get(self.table_state_name, []))
+                request = response.get('UnprocessedKeys') or {}
+                attempt += 1
+        return items
+
+    def lookup_translations(self, pairs):
+        """Traducciones conocidas para pares (texto, idioma).
+
+        Devuelve {(texto, idioma): traducción} solo con los pares encontrados.
+        Consulta primero la LRU en memoria y luego DynamoDB con batch_get_item
+        (de a TRANSLATION_BATCH_SIZE claves, reintentando las no procesadas).
+        """
+        found = {}
+        missing = {}
+        for text, lang in dict.fromkeys(pairs):
+            key = self._translation_key(text, lang)
+            translated = self.translation_lru.get(key)
+            if translated is not None:
+                found[(text, lang)] = translated
+            else:
+                missing[key] = (text, lang)
+
+        if not missing or not self.dynamodb:
+            return found
+
+        try:
+            for item in self._batch_get_state(list(missing), '#k, translated'):
+                pair = missing.get(item['key'])
+                if pair and item.get('translated') is not None:
+                    found[pair] = item['translated']
+                    self.translation_lru.set(item['key'], item['translated'])
+        except Exception as e:
+            logger.error(f"Error leyendo traducciones: {e}")
+        return found
+
+    def get_translations(self, text, langs):
+        """Traducciones conocidas de `text` a cada idioma de `langs` ({lang: traducción})."""
+        found = self.lookup_translations([(text, lang) for lang in langs])
+        return {lang: translated for (_, lang), translated in found.items()}
+
+    def get_translation(self, text, lang):
+        """Traducción conocida de `text` a `lang`, o None."""
+        return self.get_translations(text, [lang]).get(lang)
+
+    def store_translations(self, translations):
+        """Guarda {(texto, idioma): traducción} en la LRU y en DynamoDB con TTL."""
+        if not translations:
+            return
+        for (text, lang), translated in translations.items():
+            self.translation_lru.set(self._translation_key(text, lang), translated)
+
+        if not self.dynamodb:
+            return
+
+        try:
+            ttl = int((datetime.now() + timedelta(days=TRANSLATION_CACHE_TTL_DAYS)).timestamp())
+            with self.table_state.batch_writer() as batch:
+                for (text, lang), translated in translations.items():
+                    batch.put_item(Item={
+                        'key': self._translation_key(text, lang),
+                        'lang': lang,
+                        'translated': translated,
+                        'ttl': ttl
+                    })
+        except Exception as e:
+            logger.error(f"Error guardando traducciones: {e}")
+
+    def set_translation(self, text, lang, translated):
+        """Guarda la traducción de `text` a `lang` (LRU y DynamoDB con TTL)."""
+        self.store_translations({(text, lang): translated})
+
+    @staticmethod
+    def _article_key(url):
+        return f"article_{hashlib.sha1(url.encode()).hexdigest()}"
+
+    @staticmethod
+    def is_article_fresh(entry):
+        """Indica si una entrada de la cache de artículos puede usarse sin revalidar."""
+        return bool(entry) and entry.get('fresh_until', 0) > time.time()
+
+    def get_article_cache(self, url):
+        """Obtiene el texto extraído y los bullets cacheados de un artículo.
+
+        Consulta primero la LRU en memoria y luego DynamoDB. La entrada puede
+        estar vencida (ver is_article_fresh): sus validadores sirven para
+        revalidar contra el foro.
+        """
+        key = self._article_key(url)
+        entry = self.article_lru.get(key)
+        if entry:
+            return entry
+
+        if not self.dynamodb:
+            return None
+
+        try:
+            response = self.table_state.get_item(Key={'key': key})
+            item = response.get('Item')
+            if not item:
+                return None
+            entry = {
+                'url': item.get('url'),
+                'text': item.get('text'),
+                'bullets': item.get('bullets'),
+                'content_hash': item.get('content_hash'),
+                'etag': item.get('etag'),
+                'last_modified': item.get('last_modified'),
+                'fresh_until': int(item.get('fresh_until', 0))
+            }
+            self.article_lru.set(key, entry)
+            return entry
+        except Exception as e:
+            logger.error(f"Error leyendo cache de artículo: {e}")
+            return None
+
+    def set_article_cache(self, url, text, bullets, content_hash=None, etag=None, last_modified=None):
+        """Guarda el texto extraído y los bullets de un artículo con sus validadores."""
+        now = time.time()
+        entry = {
+            'url': url,
+            'text': text,
+            'bullets': bullets,
+            'content_hash': content_hash,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresh_until': int(now + ARTICLE_CACHE_FRESH_SECONDS)
+        }
+        key = self._article_key(url)
+        self.article_lru.set(key, entry)
+
+        if not self.dynamodb:
+            return
+
+        try:
+            item = {k: v for k, v in entry.items() if v is not None}
+            item['key'] = key
+            item['ttl'] = int(now + ARTICLE_CACHE_RETENTION_DAYS * 86400)
+            self.table_state.put_item(Item=item)
+        except Exception as e:
+            logger.error(f"Error guardando cache de artículo: {e}")
+
+    def touch_article_cache(self, url, entry):
+        """Renueva la frescura de una entrada revalidada (304 o mismo hash)."""
+        self.set_article_cache(
+            url, entry['text'], entry['bullets'],
+            content_hash=entry.get('content_hash'),
+            etag=entry.get('etag'),
+            last_modified=entry.get('last_modified')
+        )
+
+    # -------- LEASES (single-flight de workers) --------
+    @staticmethod
+    def _is_conditional_failure(error):
+        return error.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException'
+
+    def acquire_lease(self, name, owner, seconds):
+        """Toma el lease `name` durante `seconds` con una escritura condicional.
+
+        Solo se puede tomar si no existe o si venció (el dueño anterior murió
+        o su resultado ya caducó). Ante un error inesperado de DynamoDB se
+        devuelve True: es preferible repetir trabajo a no hacerlo.
+        """
+        if not self.dynamodb:
+            return True
+
+        now = int(time.time())
+        try:
+            self.table_state.put_item(
+                Item={
+                    'key': f"lease_{name}",
+                    'owner': owner,
+                    'expires_at': now + seconds,
+                    'ttl': now + seconds
+                },
+                ConditionExpression='attribute_not_exists(#k) OR expires_at < :now',
+                ExpressionAttributeNames={'#k': 'key'},
+                ExpressionAttributeValues={':now': now}
+            )
+            return True
+        except ClientError as e:
+            if self._is_conditional_failure(e):
+                return False
+            logger.error(f"Error tomando lease {name}: {e}")
+            return True
+        except Exception as e:
+            logger.error(f"Error tomando lease {name}: {e}")
+            return True
+
+    def get_lease(self, name):
+        """Lease vigente: {'owner', 'expires_at'} y 'result' si el dueño terminó."""
+        if not self.dynamodb:
+            return None
+
+        try:
+            response = self.table_state.get_item(Key={'key': f"lease_{name}"}, ConsistentRead=True)
+            item = response.get('Item')
+            if not item or int(item.get('expires_at', 0)) < time.time():
+                return None
+            lease = {'owner': item.get('owner'), 'expires_at': int(item['expires_at'])}
+            if 'result' in item:
+                lease['result'] = json.loads(item['result'])
+            return lease
+        except Exception as e:
+            logger.error(f"Error leyendo lease {name}: {e}")
+            return None
+
+    def complete_lease(self, name, owner, result, keep_seconds):
+        """Publica el resultado del dueño del lease para que otros lo reutilicen."""
+        if not self.dynamodb:
+            return
+
+        expires_at = int(time.time()) + keep_seconds
+        try:
+            self.table_state.update_item(
+                Key={'key': f"lease_{name}"},
+                UpdateExpression='SET #r = :r, expires_at = :e, #t = :e',
+                ConditionExpression='#o = :o',
+                ExpressionAttributeNames={'#r': 'result', '#t': 'ttl', '#o': 'owner'},
+                ExpressionAttributeValues={':r': json.dumps(result), ':e': expires_at, ':o': owner}
+            )
+        except ClientError as e:
+            if self._is_conditional_failure(e):
+                logger.warning(f"⚠️ Lease {name} perdido antes de terminar")
+            else:
+                logger.error(f"Error completando lease {name}: {e}")
+        except Exception as e:
+            logger.error(f"Error completando lease {name}: {e}")
+
+    def release_lease(self, name, owner):
+        """Libera el lease (si sigue siendo nuestro) para que otro reintente."""
+        if not self.dynamodb:
+            return
+
+        try:
+            self.table_state.delete_item(
+                Key={'key': f"lease_{name}"},
+                ConditionExpression='#o = :o',
+                ExpressionAttributeNames={'#o': 'owner'},
+                ExpressionAttributeValues={':o': owner}
+            )
+        except ClientError as e:
+            if not self._is_conditional_failure(e):
+                logger.error(f"Error liberando lease {name}: {e}")
+        except Exception as e:
+            logger.error(f"Error liberando lease {name}: {e}")
+
+    # -------- REGISTRO DE ENVÍOS (post, canal) --------
+    @staticmethod
+    def _delivery_key(message_id, channel_id):
+        return f"delivery_{message_id}_{channel_id}"
+
+    def get_delivered_channels(self, message_id, channel_ids):
+        """Canales de `channel_ids` que ya recibieron el mensaje `message_id`.
+
+        Lectura consistente con batch_get_item. Si no se puede leer el
+        registro completo la excepción se propaga: el trabajo falla y SQS lo
+        reentrega más tarde, en vez de reenviar a canales ya entregados.
+        """
+        if not self.dynamodb:
+            return set()
+
+        keys = {self._delivery_key(message_id, channel_id): channel_id for channel_id in channel_ids}
+        items = self._batch_get_state(list(keys), '#k', consistent=True)
+        return {keys[item['key']] for item in items if item['key'] in keys}
+
+    def record_delivery(self, message_id, channel_id):
+        """Registra que `channel_id` recibió `message_id` (escritura condicional).
+
+        Devuelve False si el envío ya estaba registrado (otro worker entregó
+        el mismo trabajo), True en caso contrario.
+        """
+        if not self.dynamodb:
+            return True
+
+        ttl = int((datetime.now() + timedelta(days=DELIVERY_LEDGER_TTL_DAYS)).timestamp())
+        try:
+            self.table_state.put_item(
+                Item={
+                    'key': self._delivery_key(message_id, channel_id),
+                    'delivered_at': datetime.now().isoformat(),
+                    'ttl': ttl
+                },
+                ConditionExpression='attribute_not_exists(#k)',
+                ExpressionAttributeNames={'#k': 'key'}
+            )
+            return True
+        except ClientError as e:
+            if self._is_conditional_failure(e):
+                return False
+            logger.error(f"Error registrando envío de {message_id} a {channel_id}: {e}")
+            return True
+        except Exception as e:
+            logger.error(f"Error registrando envío de {message_id} a {channel_id}: {e}")
+            return True
+
+
+_default_adapter = None
+
+def get_database():
+    """DatabaseAdapter compartido por el contenedor, creado en el primer uso.
+
+    Así los handlers que no tocan DynamoDB (p. ej. el PING de Discord) no
+    pagan la importación de boto3 ni la creación del cliente.
+    """
+    global _default_adapter
+    if _default_adapter is None:
+        _default_adapter = DatabaseAdapter()
+    return _default_adapter
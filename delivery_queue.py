@@ -0,0 +1,203 @@
+"""
+Cola de envíos: desacopla la detección de posts (scraper) del envío a Discord.
+
+El scraper encola un trabajo por lote de canales (DELIVERY_BATCH_SIZE) y un
+worker de envío los consume: cada trabajo se envía con fanout.broadcast y
+los canales que fallan sin que el mensaje haya llegado (429 agotado, fallo
+de conexión) se vuelven a encolar solos, hasta MAX_DELIVERY_ATTEMPTS.
+
+Con un registro de envíos (`ledger`, el adaptador de DynamoDB) la entrega es
+reanudable: los canales que ya recibieron el mensaje (meta['message_id']) se
+saltan, así un trabajo reentregado por SQS o un post reencolado tras una
+caída del scraper solo envía lo pendiente.
+
+Backends:
+- 'sqs': cola SQS (DELIVERY_QUEUE_URL); DeliveryFunction la consume.
+- 'memory': cola en memoria del proceso, para tests y ejecución local; el
+  propio scraper la vacía al terminar.
+"""
+
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import deque
+
+logger = logging.getLogger('BicheonDelivery')
+logger.setLevel(logging.INFO)
+
+DELIVERY_BATCH_SIZE = int(os.environ.get('DELIVERY_BATCH_SIZE', '25'))
+MAX_DELIVERY_ATTEMPTS = 3
+# Espera antes de reintentar un lote con canales fallidos (solo SQS)
+RETRY_DELAY_SECONDS = 30
+
+# Fallos en los que el mensaje seguro no llegó a Discord (ver fanout)
+RETRYABLE_ERROR_KINDS = ('connect', 'rate_limited')
+
+# Respuestas de Discord que no cambian al reintentar: 403 (sin acceso al
+# canal, bot expulsado) y 404 (canal borrado)
+PERMANENT_FAILURE_STATUSES = (403, 404)
+
+# Máximo de mensajes por send_message_batch de SQS
+SQS_BATCH_SIZE = 10
+
+
+class MemoryQueue:
+    """Cola FIFO en memoria, thread-safe."""
+
+    name = 'memory'
+    local = True
+
+    def __init__(self):
+        self._jobs = deque()
+        self._lock = threading.Lock()
+
+    def send(self, jobs, delay_seconds=0):
+        """Encola trabajos (el retardo se ignora en memoria)."""
+        with self._lock:
+            self._jobs.extend(json.loads(json.dumps(job)) for job in jobs)
+
+    def receive(self, max_jobs=SQS_BATCH_SIZE):
+        """Saca hasta `max_jobs` trabajos."""
+        with self._lock:
+            return [self._jobs.popleft() for _ in range(min(max_jobs, len(self._jobs)))]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._jobs)
+
+
+class SqsQueue:
+    """Cola SQS; el consumo lo hace DeliveryFunction (event source mapping)."""
+
+    name = 'sqs'
+    local = False
+
+    def __init__(self, url):
+        import boto3
+        self.url = url
+        self._client = boto3.client('sqs')
+
+    def send(self, jobs, delay_seconds=0):
+        """Encola trabajos de a SQS_BATCH_SIZE. Lanza si SQS rechaza alguno."""
+        for i in range(0, len(jobs), SQS_BATCH_SIZE):
+            entries = [
+                {'Id': str(n), 'MessageBody': json.dumps(job), 'DelaySeconds': delay_seconds}
+                for n, job in enumerate(jobs[i:i + SQS_BATCH_SIZE])
+            ]
+            response = self._client.send_message_batch(QueueUrl=self.url, Entries=entries)
+            if response.get('Failed'):
+                raise RuntimeError(f"SQS rechazó {len(response['Failed'])} trabajos de envío")
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Cola de envíos del contenedor: SQS si hay DELIVERY_QUEUE_URL, si no en memoria."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            url = os.environ.get('DELIVERY_QUEUE_URL')
+            _queue = SqsQueue(url) if url else MemoryQueue()
+            logger.debug(f"Cola de envíos: {_queue.name}")
+        return _queue
+
+
+def make_jobs(channel_ids, payload, meta=None, batch_size=None, guilds=None, failing=()):
+    """Arma los trabajos de envío de un mensaje, un lote de canales por trabajo.
+
+    `guilds` ({channel_id: guild_id}) y `failing` (canales con fallos
+    previos) viajan en cada trabajo, acotados a sus canales, para llevar el
+    estado de entrega de cada canal sin releer la config.
+    """
+    channel_ids = list(channel_ids)
+    batch_size = batch_size or DELIVERY_BATCH_SIZE
+    guilds = guilds or {}
+    failing = set(failing)
+    jobs = []
+    for i in range(0, len(channel_ids), batch_size):
+        batch = channel_ids[i:i + batch_size]
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'channel_ids': batch,
+            'payload': payload,
+            'meta': meta or {},
+            'attempt': 1
+        }
+        if guilds:
+            job['guilds'] = {str(c): guilds[c] for c in batch if c in guilds}
+            job['failing'] = [c for c in batch if c in failing]
+        jobs.append(job)
+    return jobs
+
+
+def is_retryable(outcome):
+    """Indica si un envío fallido se puede repetir sin duplicar el mensaje.
+
+    Solo los 429 y los fallos de conexión previos al envío: tras un timeout
+    de lectura o un 5xx Discord pudo haber creado el mensaje igual.
+    """
+    return outcome.get('status') == 429 or outcome.get('error_kind') in RETRYABLE_ERROR_KINDS
+
+
+def is_permanent(outcome):
+    """Indica si el canal no puede recibir mensajes (borrado o sin acceso)."""
+    return not outcome.get('ok') and outcome.get('status') in PERMANENT_FAILURE_STATUSES
+
+
+def deliver_job(job, queue, send, ledger=None, tracker=None):
+    """Envía un trabajo a sus canales y reencola los fallos transitorios.
+
+    `send(channel_ids, payload, on_result)` envía el mensaje a los canales,
+    llama a `on_result(outcome)` en el hilo que llama apenas termina cada
+    uno y devuelve los resultados en el mismo orden (ver fanout.broadcast).
+    Con `ledger`, los canales ya entregados se saltan y cada envío exitoso
+    se registra en cuanto termina, así un timeout o una caída a mitad del
+    lote no deja canales entregados sin registrar; las lecturas y
+    escrituras del registro se hacen en ese mismo hilo (boto3.resource no
+    es thread-safe). `tracker(job, outcomes)`,
+    si se pasa, recibe los resultados en ese mismo hilo. Devuelve los
+    resultados de los canales enviados en esta entrega.
+    """
+    channel_ids = job['channel_ids']
+    message_id = job.get('meta', {}).get('message_id')
+    if ledger is not None and message_id:
+        delivered = ledger.get_delivered_channels(message_id, channel_ids)
+        if delivered:
+            logger.info(f"⏭️ Trabajo {job['job_id']}: {len(delivered)} canales ya tenían el mensaje")
+            channel_ids = [channel_id for channel_id in channel_ids if channel_id not in delivered]
+
+    def record(outcome):
+        if outcome['ok'] and not ledger.record_delivery(message_id, outcome['channel_id']):
+            logger.warning(f"⚠️ {outcome['channel_id']} recibió {message_id} desde otro worker")
+
+    on_result = record if ledger is not None and message_id else None
+    outcomes = send(channel_ids, job['payload'], on_result) if channel_ids else []
+    if tracker is not None and outcomes:
+        tracker(job, outcomes)
+
+    failed = [o['channel_id'] for o in outcomes if not o['ok'] and is_retryable(o)]
+    sent = sum(1 for o in outcomes if o['ok'])
+    logger.info(f"📬 Trabajo {job['job_id']} (intento {job['attempt']}): {sent}/{len(outcomes)} canales")
+
+    if failed:
+        if job['attempt'] < MAX_DELIVERY_ATTEMPTS:
+            retry = dict(job, channel_ids=failed, attempt=job['attempt'] + 1)
+            queue.send([retry], delay_seconds=RETRY_DELAY_SECONDS * job['attempt'])
+        else:
+            logger.error(f"❌ Trabajo {job['job_id']}: {len(failed)} canales sin entregar tras {job['attempt']} intentos")
+    return outcomes
+
+
+def drain(queue, send, max_jobs=SQS_BATCH_SIZE, ledger=None, tracker=None):
+    """Vacía una cola local entregando sus trabajos. Devuelve los resultados."""
+    outcomes = []
+    while True:
+        jobs = queue.receive(max_jobs)
+        if not jobs:
+            return outcomes
+        for job in jobs:
+            outcomes.extend(deliver_job(job, queue, send, ledger, tracker))
@@ -0,0 +1,234 @@
+"""
+Envío concurrente de mensajes a los canales de Discord respetando sus límites.
+
+Discord limita por "bucket" (para POST /channels/{id}/messages, uno por
+canal) y además impone un límite global por bot. RateLimiter lleva la
+cuenta de ambos a partir de las cabeceras X-RateLimit-* de cada respuesta:
+antes de cada envío espera lo justo (reset del bucket, pausa global tras un
+429 global, y un ritmo máximo de GLOBAL_RATE_LIMIT peticiones por segundo),
+y ante un 429 respeta retry_after y reintenta.
+
+fan_out() reparte los envíos en un pool acotado y devuelve el resultado de
+cada canal (y, con `on_result`, lo entrega en el hilo que llama a medida que
+termina); broadcast() envía un mismo mensaje a muchos canales con el
+cuerpo JSON y las cabeceras codificados una sola vez.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+import http_client
+
+logger = logging.getLogger('BicheonFanout')
+logger.setLevel(logging.INFO)
+
+DISCORD_API = "https://discord.com/api/v10"
+
+# Envíos simultáneos y límite global de Discord (50 peticiones/s por bot)
+FANOUT_MAX_WORKERS = int(os.environ.get('FANOUT_MAX_WORKERS', '8'))
+GLOBAL_RATE_LIMIT = 50
+# Contenedores que pueden enviar a la vez (MaximumConcurrency de
+# DeliveryFunction): cada uno usa su parte del límite global
+FANOUT_CONTAINERS = max(1, int(os.environ.get('FANOUT_CONTAINERS', '1')))
+# Intentos por canal (los 429 cuentan como intento)
+MAX_ATTEMPTS = 3
+
+
+class RateLimiter:
+    """Estado de los rate limits de Discord, compartido entre hilos."""
+
+    def __init__(self, global_per_second=GLOBAL_RATE_LIMIT):
+        self._lock = threading.Lock()
+        self._buckets = {}  # ruta -> {'remaining': int, 'reset_at': monotonic}
+        self._global_until = 0.0
+        self._interval = 1.0 / global_per_second
+        self._next_slot = 0.0
+
+    def acquire(self, route):
+        """Bloquea hasta que se pueda hacer una petición por `route`."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                blocked_until = self._global_until
+                bucket = self._buckets.get(route)
+                if bucket and bucket['remaining'] <= 0:
+                    blocked_until = max(blocked_until, bucket['reset_at'])
+
+                if blocked_until <= now:
+                    if bucket:
+                        if bucket['reset_at'] <= now:
+                            # Ventana vencida: se sabrá de nuevo con la próxima respuesta
+                            del self._buckets[route]
+                        else:
+                            bucket['remaining'] -= 1
+                    slot = max(self._next_slot, now)
+                    self._next_slot = slot + self._interval
+                    delay = slot - now
+                    break
+                delay = blocked_until - now
+            time.sleep(delay)
+
+        if delay > 0:
+            time.sleep(delay)
+
+    def update(self, route, response):
+        """Actualiza el estado con las cabeceras de una respuesta.
+
+        Devuelve los segundos a esperar si la respuesta fue un 429, o None.
+        """
+        headers = response.headers
+        now = time.monotonic()
+        with self._lock:
+            remaining = headers.get('X-RateLimit-Remaining')
+            reset_after = headers.get('X-RateLimit-Reset-After')
+            if remaining is not None and reset_after is not None:
+                try:
+                    self._buckets[route] = {
+                        'remaining': int(remaining),
+                        'reset_at': now + float(reset_after)
+                    }
+                except ValueError:
+                    pass
+
+            if response.status_code != 429:
+                return None
+
+            retry_after, is_global = _retry_info(response)
+            if is_global:
+                logger.warning(f"⚠️ Rate limit global de Discord, pausa de {retry_after:.2f}s")
+                self._global_until = max(self._global_until, now + retry_after)
+            else:
+                self._buckets[route] = {'remaining': 0, 'reset_at': now + retry_after}
+            return retry_after
+
+
+def _retry_info(response):
+    """(retry_after, es_global) de un 429, desde el cuerpo JSON o las cabeceras."""
+    retry_after = None
+    is_global = response.headers.get('X-RateLimit-Global', '').lower() == 'true' or \
+        response.headers.get('X-RateLimit-Scope') == 'global'
+    try:
+        body = response.json()
+        retry_after = float(body.get('retry_after'))
+        is_global = is_global or bool(body.get('global'))
+    except Exception:
+        pass
+    if retry_after is None:
+        try:
+            retry_after = float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            retry_after = 1.0
+    return retry_after, is_global
+
+
+# Estado compartido por el contenedor: los buckets sobreviven entre invocaciones
+limiter = RateLimiter(GLOBAL_RATE_LIMIT / FANOUT_CONTAINERS)
+
+
+def encode_message(payload, token):
+    """Cuerpo JSON (bytes) y cabeceras de un mensaje, listos para reutilizar."""
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    headers = {
+        "Authorization": f"Bot {token}",
+        "Content-Type": "application/json"
+    }
+    return body, headers
+
+
+def post_channel_message(channel_id, payload, headers, rate_limiter=None, max_attempts=MAX_ATTEMPTS):
+    """Envía un mensaje a un canal respetando los rate limits.
+
+    `payload` es el mensaje (dict) o su cuerpo ya codificado (bytes, ver
+    encode_message). Devuelve el resultado del canal: {'channel_id', 'ok',
+    'status', 'attempts', 'error', 'error_kind'}. Solo se reintentan los 429
+    y los fallos de conexión previos al envío, para no duplicar mensajes.
+
+    `error_kind` dice si el mensaje pudo llegar a Discord: 'connect' (la
+    petición nunca salió) y 'rate_limited' (429) son seguros de reintentar;
+    'network' (timeout de lectura, conexión cortada) y 'http' (respuesta de
+    error, incluidos los 5xx) no, porque Discord pudo haberlo creado.
+    """
+    rate_limiter = rate_limiter or limiter
+    url = f"{DISCORD_API}/channels/{channel_id}/messages"
+    body = {'data': payload} if isinstance(payload, bytes) else {'json': payload}
+    outcome = {'channel_id': channel_id, 'ok': False, 'status': None, 'attempts': 0, 'error': None,
+               'error_kind': None}
+
+    while outcome['attempts'] < max_attempts:
+        outcome['attempts'] += 1
+        rate_limiter.acquire(channel_id)
+        try:
+            response = http_client.post(url, headers=headers, retries=0, **body)
+        except requests.exceptions.ConnectTimeout as e:
+            outcome['error'], outcome['error_kind'] = str(e), 'connect'
+            continue
+        except Exception as e:
+            outcome['error'], outcome['error_kind'] = str(e), 'network'
+            break
+
+        outcome['status'] = response.status_code
+        if rate_limiter.update(channel_id, response) is not None:
+            outcome['error'], outcome['error_kind'] = 'rate limited', 'rate_limited'
+            continue
+
+        outcome['ok'] = 200 <= response.status_code < 300
+        outcome['error'] = None if outcome['ok'] else response.text[:200]
+        outcome['error_kind'] = None if outcome['ok'] else 'http'
+        break
+
+    if not outcome['ok']:
+        logger.error(f"Error enviando mensaje a {channel_id}: {outcome['status']} {outcome['error']}")
+    return outcome
+
+
+def fan_out(channel_ids, send, max_workers=None, on_result=None):
+    """Llama a `send(channel_id)` para cada canal con paralelismo acotado.
+
+    `send` devuelve el resultado del canal; si lanza una excepción, el canal
+    queda como fallido. `on_result(outcome)`, si se pasa, se llama en el
+    hilo que llama apenas termina cada canal, sin esperar al resto (p. ej.
+    para registrar la entrega antes de un timeout). Devuelve los resultados
+    en el orden de `channel_ids`.
+    """
+    channel_ids = list(channel_ids)
+    if not channel_ids:
+        return []
+
+    def run(channel_id):
+        try:
+            return send(channel_id)
+        except Exception as e:
+            logger.error(f"Error enviando mensaje a {channel_id}: {e}")
+            return {'channel_id': channel_id, 'ok': False, 'status': None, 'attempts': 1, 'error': str(e),
+                    'error_kind': 'network'}
+
+    workers = max(1, min(max_workers or FANOUT_MAX_WORKERS, len(channel_ids)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run, channel_id): i for i, channel_id in enumerate(channel_ids)}
+        outcomes = [None] * len(channel_ids)
+        for future in as_completed(futures):
+            outcomes[futures[future]] = future.result()
+            if on_result is not None:
+                on_result(outcomes[futures[future]])
+        return outcomes
+
+
+def broadcast(channel_ids, payload, token, max_workers=None, rate_limiter=None, on_result=None):
+    """Envía el mismo mensaje a todos los canales.
+
+    El cuerpo y las cabeceras se codifican una vez y cada canal envía el
+    mismo buffer: por canal solo queda la URL y la espera del rate limit.
+    `on_result` se pasa a fan_out. Devuelve los resultados en el orden de
+    `channel_ids`.
+    """
+    body, headers = encode_message(payload, token)
+    return fan_out(
+        channel_ids, lambda channel_id: post_channel_message(channel_id, body, headers, rate_limiter), max_workers,
+        on_result
+    )
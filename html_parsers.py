@@ -0,0 +1,445 @@
+"""
+Backends de parseo HTML intercambiables para el foro de MIR4.
+
+BeautifulSoup con 'html.parser' es la opción más lenta; aquí se expone una
+interfaz mínima común (select/select_one/get_text/get/remove_tags) con
+implementaciones sobre selectolax (lexbor), lxml y BeautifulSoup.
+
+El backend se elige con la variable HTML_PARSER_BACKEND
+('auto', 'selectolax', 'lxml' o 'bs4'). En 'auto' se usa el más rápido
+que esté instalado. Todas las implementaciones devuelven el mismo texto que
+BeautifulSoup: se ignoran comentarios y el contenido de script/style/template.
+"""
+
+import logging
+import os
+import re
+
+logger = logging.getLogger('BicheonParser')
+logger.setLevel(logging.INFO)
+
+# Contenedores cuyo texto BeautifulSoup no incluye en get_text()
+NON_TEXT_TAGS = frozenset(['script', 'style', 'template'])
+
+_SIMPLE_SELECTOR = re.compile(r'^([a-zA-Z][a-zA-Z0-9]*)?((?:\.[\w-]+)*)$')
+
+
+def _join_strings(strings, separator, strip):
+    """Une cadenas de texto con la misma semántica que BeautifulSoup.get_text."""
+    if strip:
+        strings = (s.strip() for s in strings)
+        strings = (s for s in strings if s)
+    return separator.join(strings)
+
+
+class Node:
+    """Interfaz común de un nodo HTML."""
+
+    def select(self, selector):
+        """Devuelve todos los descendientes que cumplen el selector CSS."""
+        raise NotImplementedError
+
+    def select_one(self, selector):
+        """Devuelve el primer descendiente que cumple el selector, o None."""
+        nodes = self.select(selector)
+        return nodes[0] if nodes else None
+
+    def strings(self):
+        """Itera los nodos de texto del subárbol en orden de documento."""
+        raise NotImplementedError
+
+    def get_text(self, separator='', strip=False):
+        """Texto del subárbol (misma semántica que BeautifulSoup.get_text)."""
+        return _join_strings(self.strings(), separator, strip)
+
+    @property
+    def text(self):
+        return self.get_text()
+
+    def get(self, attr, default=None):
+        """Valor de un atributo del nodo."""
+        raise NotImplementedError
+
+    def __getitem__(self, attr):
+        value = self.get(attr)
+        if value is None:
+            raise KeyError(attr)
+        return value
+
+    def remove_tags(self, tags):
+        """Elimina del subárbol todos los elementos con esos nombres de tag."""
+        raise NotImplementedError
+
+    def events(self):
+        """Recorre el subárbol en orden de documento, sin recursión.
+
+        Produce ('start', tag, nodo_nativo), ('text', cadena) y
+        ('end', tag, nodo_nativo). Omite comentarios y el contenido de
+        script/style/template, igual que get_text().
+        """
+        raise NotImplementedError
+
+
+# -------- BeautifulSoup --------
+class SoupNode(Node):
+    __slots__ = ('_node',)
+
+    def __init__(self, node):
+        self._node = node
+
+    def select(self, selector):
+        return [SoupNode(n) for n in self._node.select(selector)]
+
+    def select_one(self, selector):
+        node = self._node.select_one(selector)
+        return SoupNode(node) if node is not None else None
+
+    def strings(self):
+        return self._node.strings
+
+    def get_text(self, separator='', strip=False):
+        return self._node.get_text(separator=separator, strip=strip)
+
+    def get(self, attr, default=None):
+        return self._node.get(attr, default)
+
+    def remove_tags(self, tags):
+        for unwanted in self._node(list(tags)):
+            unwanted.decompose()
+
+    def events(self):
+        from bs4.element import Tag, NavigableString, CData
+
+        stack = [(self._node, False)]
+        while stack:
+            node, closing = stack.pop()
+            if closing:
+                yield ('end', node.name, node)
+            elif isinstance(node, Tag):
+                if node.name in NON_TEXT_TAGS:
+                    continue
+                yield ('start', node.name, node)
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.contents))
+            elif type(node) in (NavigableString, CData):
+                yield ('text', str(node))
+
+
+class SoupBackend:
+    name = 'bs4'
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._soup = BeautifulSoup
+
+    def parse(self, html):
+        return SoupNode(self._soup(html, 'html.parser'))
+
+
+# -------- lxml --------
+def _selector_to_xpath(selector):
+    """Traduce selectores simples ('tag', 'tag.clase', '.clase') a XPath.
+
+    Evita depender de cssselect: el scraper solo usa este tipo de selectores.
+    """
+    selector = selector.strip()
+    match = _SIMPLE_SELECTOR.match(selector)
+    if not selector or not match:
+        raise ValueError(f"Selector no soportado por el backend lxml: {selector!r}")
+
+    tag, classes = match.groups()
+    xpath = f"descendant::{tag.lower() if tag else '*'}"
+    for cls in filter(None, classes.split('.')):
+        xpath += f"[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+    return xpath
+
+
+class LxmlNode(Node):
+    __slots__ = ('_node',)
+
+    _xpath_cache = {}
+
+    def __init__(self, node):
+        self._node = node
+
+    def select(self, selector):
+        xpath = self._xpath_cache.get(selector)
+        if xpath is None:
+            from lxml import etree
+            xpath = self._xpath_cache[selector] = etree.XPath(_selector_to_xpath(selector))
+        return [LxmlNode(n) for n in xpath(self._node)]
+
+    def strings(self):
+        # Recorrido iterativo (sin recursión) para no depender de la
+        # profundidad del documento; el tail del nodo raíz no le pertenece.
+        stack = [self._node]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                yield item
+                continue
+            # Comentarios e instrucciones tienen tag no-str: se omite su texto
+            if not isinstance(item.tag, str) or item.tag in NON_TEXT_TAGS:
+                continue
+            if item.text:
+                yield item.text
+            for child in reversed(item):
+                if child.tail:
+                    stack.append(child.tail)
+                stack.append(child)
+
+    def get(self, attr, default=None):
+        return self._node.get(attr, default)
+
+    def remove_tags(self, tags):
+        from lxml import etree
+
+        for el in list(self._node.iter(*tags)):
+            if el is self._node:
+                continue
+            # Se reemplaza por un comentario vacío (en lugar de drop_tree) para
+            # que el tail siga siendo un nodo de texto separado, como en bs4.
+            placeholder = etree.Comment()
+            placeholder.tail = el.tail
+            el.getparent().replace(el, placeholder)
+
+    def events(self):
+        stack = [(self._node, False)]
+        while stack:
+            item, closing = stack.pop()
+            if isinstance(item, str):
+                yield ('text', item)
+            elif closing:
+                yield ('end', item.tag, item)
+            elif isinstance(item.tag, str) and item.tag not in NON_TEXT_TAGS:
+                yield ('start', item.tag, item)
+                if item.text:
+                    yield ('text', item.text)
+                stack.append((item, True))
+                for child in reversed(item):
+                    if child.tail:
+                        stack.append((child.tail, False))
+                    stack.append((child, False))
+
+
+class LxmlBackend:
+    name = 'lxml'
+
+    def __init__(self):
+        import lxml.html
+        self._fromstring = lxml.html.document_fromstring
+
+    def parse(self, html):
+        try:
+            return LxmlNode(self._fromstring(html))
+        except ValueError:
+            # lxml no acepta str con declaración de encoding (<?xml ...?>)
+            return LxmlNode(self._fromstring(html.encode('utf-8')))
+
+
+# -------- selectolax (lexbor) --------
+class LexborNode(Node):
+    __slots__ = ('_node',)
+
+    def __init__(self, node):
+        self._node = node
+
+    def _descendants(self, selector):
+        # lexbor incluye al propio nodo en css(); BeautifulSoup no
+        own_id = self._node.mem_id
+        return [n for n in self._node.css(selector) if n.mem_id != own_id]
+
+    def select(self, selector):
+        return [LexborNode(n) for n in self._descendants(selector)]
+
+    def select_one(self, selector):
+        node = self._node.css_first(selector)
+        if node is not None and node.mem_id == self._node.mem_id:
+            return super().select_one(selector)
+        return LexborNode(node) if node is not None else None
+
+    def strings(self):
+        for node in self._node.traverse(include_text=True):
+            if node.tag != '-text':
+                continue
+            parent = node.parent
+            if parent is not None and parent.tag in NON_TEXT_TAGS:
+                continue
+            yield node.text_content
+
+    def get(self, attr, default=None):
+        return self._node.attributes.get(attr, default)
+
+    def remove_tags(self, tags):
+        for tag in tags:
+            for el in self._descendants(tag):
+                el.decompose()
+
+    def events(self):
+        stack = [(self._node, False)]
+        while stack:
+            node, closing = stack.pop()
+            tag = node.tag
+            if closing:
+                yield ('end', tag, node)
+            elif tag == '-text':
+                yield ('text', node.text_content)
+            elif not tag.startswith('-') and tag not in NON_TEXT_TAGS:
+                yield ('start', tag, node)
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(list(node.iter(include_text=True))))
+
+
+class SelectolaxBackend:
+    name = 'selectolax'
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def parse(self, html):
+        return LexborNode(self._parser(html).root)
+
+
+# -------- Detección del contenido principal --------
+# Bloques que pueden ser el contenedor del contenido principal
+CONTAINER_TAGS = frozenset(['div', 'article', 'section', 'main', 'td', 'body'])
+# Elementos que forman por sí mismos una unidad de texto (párrafo)
+PARAGRAPH_TAGS = frozenset(['p', 'li', 'pre', 'blockquote', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'dd'])
+
+
+class _Frame:
+    __slots__ = ('tag', 'node', 'text_len', 'link_len', 'score', 'direct_len', 'container')
+
+    def __init__(self, tag, node, container):
+        self.tag = tag
+        self.node = node
+        self.text_len = 0
+        self.link_len = 0
+        self.score = 0.0
+        self.direct_len = 0
+        self.container = container
+
+
+def find_main_content(root, min_chars=200):
+    """Encuentra el bloque de contenido principal por densidad de texto.
+
+    Recorre el árbol una sola vez (eventos start/text/end) acumulando de
+    abajo hacia arriba la longitud de texto y de texto de enlaces de cada
+    elemento. Cada unidad de texto (un párrafo, o el texto suelto dentro de
+    un bloque) suma su longitud al bloque que la contiene y la mitad al
+    bloque superior; así gana el contenedor más ajustado a los párrafos y no
+    el wrapper de toda la página. El puntaje final se pondera por
+    (1 - densidad de enlaces) para descartar menús y listados.
+
+    Devuelve un Node del mismo backend, o None si ningún bloque tiene al
+    menos `min_chars` caracteres de texto.
+    """
+    wrap = type(root)
+    stack = []
+    link_depth = 0
+    paragraph_depth = 0
+    best, best_score = None, 0.0
+
+    def credit(frame_index, amount):
+        # Suma `amount` al contenedor más cercano desde frame_index y la mitad al siguiente
+        shares = (1.0, 0.5)
+        level = 0
+        for i in range(frame_index, -1, -1):
+            frame = stack[i]
+            if frame.container:
+                frame.score += amount * shares[level]
+                level += 1
+                if level == len(shares):
+                    break
+
+    for event in root.events():
+        kind = event[0]
+        if kind == 'start':
+            tag = event[1]
+            stack.append(_Frame(tag, event[2], tag in CONTAINER_TAGS))
+            if tag == 'a':
+                link_depth += 1
+            elif tag in PARAGRAPH_TAGS:
+                paragraph_depth += 1
+        elif kind == 'text':
+            length = len(event[1].strip())
+            if length and stack:
+                frame = stack[-1]
+                frame.text_len += length
+                if link_depth:
+                    frame.link_len += length
+                elif not paragraph_depth:
+                    frame.direct_len += length
+        else:
+            frame = stack.pop()
+            if frame.tag == 'a':
+                link_depth = max(0, link_depth - 1)
+
+            if frame.tag in PARAGRAPH_TAGS:
+                paragraph_depth -= 1
+                if not paragraph_depth:
+                    # Párrafo: cuenta entero (sin enlaces) para su contenedor
+                    credit(len(stack) - 1, frame.text_len - frame.link_len)
+            elif frame.direct_len:
+                # Texto suelto dentro del elemento (p. ej. <div>línea</div> o <br>)
+                stack.append(frame)
+                credit(len(stack) - 1, frame.direct_len)
+                stack.pop()
+
+            if stack:
+                parent = stack[-1]
+                parent.text_len += frame.text_len
+                parent.link_len += frame.link_len
+
+            if frame.container and frame.text_len >= min_chars:
+                link_density = frame.link_len / frame.text_len
+                score = frame.score * (1 - link_density)
+                if score > best_score:
+                    best, best_score = frame.node, score
+
+    return wrap(best) if best is not None else None
+
+
+BACKENDS = {
+    'selectolax': SelectolaxBackend,
+    'lxml': LxmlBackend,
+    'bs4': SoupBackend,
+}
+
+# Orden de preferencia en modo 'auto' (del más rápido al más lento)
+AUTO_ORDER = ['selectolax', 'lxml', 'bs4']
+
+_backends = {}
+
+
+def get_backend(name=None):
+    """Devuelve (y cachea) la instancia del backend pedido.
+
+    Si el backend no está instalado, cae al siguiente disponible en orden
+    de preferencia.
+    """
+    name = (name or os.environ.get('HTML_PARSER_BACKEND', 'auto')).lower()
+    if name in _backends:
+        return _backends[name]
+
+    candidates = AUTO_ORDER if name == 'auto' else [name] + [n for n in AUTO_ORDER if n != name]
+    for candidate in candidates:
+        if candidate not in BACKENDS:
+            logger.warning(f"⚠️ Backend HTML desconocido: {candidate}")
+            continue
+        try:
+            backend = BACKENDS[candidate]()
+        except ImportError as e:
+            logger.warning(f"⚠️ Backend HTML '{candidate}' no disponible: {e}")
+            continue
+        _backends[name] = backend
+        logger.debug(f"Backend HTML seleccionado: {backend.name}")
+        return backend
+
+    raise ImportError("No hay ningún backend HTML disponible")
+
+
+def parse_html(html, backend=None):
+    """Parsea un documento HTML con el backend configurado."""
+    return get_backend(backend).parse(html)
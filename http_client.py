@@ -0,0 +1,128 @@
+"""
+Capa HTTP compartida para el foro de MIR4 y la API de Discord.
+
+Mantiene una requests.Session por host a nivel de módulo, de modo que las
+conexiones keep-alive (TCP+TLS) sobreviven entre invocaciones "calientes"
+de la Lambda. Cada llamada lleva timeout y los fallos transitorios se
+reintentan con backoff exponencial con jitter.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger('BicheonHTTP')
+logger.setLevel(logging.INFO)
+
+FORUM_HOST = 'forum.mir4global.com'
+DISCORD_HOST = 'discord.com'
+
+# (connect, read) en segundos
+DEFAULT_TIMEOUT = (3.05, 10)
+HOST_TIMEOUTS = {
+    FORUM_HOST: (3.05, 10),
+    DISCORD_HOST: (3.05, 10),
+}
+
+POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '10'))
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.3
+BACKOFF_MAX = 4.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'PATCH', 'DELETE'}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(host):
+    """Devuelve la sesión (pool keep-alive) asociada a un host."""
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[host] = session
+        return session
+
+
+def _backoff(attempt, retry_after=None):
+    """Calcula la espera antes del siguiente intento (full jitter, o el
+    Retry-After del servidor completo)."""
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _retry_after(response):
+    """Lee Retry-After (segundos) de una respuesta, si existe."""
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def request(method, url, timeout=None, retries=MAX_RETRIES, **kwargs):
+    """Hace una petición HTTP con el pool del host y reintentos.
+
+    Los métodos idempotentes se reintentan ante errores de red y respuestas
+    429/5xx. Un POST solo se reintenta si la conexión no llegó a abrirse o
+    ante un 429, para no duplicar mensajes en Discord.
+
+    No llama a raise_for_status(): eso queda a cargo de quien llama.
+    """
+    method = method.upper()
+    host = urlparse(url).hostname
+    session = get_session(host)
+    if timeout is None:
+        timeout = HOST_TIMEOUTS.get(host, DEFAULT_TIMEOUT)
+    idempotent = method in IDEMPOTENT_METHODS
+
+    attempt = 0
+    while True:
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectTimeout, requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout) as e:
+            safe = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+            if attempt >= retries or not safe:
+                raise
+            delay = _backoff(attempt)
+            logger.warning(f"⚠️ {method} {host} falló ({e.__class__.__name__}), reintento en {delay:.2f}s")
+        else:
+            retryable = response.status_code in RETRY_STATUSES and (idempotent or response.status_code == 429)
+            retry_after = _retry_after(response)
+            if retry_after is not None and retry_after > BACKOFF_MAX:
+                retryable = False
+            if attempt >= retries or not retryable:
+                return response
+            delay = _backoff(attempt, retry_after)
+            logger.warning(f"⚠️ {method} {host} respondió {response.status_code}, reintento en {delay:.2f}s")
+            response.close()
+
+        time.sleep(delay)
+        attempt += 1
+
+
+def get(url, **kwargs):
+    """GET con el pool compartido."""
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    """POST con el pool compartido."""
+    return request('POST', url, **kwargs)
+
+
+def patch(url, **kwargs):
+    """PATCH con el pool compartido."""
+    return request('PATCH', url, **kwargs)
@@ -0,0 +1,335 @@
+"""
+Handler de interacciones de Discord (webhook de /interactions).
+
+Discord exige respuesta en menos de 3 segundos, así que este módulo solo
+importa lo mínimo para verificar la firma y responder: boto3 (DynamoDB y el
+cliente de Lambda) se carga en el primer comando que lo necesita, y el stack
+de scraping y traducción (core_logic, bs4, newspaper3k, googletrans) vive en
+lambda_function, que corre en el worker asíncrono.
+"""
+
+import json
+import os
+import logging
+from nacl.signing import VerifyKey
+from nacl.exceptions import BadSignatureError
+
+# Configuración de Logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+LANG_MAP = {
+    'es': ('es', '🇪🇸 Español'),
+    'pt': ('pt', '🇵🇹 Português'),
+    'zh': ('zh-cn', '🇨🇳 中文')
+}
+
+# Límite de caracteres de un mensaje de Discord
+DISCORD_MESSAGE_LIMIT = 2000
+
+_lambda_client = None
+
+def get_db():
+    """DatabaseAdapter compartido (boto3 se importa recién aquí)."""
+    from database import get_database
+    return get_database()
+
+def invoke_worker(payload, context):
+    """Invoca al worker asíncrono (InvocationType='Event').
+
+    Usa WORKER_FUNCTION_NAME si está configurada; si no, se invoca a sí misma
+    y lambda_handler_interactions delega el evento en lambda_function.
+    """
+    global _lambda_client
+    if _lambda_client is None:
+        import boto3
+        _lambda_client = boto3.client('lambda')
+
+    function_name = os.environ.get('WORKER_FUNCTION_NAME') or context.function_name
+    _lambda_client.invoke(
+        FunctionName=function_name,
+        InvocationType='Event',
+        Payload=json.dumps(payload)
+    )
+
+# -------- UTILIDADES --------
+def format_translation(lang, translated, metadata=None):
+    """Arma el mensaje de una traducción, recortado al límite de Discord.
+
+    Si el mensaje original tenía link (metadata['link'], o metadata['links']
+    en un resumen de varios posts), se reserva lugar para conservarlo al final.
+    """
+    header = f"**Traducción {LANG_MAP[lang][1]}:**\n"
+    link_suffix = ""
+    if metadata and 'link' in metadata:
+        link_suffix = f"\n\n🔗 {metadata['link']}"
+    elif metadata and metadata.get('links'):
+        link_suffix = "\n\n" + "\n".join(f"🔗 {link}" for link in metadata['links'])
+
+    max_len = DISCORD_MESSAGE_LIMIT - len(header) - len(link_suffix)
+    if len(translated) > max_len:
+        translated = translated[:max_len-3] + "..."
+    return header + translated + link_suffix
+
+def verify_signature(event):
+    """Verifica la firma criptográfica de Discord."""
+    public_key = os.environ.get('DISCORD_PUBLIC_KEY')
+    if not public_key:
+        logger.error("DISCORD_PUBLIC_KEY no configurada")
+        return False
+
+    verify_key = VerifyKey(bytes.fromhex(public_key))
+
+    # Normalizar headers a minúsculas (API Gateway V2 puede enviar headers en formato mixto)
+    headers = {k.lower(): v for k, v in event.get('headers', {}).items()}
+
+    signature = headers.get('x-signature-ed25519')
+    timestamp = headers.get('x-signature-timestamp')
+    body = event.get('body')
+
+    if not signature or not timestamp or not body:
+        logger.error(f"Missing required headers or body. Signature: {bool(signature)}, Timestamp: {bool(timestamp)}, Body: {bool(body)}")
+        return False
+
+    try:
+        verify_key.verify(f'{timestamp}{body}'.encode(), bytes.fromhex(signature))
+        logger.info("✅ Firma verificada correctamente")
+        return True
+    except BadSignatureError as e:
+        logger.error(f"❌ Firma inválida: {e}")
+        return False
+    except Exception as e:
+        logger.error(f"❌ Error verificando firma: {e}")
+        return False
+
+# -------- HANDLER: INTERACTIONS (WEBHOOKS) --------
+def lambda_handler_interactions(event, context):
+    """Maneja comandos Slash de Discord."""
+    logger.info(f"Evento recibido: {json.dumps(event)}")
+
+    # 0. Verificar si es invocación asíncrona (Worker sin función propia)
+    if event.get('type') == 'async_worker':
+        logger.info("👷 Worker asíncrono iniciado")
+        from lambda_function import handle_async_worker
+        return handle_async_worker(event)
+
+    # 1. Verificar firma
+    if not verify_signature(event):
+        logger.error("❌ Verificación de firma falló")
+        return {
+            'statusCode': 401,
+            'body': json.dumps({'error': 'invalid request signature'})
+        }
+
+    # 2. Parsear body
+    body = json.loads(event['body'])
+    t = body.get('type')
+    logger.info(f"Tipo de interacción: {t}")
+
+    # 3. Manejar PING (Type 1)
+    if t == 1:
+        logger.info("📍 PING recibido, respondiendo...")
+        response = {'type': 1}
+        logger.info(f"Respuesta PING: {response}")
+        return response
+
+    # 3. Manejar MESSAGE_COMPONENT (Type 3 - Botones)
+    if t == 3:
+        logger.info("🔘 Botón presionado, procesando...")
+        return handle_button_click(body, context)
+
+    # 4. Manejar COMANDOS (Type 2)
+    if t == 2:
+        logger.info("⚡ Comando recibido, procesando...")
+        response = handle_command(body, context)
+        logger.info(f"Respuesta comando: {json.dumps(response)}")
+        return response
+
+    logger.warning(f"⚠️ Tipo de interacción desconocido: {t}")
+    return {
+        'statusCode': 400,
+        'body': json.dumps({'error': 'unknown interaction type'})
+    }
+
+def handle_button_click(interaction, context):
+    """Maneja clics en botones de traducción."""
+    data = interaction.get('data', {})
+    custom_id = data.get('custom_id', '')
+
+    if not custom_id.startswith('translate_'):
+        return {
+            'type': 4,
+            'data': {'content': "❌ Botón no reconocido", 'flags': 64}
+        }
+
+    # Extraer idioma e ID del mensaje
+    parts = custom_id.split('_')
+    if len(parts) < 3:
+        return {
+            'type': 4,
+            'data': {'content': "❌ ID inválido", 'flags': 64}
+        }
+
+    lang = parts[1]  # es, pt, zh
+    message_id = '_'.join(parts[2:])
+
+    if lang not in LANG_MAP:
+        return {
+            'type': 4,
+            'data': {'content': "❌ Idioma no soportado", 'flags': 64}
+        }
+
+    try:
+        # Obtener contenido cacheado
+        db = get_db()
+        cached = db.get_cached_translation(message_id)
+        if not cached:
+            return {
+                'type': 4,
+                'data': {'content': "❌ Traducción expirada. Ejecuta el comando nuevamente.", 'flags': 64}
+            }
+
+        original_content = cached.get('original')
+        translations = cached.get('translations', {})
+        metadata = cached.get('metadata', {})
+
+        # Si ya tenemos la traducción (de este mensaje o del mismo texto en
+        # otro mensaje/guild), responder rápido
+        translated = translations.get(lang)
+        if translated is None and original_content:
+            translated = db.get_translation(original_content, lang)
+        if translated is not None:
+            return {
+                'type': 7,  # UPDATE_MESSAGE
+                'data': {
+                    'content': format_translation(lang, translated, metadata),
+                    'components': []  # Remover botones
+                }
+            }
+
+        # Si NO tenemos la traducción, usar Worker Asíncrono
+        # 1. Invocar lambda async
+        payload = {
+            'type': 'async_worker',
+            'action': 'translate',
+            'lang': lang,
+            'message_id': message_id,
+            'application_id': interaction.get('application_id'),
+            'token': interaction.get('token'),
+            'interaction_id': interaction.get('id'),
+            'original_content': original_content
+        }
+
+        invoke_worker(payload, context)
+
+        # 2. Responder con DEFERRED_UPDATE_MESSAGE (type 6)
+        return {
+            'type': 6  # DEFERRED_UPDATE_MESSAGE
+        }
+
+    except Exception as e:
+        logger.error(f"Error traduciendo: {e}", exc_info=True)
+        return {
+            'type': 4,
+            'data': {'content': "❌ Error al procesar botón", 'flags': 64}
+        }
+
+def handle_command(interaction, context):
+    """Procesa comandos slash."""
+    data = interaction.get('data', {})
+    command_name = data.get('name')
+    guild_id = interaction.get('guild_id')
+
+    if command_name == 'usar':
+        # Configurar canal
+        options = data.get('options', [])
+        channel_id = options[0]['value']
+
+        get_db().set_channel(guild_id, channel_id)
+
+        return {
+            'type': 4,
+            'data': {
+                'content': f"✅ Canal configurado: <#{channel_id}>. Las noticias saldrán ahí.",
+                'flags': 64
+            }
+        }
+
+    elif command_name in ['verificar-parche', 'verificar-evento', 'verificar-noticia']:
+        # Mapeo de comandos a tags
+        tag_map = {
+            'verificar-parche': 'patch note',
+            'verificar-evento': 'event',
+            'verificar-noticia': 'notice'
+        }
+        tag = tag_map.get(command_name)
+
+        # NO procesamos aquí para evitar timeout de 3 segundos
+        # Invocamos asíncronamente al worker para procesar
+        payload = {
+            'type': 'async_worker',
+            'command': command_name,
+            'tag': tag,
+            'application_id': interaction.get('application_id'),
+            'token': interaction.get('token'),
+            'interaction_id': interaction.get('id')
+        }
+
+        try:
+            invoke_worker(payload, context)
+            logger.info(f"🚀 Invocación asíncrona enviada para {command_name}")
+        except Exception as e:
+            logger.error(f"❌ Error invocando lambda async: {e}")
+
+        # Responder type 5 inmediatamente
+        return {
+            'type': 5,
+            'data': {'flags': 64}
+        }
+
+    elif command_name == 'estado-bot':
+        import datetime
+        db = get_db()
+        channels = db.get_channels()
+        canal = channels.get(str(guild_id))
+
+        estado = f"🐉 **Bicheon4ever Serverless**\n"
+        if not canal:
+            estado += "❌ Sin canal configurado\n"
+        elif canal['disabled']:
+            estado += f"🚫 Canal <#{canal['channel_id']}> deshabilitado: el bot no puede publicar ahí " \
+                      f"(sin acceso o borrado). Usa `/usar` para configurarlo de nuevo.\n"
+        else:
+            estado += f"💬 Canal configurado: <#{canal['channel_id']}>\n"
+            if canal['failure_count']:
+                estado += f"⚠️ Últimos envíos fallidos: {canal['failure_count']}\n"
+
+        disabled = sum(1 for info in channels.values() if info['disabled'])
+        estado += f"📡 Canales activos: {len(channels) - disabled}"
+        estado += f" ({disabled} deshabilitados)\n" if disabled else "\n"
+
+        estado += "\n**Últimas actualizaciones automáticas:**\n"
+        tags = {'patch note': 'Parche', 'event': 'Evento', 'notice': 'Noticia'}
+
+        for tag_key, tag_label in tags.items():
+            info = db.get_last_post_info(tag_key)
+            if info and info.get('updated_at'):
+                # Formatear fecha (ISO a legible)
+                try:
+                    dt = datetime.datetime.fromisoformat(info['updated_at'])
+                    fecha_str = dt.strftime("%Y-%m-%d %H:%M:%S UTC")
+                    estado += f"• **{tag_label}:** {fecha_str}\n"
+                except:
+                    estado += f"• **{tag_label}:** {info['updated_at']}\n"
+            else:
+                estado += f"• **{tag_label}:** Sin registros recientes\n"
+
+        return {
+            'type': 4,
+            'data': {'content': estado, 'flags': 64}
+        }
+
+    return {
+        'type': 4,
+        'data': {'content': "Comando no reconocido"}
+    }
@@ -1,52 +1,38 @@
+"""
+Handlers del scraper programado y del worker asíncrono.
+
+Este módulo carga el stack de scraping y traducción (core_logic); el webhook
+de Discord vive en interactions.py para arrancar en frío sin él. Los nombres
+del handler de interacciones se reexportan por compatibilidad.
+"""
+
 import json
 import os
 import logging
-import requests
+import http_client
+import delivery_queue
+import fanout
 from datetime import datetime
-from nacl.signing import VerifyKey
-from nacl.exceptions import BadSignatureError
-from core_logic import get_latest_post_by_tag, extract_and_summarize_article, traducir
-from database import DatabaseAdapter
+from core_logic import (
+    get_latest_post_by_tag, get_new_posts_by_tag, extract_and_summarize_article,
+    fetch_article_summary, translate_text, NOT_MODIFIED, EXTRACTION_FAILED, EXTRACTION_ERROR
+)
+from database import get_database
+from translation import SEGMENT_SEPARATOR, TranslationRequest, translate_segments, translate_with_memory
+from single_flight import run_once
+from interactions import (
+    LANG_MAP, DISCORD_MESSAGE_LIMIT, format_translation, verify_signature, lambda_handler_interactions,
+    handle_button_click, handle_command
+)
 
 # Configuración de Logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # Inicializar DB
-db = DatabaseAdapter()
+db = get_database()
 
 # -------- UTILIDADES --------
-def verify_signature(event):
-    """Verifica la firma criptográfica de Discord."""
-    public_key = os.environ.get('DISCORD_PUBLIC_KEY')
-    if not public_key:
-        logger.error("DISCORD_PUBLIC_KEY no configurada")
-        return False
-
-    verify_key = VerifyKey(bytes.fromhex(public_key))
-    
-    # Normalizar headers a minúsculas (API Gateway V2 puede enviar headers en formato mixto)
-    headers = {k.lower(): v for k, v in event.get('headers', {}).items()}
-    
-    signature = headers.get('x-signature-ed25519')
-    timestamp = headers.get('x-signature-timestamp')
-    body = event.get('body')
-
-    if not signature or not timestamp or not body:
-        logger.error(f"Missing required headers or body. Signature: {bool(signature)}, Timestamp: {bool(timestamp)}, Body: {bool(body)}")
-        return False
-
-    try:
-        verify_key.verify(f'{timestamp}{body}'.encode(), bytes.fromhex(signature))
-        logger.info("✅ Firma verificada correctamente")
-        return True
-    except BadSignatureError as e:
-        logger.error(f"❌ Firma inválida: {e}")
-        return False
-    except Exception as e:
-        logger.error(f"❌ Error verificando firma: {e}")
-        return False
-
 def send_discord_message(channel_id, content):
     """Envía mensaje a Discord vía REST API."""
     token = os.environ.get('DISCORD_TOKEN')
@@ -62,358 +48,472 @@ def send_discord_message(channel_id, content):
     payload = {"content": content}
     
     try:
-        response = requests.post(url, headers=headers, json=payload)
+        response = http_client.post(url, headers=headers, json=payload)
         response.raise_for_status()
         logger.info(f"Mensaje enviado a canal {channel_id}")
     except Exception as e:
         logger.error(f"Error enviando mensaje a {channel_id}: {e}")
 
-# -------- HANDLER 1: INTERACTIONS (WEBHOOKS) --------
-def lambda_handler_interactions(event, context):
-    """Maneja comandos Slash de Discord."""
-    logger.info(f"Evento recibido: {json.dumps(event)}")
-    
-    # 0. Verificar si es invocación asíncrona (Worker)
-    if event.get('type') == 'async_worker':
-        logger.info("👷 Worker asíncrono iniciado")
-        return handle_async_worker(event)
-
-    # 1. Verificar firma
-    if not verify_signature(event):
-        logger.error("❌ Verificación de firma falló")
-        return {
-            'statusCode': 401,
-            'body': json.dumps({'error': 'invalid request signature'})
-        }
+# -------- HANDLER 1: SCRAPER (SCHEDULED) --------
+SCRAPER_TAGS = ['patch note', 'notice', 'event']
 
-    # 2. Parsear body
-    body = json.loads(event['body'])
-    t = body.get('type')
-    logger.info(f"Tipo de interacción: {t}")
-
-    # 3. Manejar PING (Type 1)
-    if t == 1:
-        logger.info("📍 PING recibido, respondiendo...")
-        response = {'type': 1}
-        logger.info(f"Respuesta PING: {response}")
-        return response
-
-    # 3. Manejar MESSAGE_COMPONENT (Type 3 - Botones)
-    if t == 3:
-        logger.info("🔘 Botón presionado, procesando...")
-        return handle_button_click(body, context)
-
-    # 4. Manejar COMANDOS (Type 2)
-    if t == 2:
-        logger.info("⚡ Comando recibido, procesando...")
-        response = handle_command(body, context)
-        logger.info(f"Respuesta comando: {json.dumps(response)}")
-        return response
-
-    logger.warning(f"⚠️ Tipo de interacción desconocido: {t}")
-    return {
-        'statusCode': 400,
-        'body': json.dumps({'error': 'unknown interaction type'})
-    }
+# Links recordados por tag en BicheonState (más que un listado del foro)
+SEEN_LINKS_MAX = 50
 
-def handle_button_click(interaction, context):
-    """Maneja clics en botones de traducción."""
-    data = interaction.get('data', {})
-    custom_id = data.get('custom_id', '')
-    
-    if not custom_id.startswith('translate_'):
-        return {
-            'type': 4,
-            'data': {'content': "❌ Botón no reconocido", 'flags': 64}
-        }
-    
-    # Extraer idioma e ID del mensaje
-    parts = custom_id.split('_')
-    if len(parts) < 3:
-        return {
-            'type': 4,
-            'data': {'content': "❌ ID inválido", 'flags': 64}
-        }
-    
-    lang = parts[1]  # es, pt, zh
-    message_id = '_'.join(parts[2:])
-    
-    # Mapeo de idiomas
-    lang_map = {
-        'es': ('es', '🇪🇸 Español'),
-        'pt': ('pt', '🇵🇹 Português'),
-        'zh': ('zh-cn', '🇨🇳 中文')
-    }
-    
-    if lang not in lang_map:
-        return {
-            'type': 4,
-            'data': {'content': "❌ Idioma no soportado", 'flags': 64}
-        }
-    
-    try:
-        from core_logic import traducir
-        from googletrans import Translator
-        import boto3
-        
-        # Obtener contenido cacheado
-        cached = db.get_cached_translation(message_id)
-        if not cached:
-            return {
-                'type': 4,
-                'data': {'content': "❌ Traducción expirada. Ejecuta el comando nuevamente.", 'flags': 64}
-            }
-        
-        original_content = cached.get('original')
-        translations = cached.get('translations', {})
-        metadata = cached.get('metadata', {})
-        
-        # Si ya tenemos la traducción, responder rápido
-        if lang in translations:
-            translated = translations[lang]
-            
-            # Reconstruir mensaje con link si existe
-            content = f"**Traducción {lang_map[lang][1]}:**\n{translated}"
-            if metadata and 'link' in metadata:
-                content += f"\n\n🔗 {metadata['link']}"
-                
-            return {
-                'type': 7,  # UPDATE_MESSAGE
-                'data': {
-                    'content': content,
-                    'components': []  # Remover botones
-                }
-            }
-        
-        # Si NO tenemos la traducción, usar Worker Asíncrono
-        # 1. Invocar lambda async
-        lambda_client = boto3.client('lambda')
-        function_name = context.function_name
-        
-        payload = {
-            'type': 'async_worker',
-            'action': 'translate',
-            'lang': lang,
-            'message_id': message_id,
-            'application_id': interaction.get('application_id'),
-            'token': interaction.get('token'),
-            'original_content': original_content
-        }
-        
-        lambda_client.invoke(
-            FunctionName=function_name,
-            InvocationType='Event',
-            Payload=json.dumps(payload)
+# Pre-traducir cada resumen nuevo a los idiomas de los botones antes de
+# publicarlo, para que el primer clic responda desde la cache (type 7)
+PRETRANSLATE_SUMMARIES = os.environ.get('PRETRANSLATE_SUMMARIES', '').lower() in ('1', 'true', 'yes')
+
+# Modo resumen: todos los posts nuevos de una ejecución van en un solo
+# mensaje por canal (o en los mínimos que entren en el límite de Discord)
+DIGEST_MODE = os.environ.get('DIGEST_MODE', '').lower() in ('1', 'true', 'yes')
+DIGEST_HEADER = "🐉 **Novedades de MIR4**"
+
+def remember_links(seen, links):
+    """Agrega links al set de vistos (el más nuevo al final), acotado a SEEN_LINKS_MAX."""
+    merged = [link for link in seen if link not in links] + list(links)
+    return merged[-SEEN_LINKS_MAX:]
+
+def store_article_summary(link, cached, fetched):
+    """Aplica el resultado de fetch_article_summary a la cache de artículos.
+
+    Devuelve (texto, bullets). Los errores de extracción no se cachean; si
+    falla la revalidación de una entrada vencida, se usa la entrada vencida
+    (sin renovarla, para revalidar en la próxima).
+    """
+    if fetched == NOT_MODIFIED:
+        db.touch_article_cache(link, cached)
+        return cached['text'], cached['bullets']
+
+    if fetched['text'] in (EXTRACTION_FAILED, EXTRACTION_ERROR) and cached:
+        logger.warning(f"⚠️ No se pudo revalidar {link}, se usa el resumen cacheado")
+        return cached['text'], cached['bullets']
+
+    if fetched['text'] not in (EXTRACTION_FAILED, EXTRACTION_ERROR):
+        db.set_article_cache(
+            link, fetched['text'], fetched['bullets'],
+            content_hash=fetched.get('content_hash'),
+            etag=fetched.get('etag'),
+            last_modified=fetched.get('last_modified')
         )
-        
-        # 2. Responder con DEFERRED_UPDATE_MESSAGE (type 6)
-        return {
-            'type': 6  # DEFERRED_UPDATE_MESSAGE
-        }
-        
+    return fetched['text'], fetched['bullets']
+
+def get_article_summary(link):
+    """Texto y bullets de un artículo: desde la cache si está fresca, si no
+    revalidando/descargando y guardando el resultado."""
+    cached = db.get_article_cache(link)
+    if db.is_article_fresh(cached):
+        logger.info(f"📦 Resumen desde cache: {link}")
+        return cached['text'], cached['bullets']
+    return store_article_summary(link, cached, fetch_article_summary(link, cached))
+
+def collect_translations(future):
+    """Pre-traducciones de un post ({(segmento, idioma): traducción}). Un
+    idioma que falla queda sin traducir, y se traduce al hacer clic."""
+    if future is None:
+        return {}
+    try:
+        return future.result()
     except Exception as e:
-        logger.error(f"Error traduciendo: {e}", exc_info=True)
-        return {
-            'type': 4,
-            'data': {'content': "❌ Error al procesar botón", 'flags': 64}
-        }
+        logger.warning(f"⚠️ Pre-traducción falló: {e}")
+        return {}
 
-def handle_command(interaction, context):
-    """Procesa comandos slash."""
-    data = interaction.get('data', {})
-    command_name = data.get('name')
-    guild_id = interaction.get('guild_id')
-    
-    if command_name == 'usar':
-        # Configurar canal
-        options = data.get('options', [])
-        channel_id = options[0]['value']
-        
-        db.set_channel(guild_id, channel_id)
-        
-        return {
-            'type': 4,
-            'data': {
-                'content': f"✅ Canal configurado: <#{channel_id}>. Las noticias saldrán ahí.",
-                'flags': 64
-            }
-        }
+def translation_buttons(message_id):
+    """Fila de botones de traducción de un mensaje cacheado como `message_id`."""
+    return [{
+        "type": 1,
+        "components": [
+            {"type": 2, "style": 1, "label": "🇪🇸 Español", "custom_id": f"translate_es_{message_id}"},
+            {"type": 2, "style": 1, "label": "🇵🇹 Português", "custom_id": f"translate_pt_{message_id}"},
+            {"type": 2, "style": 1, "label": "🇨🇳 中文", "custom_id": f"translate_zh_{message_id}"}
+        ]
+    }]
 
-    elif command_name in ['verificar-parche', 'verificar-evento', 'verificar-noticia']:
-        # Mapeo de comandos a tags
-        tag_map = {
-            'verificar-parche': 'patch note',
-            'verificar-evento': 'event',
-            'verificar-noticia': 'notice'
-        }
-        tag = tag_map.get(command_name)
-        
-        # NO procesamos aquí para evitar timeout de 3 segundos
-        # Invocamos asíncronamente a la misma Lambda para procesar
-        import boto3
-        
-        lambda_client = boto3.client('lambda')
-        function_name = context.function_name
-        
-        payload = {
-            'type': 'async_worker',
-            'command': command_name,
-            'tag': tag,
-            'application_id': interaction.get('application_id'),
-            'token': interaction.get('token'),
-            'interaction_id': interaction.get('id')
-        }
-        
-        try:
-            lambda_client.invoke(
-                FunctionName=function_name,
-                InvocationType='Event',  # Asíncrono
-                Payload=json.dumps(payload)
-            )
-            logger.info(f"🚀 Invocación asíncrona enviada para {command_name}")
-        except Exception as e:
-            logger.error(f"❌ Error invocando lambda async: {e}")
-        
-        # Responder type 5 inmediatamente
-        return {
-            'type': 5,
-            'data': {'flags': 64}
-        }
+def enqueue_delivery(message_id, content, components, config, failing=(), meta=None):
+    """Encola el envío de un mensaje a todos los canales (lo hace el worker de envío)."""
+    jobs = delivery_queue.make_jobs(
+        config.values(), {"content": content, "components": components},
+        meta=dict(meta or {}, message_id=message_id),
+        guilds={channel_id: guild_id for guild_id, channel_id in config.items()},
+        failing=failing
+    )
+    delivery_queue.get_queue().send(jobs)
+    return jobs
 
-    elif command_name == 'estado-bot':
-        import datetime
-        config = db.get_config()
-        canal_id = config.get(str(guild_id))
-        
-        estado = f"🐉 **Bicheon4ever Serverless**\n"
-        estado += f"💬 Canal configurado: <#{canal_id}>\n" if canal_id else "❌ Sin canal configurado\n"
-        
-        estado += "\n**Últimas actualizaciones automáticas:**\n"
-        tags = {'patch note': 'Parche', 'event': 'Evento', 'notice': 'Noticia'}
-        
-        for tag_key, tag_label in tags.items():
-            info = db.get_last_post_info(tag_key)
-            if info and info.get('updated_at'):
-                # Formatear fecha (ISO a legible)
-                try:
-                    dt = datetime.datetime.fromisoformat(info['updated_at'])
-                    fecha_str = dt.strftime("%Y-%m-%d %H:%M:%S UTC")
-                    estado += f"• **{tag_label}:** {fecha_str}\n"
-                except:
-                    estado += f"• **{tag_label}:** {info['updated_at']}\n"
-            else:
-                estado += f"• **{tag_label}:** Sin registros recientes\n"
-        
-        return {
-            'type': 4,
-            'data': {'content': estado, 'flags': 64}
+def publish_post(tag, post, config, failing=()):
+    """Encola el envío de un post nuevo a todos los canales y actualiza el estado del tag.
+
+    `failing` son los canales con fallos permanentes previos: si reciben el
+    mensaje, su contador vuelve a cero.
+    """
+    import hashlib
+
+    titulo = post['titulo']
+    link = post['link']
+    resumen_bullets = post['resumen_bullets']
+
+    # Crear ID único para este mensaje basado en link
+    message_id = hashlib.md5(link.encode()).hexdigest()
+
+    # Formatear contenido
+    content = f"🐉 **Nuevo {tag.title()} Detectado**\n**{titulo}**\n\n**Resumen:**\n{resumen_bullets}\n\n🔗 {link}"
+
+    # Cachear para traducciones (con las pre-traducciones, si las hay)
+    db.cache_translation(message_id, resumen_bullets, post.get('translations', {}),
+                         metadata={'title': titulo, 'link': link})
+
+    # 4. Encolar el envío a todos los canales
+    jobs = enqueue_delivery(message_id, content, translation_buttons(message_id), config, failing,
+                            meta={'tag': tag, 'link': link})
+    logger.info(f"📣 {titulo}: {len(jobs)} trabajos de envío encolados para {len(config)} canales")
+
+    # 5. Actualizar estado
+    db.set_last_post(tag, link)
+    return jobs
+
+def digest_section(tag, post, max_len=None):
+    """Bloque de un post dentro de un resumen, de hasta `max_len` caracteres.
+
+    Se recortan primero los bullets y, si el título y el link solos ya no
+    entran, el bloque entero.
+    """
+    bullets = post['resumen_bullets']
+    head = f"**{tag.title()}: {post['titulo']}**\n"
+    tail = f"\n🔗 {post['link']}"
+    if max_len is not None and len(head) + len(bullets) + len(tail) > max_len:
+        room = max_len - len(head) - len(tail) - 3
+        if room <= 0:
+            return (head + tail)[:max_len - 3] + "..."
+        bullets = bullets[:room] + "..."
+    return head + bullets + tail
+
+def render_digest(entries, limit=DISCORD_MESSAGE_LIMIT):
+    """Reparte los posts [(tag, post)] en mensajes de resumen de hasta `limit` caracteres.
+
+    Devuelve [(contenido, entradas)] en el orden original. Un post que no
+    entra solo en un mensaje se recorta.
+    """
+    separator = "\n\n"
+    budget = limit - len(DIGEST_HEADER) - len(separator)
+    messages = []
+    sections, group, size = [], [], 0
+    for tag, post in entries:
+        section = digest_section(tag, post, budget)
+        extra = len(section) + (len(separator) if sections else 0)
+        if sections and size + extra > budget:
+            messages.append((sections, group))
+            sections, group, size = [], [], 0
+            extra = len(section)
+        sections.append(section)
+        group.append((tag, post))
+        size += extra
+    if sections:
+        messages.append((sections, group))
+    return [(DIGEST_HEADER + separator + separator.join(parts), group) for parts, group in messages]
+
+def publish_digest(entries, config, failing=()):
+    """Encola los posts nuevos de la ejecución como mensajes de resumen.
+
+    Cada mensaje lleva una fila de botones que traduce el resumen entero:
+    el original cacheado son los bullets de sus posts unidos por segmento,
+    así las pre-traducciones y la memoria por segmentos de cada post sirven
+    también para el resumen.
+    """
+    import hashlib
+
+    jobs = []
+    for content, group in render_digest(entries):
+        links = [post['link'] for _, post in group]
+        message_id = hashlib.md5("\n".join(links).encode()).hexdigest()
+        original = SEGMENT_SEPARATOR.join(post['resumen_bullets'] for _, post in group)
+        translations = {
+            lang: SEGMENT_SEPARATOR.join(post['translations'][lang] for _, post in group)
+            for lang in LANG_MAP
+            if all(lang in post.get('translations', {}) for _, post in group)
         }
+        db.cache_translation(message_id, original, translations,
+                             metadata={'title': DIGEST_HEADER, 'links': links})
+        jobs.extend(enqueue_delivery(message_id, content, translation_buttons(message_id), config, failing,
+                                     meta={'tag': 'digest', 'link': links[0]}))
 
-    return {
-        'type': 4,
-        'data': {'content': "Comando no reconocido"}
-    }
+    logger.info(f"📣 Resumen de {len(entries)} posts: {len(jobs)} trabajos de envío encolados para {len(config)} canales")
+    for tag, post in entries:
+        db.set_last_post(tag, post['link'])
+    return jobs
 
+def save_board_state(tag, state, seen_links, validators):
+    """Guarda los links vistos y los validadores del tablero que cambiaron."""
+    changes = {}
+    if seen_links != state.get('seen'):
+        changes['seen'] = seen_links
+    for name, value in validators.items():
+        if value != state.get(name):
+            changes[name] = value
+    if changes:
+        db.update_board_state(tag, **changes)
 
-# -------- HANDLER 2: SCRAPER (SCHEDULED) --------
 def lambda_handler_scraper(event, context):
-    """Ejecuta el scraping periódico."""
+    """Ejecuta el scraping periódico.
+
+    El trabajo de red se hace en paralelo (SCRAPER_MAX_WORKERS, por defecto
+    uno por tag) en fases: primero los listados de todos los tags, luego los
+    artículos nuevos que no estén en la cache y, con PRETRANSLATE_SUMMARIES,
+    la traducción de cada resumen a todos los idiomas. Las lecturas/escrituras
+    en DynamoDB y el envío se hacen en el hilo principal (boto3.resource no
+    es thread-safe).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
     logger.info("Iniciando Scraper Job")
-    
-    tags = ['patch note', 'notice', 'event']
-    config = db.get_config()
-    
+
+    channels = db.get_channels()
+    config = db.enabled_channels(channels)
+    failing = {info['channel_id'] for info in channels.values() if info['failure_count'] and not info['disabled']}
+
     if not config:
         logger.warning("No hay canales configurados. Saltando scraping.")
         return {'statusCode': 200, 'body': 'No channels configured'}
-    
-    for tag in tags:
-        try:
-            from core_logic import format_as_bullets
-            import hashlib
-            
-            # 1. Buscar último post
-            post = get_latest_post_by_tag(tag)
-            if not post:
-                continue
-                
-            titulo, link = post
-            
-            # 2. Verificar si ya lo vimos
+
+    # Leer estado antes de lanzar los hilos
+    board_states = {tag: db.get_board_state(tag) for tag in SCRAPER_TAGS}
+    seen = {}
+    validators = {}
+    for tag, state in board_states.items():
+        seen[tag] = list(state.get('seen') or [])
+        if not seen[tag]:
+            # Migración: sembrar con el último link guardado por versiones anteriores
             last_link = db.get_last_post(tag)
-            if last_link == link:
-                logger.info(f"Sin novedades para {tag}")
+            seen[tag] = [last_link] if last_link else []
+        validators[tag] = {
+            'etag': state.get('etag'),
+            'last_modified': state.get('last_modified'),
+            'fingerprint': state.get('fingerprint')
+        }
+
+    max_workers = max(1, int(os.environ.get('SCRAPER_MAX_WORKERS', len(SCRAPER_TAGS))))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # 1. Diff de los listados contra los links ya vistos (peticiones condicionales)
+        board_futures = {
+            tag: executor.submit(get_new_posts_by_tag, tag, list(seen[tag]), validators[tag])
+            for tag in SCRAPER_TAGS
+        }
+        boards = {}
+        for tag, future in board_futures.items():
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Error procesando tag {tag}: {e}", exc_info=True)
                 continue
-                
-            # 3. Es nuevo! Procesar
-            logger.info(f"Nuevo post encontrado: {titulo}")
-            resumen_texto = extract_and_summarize_article(link)
-            resumen_bullets = format_as_bullets(resumen_texto)
-            
-            # Crear ID único para este mensaje basado en link
-            message_id = hashlib.md5(link.encode()).hexdigest()
-            
-            # Formatear contenido
-            content = f"🐉 **Nuevo {tag.title()} Detectado**\n**{titulo}**\n\n**Resumen:**\n{resumen_bullets}\n\n🔗 {link}"
-            
-            # Crear botones de traducción (mismo formato que comandos)
-            components = [{
-                "type": 1,
-                "components": [
-                    {"type": 2, "style": 1, "label": "🇪🇸 Español", "custom_id": f"translate_es_{message_id}"},
-                    {"type": 2, "style": 1, "label": "🇵🇹 Português", "custom_id": f"translate_pt_{message_id}"},
-                    {"type": 2, "style": 1, "label": "🇨🇳 中文", "custom_id": f"translate_zh_{message_id}"}
-                ]
-            }]
-            
-            # Cachear para traducciones
-            db.cache_translation(message_id, resumen_bullets, {})
-            
-            # 4. Enviar a todos los canales
-            for guild_id, channel_id in config.items():
-                send_discord_message_with_components(channel_id, content, components)
-                
-            # 5. Actualizar estado
-            db.set_last_post(tag, link)
-            
+            if result == NOT_MODIFIED:
+                logger.info(f"Sin cambios en el tablero de {tag}")
+                boards[tag] = ([], [])
+            elif result:
+                if not result[0]:
+                    logger.info(f"Sin novedades para {tag}")
+                boards[tag] = result
+
+        # 2. Resumir los posts nuevos: cache de artículos o descarga en paralelo
+        posts = {}
+        article_futures = {}
+        for tag, (nuevos, _) in boards.items():
+            posts[tag] = []
+            for titulo, link in nuevos:
+                logger.info(f"Nuevo post encontrado: {titulo}")
+                post = {'titulo': titulo, 'link': link}
+                cached = db.get_article_cache(link)
+                if db.is_article_fresh(cached):
+                    post['resumen_bullets'] = cached['bullets']
+                else:
+                    post['cached'] = cached
+                    article_futures[link] = executor.submit(fetch_article_summary, link, cached)
+                posts[tag].append(post)
+
+        # 3. Pre-traducir los resúmenes en paralelo (todos los idiomas a la vez)
+        if PRETRANSLATE_SUMMARIES:
+            for tag, tag_posts in posts.items():
+                for post in tag_posts:
+                    if 'resumen_bullets' not in post:
+                        future = article_futures[post['link']]
+                        if future.exception():
+                            # El error se registra al publicar, más abajo
+                            break
+                        _, post['resumen_bullets'] = store_article_summary(post['link'], post.pop('cached'), future.result())
+                    post['translations'] = db.get_translations(post['resumen_bullets'], LANG_MAP)
+                    request = TranslationRequest(post['resumen_bullets'], {
+                        lang: dest_lang for lang, (dest_lang, _) in LANG_MAP.items()
+                        if lang not in post['translations']
+                    }, db)
+                    post['translation_request'] = request
+                    # Los segmentos que faltan van agrupados en pocas peticiones
+                    post['translation_future'] = executor.submit(
+                        translate_segments, request.missing, request.langs, translate_text, skip_errors=True
+                    ) if request.missing else None
+
+        # 4. Publicar por tag en orden y actualizar estado. En modo resumen
+        # los posts se juntan y el estado se guarda tras encolar el resumen.
+        digest = []
+        ready = []
+        for tag in SCRAPER_TAGS:
+            if tag not in boards:
+                continue
+            state = board_states[tag]
+            try:
+                for post in posts[tag]:
+                    if 'resumen_bullets' not in post:
+                        fetched = article_futures[post['link']].result()
+                        _, post['resumen_bullets'] = store_article_summary(post['link'], post.pop('cached'), fetched)
+                    request = post.pop('translation_request', None)
+                    if request:
+                        translated = request.complete(collect_translations(post.pop('translation_future')))
+                        db.store_translations({
+                            (post['resumen_bullets'], lang): text for lang, text in translated.items()
+                        })
+                        post['translations'] = dict(post['translations'], **translated)
+                    if DIGEST_MODE:
+                        digest.append((tag, post))
+                        continue
+                    publish_post(tag, post, config, failing)
+                    # Persistir tras cada envío: si el siguiente falla,
+                    # los ya publicados no se reenvían
+                    seen[tag] = remember_links(seen[tag], [post['link']])
+                    db.update_board_state(tag, seen=seen[tag])
+
+                if DIGEST_MODE:
+                    ready.append(tag)
+                    continue
+                # Guardar validadores solo tras publicar: si el envío falla,
+                # la próxima ejecución vuelve a descargar el tablero.
+                seen[tag] = remember_links(seen[tag], boards[tag][1])
+                save_board_state(tag, state, seen[tag], validators[tag])
+            except Exception as e:
+                logger.error(f"Error procesando tag {tag}: {e}", exc_info=True)
+
+        if DIGEST_MODE:
+            try:
+                if digest:
+                    publish_digest(digest, config, failing)
+                for tag, post in digest:
+                    seen[tag] = remember_links(seen[tag], [post['link']])
+                for tag in {tag for tag, _ in digest} - set(ready):
+                    # Tag con error a mitad: solo los posts ya enviados
+                    db.update_board_state(tag, seen=seen[tag])
+                for tag in ready:
+                    seen[tag] = remember_links(seen[tag], boards[tag][1])
+                    save_board_state(tag, board_states[tag], seen[tag], validators[tag])
+            except Exception as e:
+                logger.error(f"Error publicando resumen: {e}", exc_info=True)
+
+    # Sin cola SQS (local/tests), el propio scraper entrega lo encolado
+    queue = delivery_queue.get_queue()
+    if queue.local:
+        try:
+            delivery_queue.drain(queue, broadcast_message, ledger=db, tracker=record_channel_outcomes)
         except Exception as e:
-            logger.error(f"Error procesando tag {tag}: {e}", exc_info=True)
-            
+            logger.error(f"❌ Error entregando la cola local: {e}", exc_info=True)
+
     return {'statusCode': 200, 'body': 'Scraper completed'}
 
-def send_discord_message_with_components(channel_id, content, components):
-    """Envía mensaje con botones a Discord."""
-    import os
-    import requests
+def broadcast_message(channel_ids, payload, on_result=None):
+    """Envía un mensaje (content + components) a varios canales.
 
+    El token se lee y el mensaje se codifica una sola vez por envío (ver
+    fanout.broadcast); `on_result` recibe cada resultado apenas termina.
+    Devuelve los resultados de cada canal en orden.
+    """
+    channel_ids = list(channel_ids)
     token = os.environ.get('DISCORD_TOKEN')
     if not token:
         logger.error("DISCORD_TOKEN no configurado")
-        return
+        return [{'channel_id': channel_id, 'ok': False, 'status': None, 'attempts': 0,
+                 'error': 'DISCORD_TOKEN no configurado', 'error_kind': 'config'} for channel_id in channel_ids]
 
-    url = f"https://discord.com/api/v10/channels/{channel_id}/messages"
-    headers = {
-        "Authorization": f"Bot {token}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "content": content,
-        "components": components
-    }
-    
-    try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        logger.info(f"Mensaje con botones enviado a canal {channel_id}")
-    except Exception as e:
-        logger.error(f"Error enviando mensaje a {channel_id}: {e}")
+    outcomes = fanout.broadcast(channel_ids, payload, token, on_result=on_result)
+    sent = sum(1 for outcome in outcomes if outcome['ok'])
+    logger.info(f"Mensaje con botones enviado a {sent}/{len(channel_ids)} canales")
+    return outcomes
+
+def send_discord_message_with_components(channel_id, content, components):
+    """Envía mensaje con botones a un canal, respetando sus rate limits.
+
+    Devuelve el resultado del canal (ver fanout.post_channel_message).
+    """
+    return broadcast_message([channel_id], {"content": content, "components": components})[0]
+
+def record_channel_outcomes(job, outcomes):
+    """Lleva el estado de entrega de cada canal en BicheonConfig.
+
+    Los 403/404 suman un fallo (y deshabilitan el canal al llegar al
+    umbral); un envío exitoso a un canal que venía fallando lo reinicia.
+    Los demás fallos no cuentan.
+    """
+    guilds = job.get('guilds', {})
+    failing = {str(channel_id) for channel_id in job.get('failing', [])}
+    for outcome in outcomes:
+        channel_id = outcome['channel_id']
+        guild_id = guilds.get(str(channel_id))
+        if not guild_id:
+            continue
+        if delivery_queue.is_permanent(outcome):
+            db.record_channel_failure(guild_id, channel_id, outcome['status'])
+        elif outcome['ok'] and str(channel_id) in failing:
+            db.reset_channel_failures(guild_id, channel_id)
+
+# -------- HANDLER 2: WORKER (ASÍNCRONO) --------
+# Un mismo interaction_id reentregado es un duplicado: se recuerda durante la
+# edad máxima de un evento asíncrono de Lambda (6 horas)
+WORKER_DEDUP_SECONDS = 6 * 3600
+
+def lambda_handler_worker(event, context):
+    """Entrada de WorkerFunction: tareas invocadas por interactions.py."""
+    logger.info("👷 Worker asíncrono iniciado")
+    return handle_async_worker(event)
+
+def translate_summary(text, lang):
+    """Traducción de un resumen: cache por contenido o memoria por segmentos."""
+    translated = db.get_translation(text, lang)
+    if translated is None:
+        # Solo los segmentos nuevos van al traductor
+        dest_lang, _ = LANG_MAP[lang]
+        translated = translate_with_memory(text, {lang: dest_lang}, db, translate_text)[lang]
+        db.set_translation(text, lang, translated)
+    return translated
+
+def fetch_latest_summary(tag):
+    """Último post de un tag con su resumen: [titulo, link, bullets].
+
+    Lanza LookupError si el foro no devolvió ningún post, así run_once
+    libera el lease en vez de compartir el fallo con los demás workers.
+    """
+    post = get_latest_post_by_tag(tag)
+    if not post:
+        raise LookupError(f"Sin post para {tag}")
+    titulo, link = post
+    _, resumen_bullets = get_article_summary(link)
+    return [titulo, link, resumen_bullets]
 
 def handle_async_worker(payload):
-    """Procesa tareas pesadas en segundo plano."""
+    """Procesa tareas pesadas en segundo plano.
+
+    Cada interacción se procesa una sola vez: si Lambda reentrega el mismo
+    evento (reintentos de la invocación asíncrona), el duplicado se descarta.
+    """
+    interaction_id = payload.get('interaction_id')
+    if not interaction_id:
+        return process_async_worker(payload)
+
+    result, ran = run_once(
+        db, f"worker_{interaction_id}", lambda: process_async_worker(payload),
+        keep_seconds=WORKER_DEDUP_SECONDS, wait_seconds=0
+    )
+    if not ran:
+        logger.info(f"🔁 Interacción {interaction_id} ya procesada o en curso, se descarta")
+        return {'statusCode': 200, 'body': 'Duplicate'}
+    return result
+
+def process_async_worker(payload):
+    """Ejecuta la tarea de un worker (traducción o comando /verificar-*)."""
     try:
-        from core_logic import format_as_bullets
-        import requests
-        
         action = payload.get('action')
         
         # --- CASO 1: TRADUCCIÓN (Botones) ---
@@ -426,48 +526,21 @@ def handle_async_worker(payload):
             
             logger.info(f"👷 Worker: Traduciendo a {lang}")
             
-            lang_map = {
-                'es': ('es', '🇪🇸 Español'),
-                'pt': ('pt', '🇵🇹 Português'),
-                'zh': ('zh-cn', '🇨🇳 中文')
-            }
-            
-            from googletrans import Translator
-            translator = Translator()
-            dest_lang, lang_name = lang_map[lang]
-            
-            # Traducir
-            translated = translator.translate(original_content, dest=dest_lang).text
-            
-            # Actualizar cache
-            # Nota: Esto es una condición de carrera potencial si múltiples traducciones ocurren a la vez,
-            # pero para este caso de uso es aceptable.
-            cached = db.get_cached_translation(message_id)
-            if cached:
-                translations = cached.get('translations', {})
-                metadata = cached.get('metadata', {})
-                translations[lang] = translated
-                db.cache_translation(message_id, original_content, translations, metadata=metadata)
-            
-            # Editar mensaje original vía webhook
-            header = f"**Traducción {lang_name}:**\n"
-            max_len = 2000 - len(header)
+            # Traducir: un solo worker por mensaje e idioma, el resto reutiliza
+            translated, _ = run_once(
+                db, f"translate_{message_id}_{lang}", lambda: translate_summary(original_content, lang)
+            )
             
-            # Si hay link, reservamos espacio
-            cached = db.get_cached_translation(message_id)
+            # Actualizar cache: un solo UpdateItem atómico por idioma, que
+            # además devuelve la metadata (link) del mensaje
+            cached = db.set_cached_translation(message_id, lang, translated)
             metadata = cached.get('metadata', {}) if cached else {}
-            link_suffix = ""
-            if metadata and 'link' in metadata:
-                link_suffix = f"\n\n🔗 {metadata['link']}"
-                max_len -= len(link_suffix)
             
-            if len(translated) > max_len:
-                translated = translated[:max_len-3] + "..."
-                
-            content = header + translated + link_suffix
+            # Editar mensaje original vía webhook
+            content = format_translation(lang, translated, metadata)
             webhook_url = f"https://discord.com/api/v10/webhooks/{app_id}/{token}/messages/@original"
             
-            resp = requests.patch(webhook_url, json={"content": content, "components": []}, timeout=10)
+            resp = http_client.patch(webhook_url, json={"content": content, "components": []})
             resp.raise_for_status()
             logger.info("✅ Traducción enviada exitosamente")
             return {'statusCode': 200, 'body': 'Translation success'}
@@ -482,30 +555,27 @@ def handle_async_worker(payload):
             
             logger.info(f"👷 Procesando {command_name} para {tag}")
             
-            post = get_latest_post_by_tag(tag)
-            if not post:
+            # Un solo worker busca y resume; los comandos simultáneos reutilizan
+            # el resultado (un fallo no se guarda: el siguiente vuelve al foro)
+            try:
+                latest, _ = run_once(db, f"command_{command_name}_{tag}", lambda: fetch_latest_summary(tag))
+            except LookupError:
+                latest = None
+            if not latest:
                 content = f"❌ No se encontró ningún {tag}."
                 components = []
             else:
-                titulo, link = post
-                resumen_texto = extract_and_summarize_article(link)
-                resumen_bullets = format_as_bullets(resumen_texto)
+                titulo, link, resumen_bullets = latest
                 content = f"🐉 **{tag.title()}**\n**{titulo}**\n\n**Resumen:**\n{resumen_bullets}\n\n🔗 {link}"
                 
-                components = [{
-                    "type": 1,
-                    "components": [
-                        {"type": 2, "style": 1, "label": "🇪🇸 Español", "custom_id": f"translate_es_{interaction_id}"},
-                        {"type": 2, "style": 1, "label": "🇵🇹 Português", "custom_id": f"translate_pt_{interaction_id}"},
-                        {"type": 2, "style": 1, "label": "🇨🇳 中文", "custom_id": f"translate_zh_{interaction_id}"}
-                    ]
-                }]
+                components = translation_buttons(interaction_id)
                 
-                db.cache_translation(interaction_id, resumen_bullets, {}, metadata={'title': titulo, 'link': link})
+                translations = db.get_translations(resumen_bullets, LANG_MAP)
+                db.cache_translation(interaction_id, resumen_bullets, translations, metadata={'title': titulo, 'link': link})
             
             # Editar mensaje vía webhook
             webhook_url = f"https://discord.com/api/v10/webhooks/{app_id}/{token}/messages/@original"
-            resp = requests.patch(webhook_url, json={"content": content, "components": components}, timeout=10)
+            resp = http_client.patch(webhook_url, json={"content": content, "components": components})
             resp.raise_for_status()
             logger.info(f"✅ Mensaje actualizado exitosamente para {command_name}")
             return {'statusCode': 200, 'body': 'Worker success'}
@@ -515,7 +585,27 @@ def handle_async_worker(payload):
         # Intentar enviar error
         try:
             webhook_url = f"https://discord.com/api/v10/webhooks/{payload.get('application_id')}/{payload.get('token')}/messages/@original"
-            requests.patch(webhook_url, json={"content": "❌ Error procesando solicitud."}, timeout=10)
+            http_client.patch(webhook_url, json={"content": "❌ Error procesando solicitud."})
         except:
             pass
         return {'statusCode': 500, 'body': str(e)}
+
+# -------- HANDLER 3: ENVÍOS (COLA SQS) --------
+def lambda_handler_delivery(event, context):
+    """Entrada de DeliveryFunction: entrega los trabajos de la cola de envíos.
+
+    Los canales con fallos transitorios se reencolan dentro de deliver_job;
+    solo un trabajo que no se pudo procesar se reporta como fallido a SQS
+    (ReportBatchItemFailures), sin reintentar el resto del lote. El registro
+    de envíos evita reenviar a los canales que ya recibieron el mensaje.
+    """
+    queue = delivery_queue.get_queue()
+    failures = []
+    for record in event.get('Records', []):
+        try:
+            job = json.loads(record['body'])
+            delivery_queue.deliver_job(job, queue, broadcast_message, ledger=db, tracker=record_channel_outcomes)
+        except Exception as e:
+            logger.error(f"❌ Error procesando trabajo de envío {record.get('messageId')}: {e}", exc_info=True)
+            failures.append({'itemIdentifier': record['messageId']})
+    return {'batchItemFailures': failures}
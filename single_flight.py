@@ -0,0 +1,65 @@
+"""
+Single-flight entre workers asíncronos con leases en BicheonState.
+
+Varios clics al mismo botón (o reintentos automáticos de la invocación
+asíncrona de Lambda) lanzan workers con el mismo trabajo. run_once() deja
+que solo uno lo haga: el primero toma un lease con una escritura
+condicional, y los demás esperan su resultado y lo reutilizan. Si el dueño
+muere, el lease vence y otro worker lo toma.
+"""
+
+import logging
+import os
+import time
+import uuid
+
+logger = logging.getLogger('BicheonSingleFlight')
+logger.setLevel(logging.INFO)
+
+# Duración del lease mientras se trabaja (debe cubrir el trabajo completo)
+LEASE_SECONDS = int(os.environ.get('SINGLE_FLIGHT_LEASE_SECONDS', '30'))
+# Tiempo durante el cual el resultado queda disponible para otros workers
+RESULT_SECONDS = int(os.environ.get('SINGLE_FLIGHT_RESULT_SECONDS', '60'))
+# Espera máxima de un worker seguidor y cada cuánto consulta el lease
+WAIT_SECONDS = 20
+POLL_INTERVAL = 0.5
+
+
+class SingleFlightTimeout(Exception):
+    """El dueño del lease no publicó su resultado a tiempo."""
+
+
+def run_once(db, key, work, lease_seconds=None, keep_seconds=None, wait_seconds=None):
+    """Ejecuta `work()` una sola vez entre los workers que comparten `key`.
+
+    Devuelve (resultado, ejecutado): `ejecutado` es True si el trabajo se
+    hizo en esta llamada y False si se reutilizó el de otro worker. Con
+    wait_seconds=0 no se espera: si otro worker tiene el lease se devuelve
+    (None, False) de inmediato. El resultado debe ser serializable a JSON.
+    """
+    lease_seconds = LEASE_SECONDS if lease_seconds is None else lease_seconds
+    keep_seconds = RESULT_SECONDS if keep_seconds is None else keep_seconds
+    wait_seconds = WAIT_SECONDS if wait_seconds is None else wait_seconds
+
+    owner = uuid.uuid4().hex
+    deadline = time.monotonic() + wait_seconds
+    while True:
+        if db.acquire_lease(key, owner, lease_seconds):
+            try:
+                result = work()
+            except Exception:
+                db.release_lease(key, owner)
+                raise
+            db.complete_lease(key, owner, result, keep_seconds)
+            return result, True
+
+        lease = db.get_lease(key)
+        if lease and 'result' in lease:
+            logger.info(f"♻️ Reutilizando resultado de {key}")
+            return lease['result'], False
+
+        if time.monotonic() >= deadline:
+            if wait_seconds == 0:
+                return None, False
+            raise SingleFlightTimeout(key)
+        time.sleep(POLL_INTERVAL)
@@ -63,9 +63,8 @@ class TestServerless(unittest.TestCase):
 
     @patch('lambda_function.get_latest_post_by_tag')
     @patch('lambda_function.extract_and_summarize_article')
-    @patch('lambda_function.traducir')
     @patch('lambda_function.send_discord_message')
-    def test_scraper_job(self, mock_send, mock_traducir, mock_extract, mock_get_post):
+    def test_scraper_job(self, mock_send, mock_extract, mock_get_post):
         """Test que el scraper detecta y envía nuevos posts."""
         # Setup Mocks
         lambda_function.db.table_config.scan.return_value = {
@@ -75,7 +74,6 @@ class TestServerless(unittest.TestCase):
         
         mock_get_post.return_value = ('Titulo Test', 'http://test.com')
         mock_extract.return_value = 'Resumen Test'
-        mock_traducir.return_value = ('Resumen ES', 'Resumen ZH')
         
         # Run
         result = lambda_function.lambda_handler_scraper({}, None)
@@ -0,0 +1,276 @@
+"""
+Tests unitarios para core_logic (scraping del foro sin red).
+
+Ejecutar con: pytest tests/ -v
+"""
+
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core_logic
+
+
+BOARD_HTML = """
+<html><body>
+<article class="article">
+    <em class="article_category">Patch Note</em>
+    <a href="/board/patchnote/111"><span class="subject">Follow us on Facebook</span></a>
+</article>
+<article class="article">
+    <em class="article_category">Patch Note</em>
+    <a href="/board/patchnote/222"><span class="subject">Patch Note v2.0</span></a>
+</article>
+<article class="article">
+    <em class="article_category">Patch Note</em>
+    <a href="/board/patchnote/100"><span class="subject">Patch Note v1.9</span></a>
+</article>
+</body></html>
+"""
+
+
+def make_response(status_code=200, text=BOARD_HTML, headers=None):
+    """Crea una respuesta HTTP simulada."""
+    response = MagicMock()
+    response.status_code = status_code
+    response.text = text
+    response.content = text.encode()
+    response.encoding = 'utf-8'
+    response.iter_content.side_effect = lambda chunk_size=1: (
+        response.content[i:i + chunk_size] for i in range(0, len(response.content), chunk_size)
+    )
+    response.headers = headers or {}
+    return response
+
+
+class TestConditionalRequests:
+    """Tests para peticiones condicionales al tablero."""
+
+    def test_sends_validators_and_returns_not_modified(self):
+        """Verifica que se envían los validadores y un 304 no se parsea."""
+        validators = {'etag': '"abc"', 'last_modified': 'Wed, 01 Jan 2025 00:00:00 GMT'}
+        with patch('core_logic.http_client.get', return_value=make_response(304, text='')) as mock_get, \
+             patch('core_logic.html_parsers.parse_html') as mock_parse:
+            result = core_logic.get_latest_post_by_tag('patch note', validators)
+
+        assert result == core_logic.NOT_MODIFIED
+        mock_parse.assert_not_called()
+        headers = mock_get.call_args.kwargs['headers']
+        assert headers['If-None-Match'] == '"abc"'
+        assert headers['If-Modified-Since'] == 'Wed, 01 Jan 2025 00:00:00 GMT'
+
+    def test_updates_validators_on_200(self):
+        """Verifica que un 200 devuelve el post y actualiza los validadores."""
+        validators = {}
+        response = make_response(headers={'ETag': '"new"', 'Last-Modified': 'Thu, 02 Jan 2025 00:00:00 GMT'})
+        with patch('core_logic.http_client.get', return_value=response):
+            result = core_logic.get_latest_post_by_tag('patch note', validators)
+
+        assert result == ('Patch Note v2.0', 'https://forum.mir4global.com/board/patchnote/222')
+        assert validators['etag'] == '"new"'
+        assert validators['last_modified'] == 'Thu, 02 Jan 2025 00:00:00 GMT'
+
+
+class TestBoardDiff:
+    """Tests para el diff del listado contra los links ya vistos."""
+
+    def test_returns_unseen_posts_oldest_first(self):
+        """Verifica que se devuelven todos los posts más nuevos que el último visto."""
+        seen = ['https://forum.mir4global.com/board/patchnote/100']
+        with patch('core_logic.http_client.get', return_value=make_response()):
+            nuevos, links = core_logic.get_new_posts_by_tag('patch note', seen)
+
+        assert nuevos == [('Patch Note v2.0', 'https://forum.mir4global.com/board/patchnote/222')]
+        assert links == [
+            'https://forum.mir4global.com/board/patchnote/222',
+            'https://forum.mir4global.com/board/patchnote/100',
+        ]
+
+    def test_first_run_returns_only_latest(self):
+        """Verifica que sin historial solo se publica el más reciente."""
+        with patch('core_logic.http_client.get', return_value=make_response()):
+            nuevos, _ = core_logic.get_new_posts_by_tag('patch note', [])
+
+        assert nuevos == [('Patch Note v2.0', 'https://forum.mir4global.com/board/patchnote/222')]
+
+    def test_unknown_history_is_capped(self):
+        """Verifica el límite de posts cuando ningún visto aparece en el listado."""
+        with patch('core_logic.http_client.get', return_value=make_response()):
+            nuevos, _ = core_logic.get_new_posts_by_tag('patch note', ['https://otro/1'], max_new=5)
+
+        assert [link for _, link in nuevos] == [
+            'https://forum.mir4global.com/board/patchnote/100',
+            'https://forum.mir4global.com/board/patchnote/222',
+        ]
+
+    def test_validators_not_advanced_on_parse_error(self):
+        """Verifica que un error de parseo no guarda los validadores nuevos."""
+        validators = {'etag': '"old"'}
+        response = make_response(headers={'ETag': '"new"'})
+        with patch('core_logic.http_client.get', return_value=response), \
+             patch('core_logic.html_parsers.parse_html', side_effect=RuntimeError("html roto")):
+            assert core_logic.get_new_posts_by_tag('patch note', [], validators) is None
+
+        assert validators == {'etag': '"old"'}
+
+
+class TestListingFingerprint:
+    """Tests para el fingerprint de la región del listado."""
+
+    def test_fingerprint_ignores_content_outside_listing(self):
+        """Verifica que cambios fuera del listado no alteran el fingerprint."""
+        page_a = ('<html><script>var token="a1";</script>' + BOARD_HTML + '<footer>12:00</footer>').encode()
+        page_b = ('<html><script>var token="b2";</script>' + BOARD_HTML + '<footer>12:30</footer>').encode()
+
+        assert core_logic.listing_fingerprint(page_a) == core_logic.listing_fingerprint(page_b)
+        assert core_logic.listing_fingerprint(page_a.replace(b'v2.0', b'v2.1')) != core_logic.listing_fingerprint(page_a)
+
+    def test_fingerprint_without_markers(self):
+        """Verifica que sin listado no hay fingerprint (se parsea siempre)."""
+        assert core_logic.listing_fingerprint(b'<html><body>Mantenimiento</body></html>') is None
+
+    def test_same_fingerprint_skips_parsing(self):
+        """Verifica que un listado idéntico no construye el DOM aunque el servidor responda 200."""
+        validators = {'fingerprint': core_logic.listing_fingerprint(BOARD_HTML.encode())}
+        with patch('core_logic.http_client.get', return_value=make_response()), \
+             patch('core_logic.html_parsers.parse_html') as mock_parse:
+            result = core_logic.get_new_posts_by_tag('patch note', [], validators)
+
+        assert result == core_logic.NOT_MODIFIED
+        mock_parse.assert_not_called()
+
+    def test_new_fingerprint_is_returned(self):
+        """Verifica que un listado distinto se parsea y guarda su fingerprint."""
+        validators = {'fingerprint': 'viejo'}
+        with patch('core_logic.http_client.get', return_value=make_response()):
+            nuevos, _ = core_logic.get_new_posts_by_tag('patch note', [], validators)
+
+        assert nuevos
+        assert validators['fingerprint'] == core_logic.listing_fingerprint(BOARD_HTML.encode())
+
+
+class TestStreamingFetch:
+    """Tests para la descarga en streaming con corte anticipado."""
+
+    def make_streaming_response(self, html, chunk=16):
+        """Respuesta que registra cuántos chunks se consumieron."""
+        response = make_response(text=html)
+        response.chunks_read = 0
+
+        def iter_content(chunk_size=1):
+            data = html.encode()
+            for i in range(0, len(data), chunk):
+                response.chunks_read += 1
+                yield data[i:i + chunk]
+
+        response.iter_content.side_effect = iter_content
+        return response
+
+    def test_stops_after_first_qualifying_post(self):
+        """Verifica que se deja de leer al encontrar el post y se cierra la conexión."""
+        html = BOARD_HTML + "<article class='article'>relleno</article>" * 200
+        response = self.make_streaming_response(html)
+        with patch('core_logic.http_client.get', return_value=response) as mock_get:
+            result = core_logic.get_latest_post_by_tag('patch note')
+
+        assert result == ('Patch Note v2.0', 'https://forum.mir4global.com/board/patchnote/222')
+        assert mock_get.call_args.kwargs['stream'] is True
+        assert response.chunks_read * 16 < len(BOARD_HTML) + 100
+        response.close.assert_called_once()
+
+    def test_stream_matches_full_parse(self):
+        """Verifica que streaming y parseo completo devuelven el mismo post."""
+        with patch('core_logic.http_client.get', return_value=self.make_streaming_response(BOARD_HTML, chunk=5)):
+            streamed = core_logic.get_latest_post_by_tag('patch note', stream=True)
+        with patch('core_logic.http_client.get', return_value=make_response()):
+            parsed = core_logic.get_latest_post_by_tag('patch note', stream=False)
+
+        assert streamed == parsed
+
+    def test_diff_stream_stops_at_seen_post(self):
+        """Verifica que el diff en streaming corta al llegar a un post visto."""
+        seen = ['https://forum.mir4global.com/board/patchnote/222']
+        html = BOARD_HTML + "<article class='article'>relleno</article>" * 200
+        response = self.make_streaming_response(html)
+        with patch('core_logic.http_client.get', return_value=response):
+            nuevos, links = core_logic.get_new_posts_by_tag('patch note', seen, stream=True)
+
+        assert nuevos == []
+        assert links == seen
+        assert response.chunks_read * 16 < len(html) / 2
+
+    def test_stream_not_modified(self):
+        """Verifica que un 304 en streaming no lee el cuerpo."""
+        response = make_response(304, text='')
+        with patch('core_logic.http_client.get', return_value=response):
+            result = core_logic.get_latest_post_by_tag('patch note', {'etag': '"x"'})
+
+        assert result == core_logic.NOT_MODIFIED
+        response.iter_content.assert_not_called()
+
+
+class TestArticleSummary:
+    """Tests para la descarga de artículos revalidando contra la cache."""
+
+    ARTICLE = "<html><body><div class='article_content'><p>" + "Contenido del parche. " * 10 + "</p></div></body></html>"
+
+    def test_returns_summary_with_validators(self):
+        """Verifica que se devuelven texto, bullets, hash y validadores."""
+        response = make_response(text=self.ARTICLE, headers={'ETag': '"art"'})
+        with patch('core_logic.http_client.get', return_value=response):
+            summary = core_logic.fetch_article_summary("https://forum.mir4global.com/board/1")
+
+        assert 'Contenido del parche' in summary['text']
+        assert summary['bullets'].startswith('•')
+        assert summary['etag'] == '"art"'
+        assert summary['content_hash']
+
+    def test_same_content_hash_is_not_modified(self):
+        """Verifica que el mismo HTML no se vuelve a extraer."""
+        response = make_response(text=self.ARTICLE)
+        with patch('core_logic.http_client.get', return_value=response):
+            summary = core_logic.fetch_article_summary("https://forum.mir4global.com/board/1")
+        with patch('core_logic.http_client.get', return_value=response), \
+             patch('core_logic.summarize_article_html') as mock_summarize:
+            result = core_logic.fetch_article_summary("https://forum.mir4global.com/board/1", summary)
+
+        assert result == core_logic.NOT_MODIFIED
+        mock_summarize.assert_not_called()
+
+    def test_conditional_request_304(self):
+        """Verifica que se envían los validadores de la entrada cacheada."""
+        cached = {'etag': '"art"', 'content_hash': 'x'}
+        with patch('core_logic.http_client.get', return_value=make_response(304, text='')) as mock_get:
+            result = core_logic.fetch_article_summary("https://forum.mir4global.com/board/1", cached)
+
+        assert result == core_logic.NOT_MODIFIED
+        assert mock_get.call_args.kwargs['headers']['If-None-Match'] == '"art"'
+
+
+class TestNewspaperFallback:
+    """Tests para el fallback de newspaper3k."""
+
+    def test_fallback_reuses_downloaded_html(self):
+        """Verifica que el fallback parsea el HTML en memoria sin volver a descargarlo."""
+        html = "<html><body><span>Corto</span></body></html>"
+        article = MagicMock()
+        article.text = "Texto extraído por newspaper"
+        with patch('newspaper.Article', return_value=article) as mock_article, \
+             patch('core_logic.http_client.get') as mock_get:
+            result = core_logic.summarize_article_html(html, "https://forum.mir4global.com/board/1")
+
+        assert result.startswith("Texto extraído por newspaper")
+        mock_article.assert_called_once_with("https://forum.mir4global.com/board/1")
+        article.download.assert_called_once_with(input_html=html)
+        mock_get.assert_not_called()
+
+    def test_newspaper_not_imported_at_module_load(self):
+        """Verifica que importar core_logic no carga newspaper3k."""
+        import subprocess
+
+        code = "import sys, core_logic; sys.exit('newspaper' in sys.modules)"
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        assert subprocess.run([sys.executable, '-c', code], cwd=root).returncode == 0
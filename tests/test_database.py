@@ -0,0 +1,276 @@
+"""
+Tests unitarios para DatabaseAdapter (DynamoDB simulado).
+
+Ejecutar con: pytest tests/ -v
+"""
+
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from botocore.exceptions import ClientError
+
+from database import DatabaseAdapter, LRUCache
+
+
+@pytest.fixture
+def db():
+    """DatabaseAdapter con tablas simuladas."""
+    with patch('boto3.resource'):
+        adapter = DatabaseAdapter()
+    adapter.dynamodb = MagicMock()
+    adapter.table_config = MagicMock()
+    adapter.table_state = MagicMock()
+    return adapter
+
+
+class TestLRUCache:
+    """Tests para la cache LRU en memoria."""
+
+    def test_evicts_least_recently_used(self):
+        """Verifica que se descarta la entrada menos usada."""
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        assert cache.get('c') == 3
+
+
+class TestArticleCache:
+    """Tests para la cache de artículos."""
+
+    URL = "https://forum.mir4global.com/board/patchnote/1"
+
+    def test_set_then_get_uses_memory(self, db):
+        """Verifica que tras guardar, la lectura no va a DynamoDB."""
+        db.set_article_cache(self.URL, 'Texto', '• Texto', content_hash='h', etag='"e"')
+        entry = db.get_article_cache(self.URL)
+
+        assert entry['bullets'] == '• Texto'
+        assert db.is_article_fresh(entry)
+        db.table_state.get_item.assert_not_called()
+        item = db.table_state.put_item.call_args.kwargs['Item']
+        assert item['key'].startswith('article_')
+        assert item['ttl'] > time.time()
+        assert 'last_modified' not in item
+
+    def test_get_from_dynamodb_fills_memory(self, db):
+        """Verifica que una lectura de DynamoDB queda en la LRU."""
+        db.table_state.get_item.return_value = {'Item': {
+            'url': self.URL, 'text': 'T', 'bullets': '• T', 'fresh_until': 1
+        }}
+
+        first = db.get_article_cache(self.URL)
+        second = db.get_article_cache(self.URL)
+
+        assert first == second
+        assert not db.is_article_fresh(first)
+        db.table_state.get_item.assert_called_once()
+
+    def test_offline_still_caches_in_memory(self):
+        """Verifica que sin DynamoDB la LRU sigue funcionando."""
+        with patch('boto3.resource', side_effect=Exception("sin credenciales")):
+            adapter = DatabaseAdapter()
+
+        adapter.set_article_cache(self.URL, 'Texto', '• Texto')
+        assert adapter.get_article_cache(self.URL)['text'] == 'Texto'
+
+
+class TestTranslationCache:
+    """Tests para la cache de traducciones por contenido."""
+
+    def test_key_depends_on_text_and_language(self):
+        """Verifica que la clave cambia con el texto y con el idioma, no con el mensaje."""
+        key = DatabaseAdapter._translation_key('Resumen', 'es')
+
+        assert key == DatabaseAdapter._translation_key('Resumen', 'es')
+        assert key != DatabaseAdapter._translation_key('Resumen', 'pt')
+        assert key != DatabaseAdapter._translation_key('Resumen 2', 'es')
+
+    def test_set_then_get_uses_memory(self, db):
+        """Verifica que una traducción guardada se lee sin ir a DynamoDB."""
+        db.set_translation('Resumen', 'es', 'Resumen ES')
+
+        assert db.get_translation('Resumen', 'es') == 'Resumen ES'
+        db.dynamodb.batch_get_item.assert_not_called()
+        batch = db.table_state.batch_writer.return_value.__enter__.return_value
+        item = batch.put_item.call_args.kwargs['Item']
+        assert item['ttl'] > time.time() + 7 * 86400
+
+    def test_misses_fetched_in_one_batch(self, db):
+        """Verifica que los idiomas que faltan se piden en un solo batch_get_item."""
+        db.set_translation('Resumen', 'es', 'Resumen ES')
+        pt_key = DatabaseAdapter._translation_key('Resumen', 'pt')
+        db.dynamodb.batch_get_item.return_value = {
+            'Responses': {db.table_state_name: [{'key': pt_key, 'translated': 'Resumo'}]}
+        }
+
+        found = db.get_translations('Resumen', ['es', 'pt', 'zh'])
+
+        assert found == {'es': 'Resumen ES', 'pt': 'Resumo'}
+        db.dynamodb.batch_get_item.assert_called_once()
+        keys = db.dynamodb.batch_get_item.call_args.kwargs['RequestItems'][db.table_state_name]['Keys']
+        assert len(keys) == 2
+        assert db.translation_lru.get(pt_key) == 'Resumo'
+
+    def test_throttled_keys_retried(self, db):
+        """Verifica que una traducción no devuelta por throttling se vuelve a pedir."""
+        pt_key = DatabaseAdapter._translation_key('Resumen', 'pt')
+        unprocessed = {db.table_state_name: {'Keys': [{'key': pt_key}]}}
+        db.dynamodb.batch_get_item.side_effect = [
+            {'Responses': {}, 'UnprocessedKeys': unprocessed},
+            {'Responses': {db.table_state_name: [{'key': pt_key, 'translated': 'Resumo'}]}},
+        ]
+
+        with patch('database.time.sleep'):
+            assert db.get_translations('Resumen', ['pt']) == {'pt': 'Resumo'}
+
+
+class TestCachedTranslationUpdate:
+    """Tests para la actualización atómica del cache de traducciones por mensaje."""
+
+    def test_single_update_per_language(self, db):
+        """Verifica que se escribe solo translations.<lang> y se devuelve el item nuevo."""
+        db.table_state.update_item.return_value = {'Attributes': {
+            'original_content': 'Resumen',
+            'translations': {'es': 'Resumen ES', 'pt': 'Resumo'},
+            'metadata': {'link': 'https://forum.mir4global.com/board/1'}
+        }}
+
+        cached = db.set_cached_translation('abc', 'pt', 'Resumo')
+
+        kwargs = db.table_state.update_item.call_args.kwargs
+        assert kwargs['UpdateExpression'] == 'SET translations.#lang = :v'
+        assert kwargs['ExpressionAttributeNames'] == {'#lang': 'pt'}
+        assert kwargs['ReturnValues'] == 'ALL_NEW'
+        assert cached['translations'] == {'es': 'Resumen ES', 'pt': 'Resumo'}
+        assert cached['metadata']['link'].endswith('/board/1')
+        db.table_state.get_item.assert_not_called()
+        db.table_state.put_item.assert_not_called()
+
+    def test_expired_entry_returns_none(self, db):
+        """Verifica que un cache expirado no se recrea a medias."""
+        error = ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}}, 'UpdateItem')
+        db.table_state.update_item.side_effect = error
+
+        assert db.set_cached_translation('abc', 'pt', 'Resumo') is None
+
+
+class TestLeases:
+    """Tests para los leases con escritura condicional."""
+
+    def test_acquire_uses_conditional_put(self, db):
+        """Verifica que el lease solo se toma si no existe o venció."""
+        assert db.acquire_lease('translate_abc_es', 'yo', 30) is True
+
+        kwargs = db.table_state.put_item.call_args.kwargs
+        assert kwargs['Item']['key'] == 'lease_translate_abc_es'
+        assert kwargs['ConditionExpression'] == 'attribute_not_exists(#k) OR expires_at < :now'
+
+    def test_held_lease_not_acquired(self, db):
+        """Verifica que un lease ajeno vigente no se toma."""
+        db.table_state.put_item.side_effect = ClientError(
+            {'Error': {'Code': 'ConditionalCheckFailedException'}}, 'PutItem')
+
+        assert db.acquire_lease('translate_abc_es', 'yo', 30) is False
+
+    def test_result_round_trips_as_json(self, db):
+        """Verifica que el resultado publicado se lee igual (sin Decimal)."""
+        db.complete_lease('command_x', 'yo', ['Titulo', 'link', 'bullets'], 60)
+        stored = db.table_state.update_item.call_args.kwargs['ExpressionAttributeValues'][':r']
+        db.table_state.get_item.return_value = {'Item': {
+            'key': 'lease_command_x', 'owner': 'yo', 'expires_at': int(time.time()) + 60, 'result': stored
+        }}
+
+        assert db.get_lease('command_x')['result'] == ['Titulo', 'link', 'bullets']
+
+
+class TestDeliveryLedger:
+    """Tests para el registro de envíos por (post, canal)."""
+
+    def test_delivered_channels_read_consistently(self, db):
+        """Verifica que se leen con lectura consistente solo los canales registrados."""
+        db.dynamodb.batch_get_item.return_value = {'Responses': {db.table_state_name: [
+            {'key': 'delivery_abc_2'}
+        ]}}
+
+        assert db.get_delivered_channels('abc', ['1', '2', '3']) == {'2'}
+        request = db.dynamodb.batch_get_item.call_args.kwargs['RequestItems'][db.table_state_name]
+        assert request['ConsistentRead'] is True
+        assert len(request['Keys']) == 3
+
+    def test_unprocessed_keys_retried(self, db):
+        """Verifica que las claves no procesadas por throttling se vuelven a pedir."""
+        unprocessed = {db.table_state_name: {'Keys': [{'key': 'delivery_abc_2'}], 'ConsistentRead': True}}
+        db.dynamodb.batch_get_item.side_effect = [
+            {'Responses': {db.table_state_name: [{'key': 'delivery_abc_1'}]}, 'UnprocessedKeys': unprocessed},
+            {'Responses': {db.table_state_name: [{'key': 'delivery_abc_2'}]}, 'UnprocessedKeys': {}},
+        ]
+
+        with patch('database.time.sleep'):
+            assert db.get_delivered_channels('abc', ['1', '2', '3']) == {'1', '2'}
+        assert db.dynamodb.batch_get_item.call_args.kwargs['RequestItems'] == unprocessed
+
+    def test_unreadable_ledger_raises(self, db):
+        """Verifica que si el registro no se puede leer el trabajo falla en vez de reenviar."""
+        unprocessed = {db.table_state_name: {'Keys': [{'key': 'delivery_abc_1'}]}}
+        db.dynamodb.batch_get_item.return_value = {'Responses': {}, 'UnprocessedKeys': unprocessed}
+
+        with patch('database.time.sleep'), pytest.raises(RuntimeError):
+            db.get_delivered_channels('abc', ['1'])
+
+    def test_record_is_conditional(self, db):
+        """Verifica que un envío ya registrado no se vuelve a registrar."""
+        assert db.record_delivery('abc', '1') is True
+        assert db.table_state.put_item.call_args.kwargs['ConditionExpression'] == 'attribute_not_exists(#k)'
+
+        db.table_state.put_item.side_effect = ClientError(
+            {'Error': {'Code': 'ConditionalCheckFailedException'}}, 'PutItem')
+
+        assert db.record_delivery('abc', '1') is False
+
+
+class TestChannelHealth:
+    """Tests para el estado de entrega de los canales en BicheonConfig."""
+
+    def test_config_scan_paginates_and_skips_disabled(self, db):
+        """Verifica que se leen todas las páginas y los canales deshabilitados no se usan."""
+        db.table_config.scan.side_effect = [
+            {'Items': [{'guild_id': '1', 'channel_id': 10}], 'LastEvaluatedKey': {'guild_id': '1'}},
+            {'Items': [{'guild_id': '2', 'channel_id': 20, 'failure_count': 3, 'disabled': True}]},
+        ]
+
+        assert db.get_config() == {'1': 10}
+        assert db.table_config.scan.call_args.kwargs == {'ExclusiveStartKey': {'guild_id': '1'}}
+
+    def test_channel_disabled_at_threshold(self, db):
+        """Verifica que el canal se deshabilita al llegar al umbral de fallos."""
+        db.table_config.update_item.side_effect = [
+            {'Attributes': {'failure_count': 2}},
+            {'Attributes': {'failure_count': 3}},
+            {},
+        ]
+
+        assert db.record_channel_failure('1', 10, 403) is False
+        assert db.record_channel_failure('1', 10, 403) is True
+        last = db.table_config.update_item.call_args.kwargs
+        assert last['UpdateExpression'].startswith('SET disabled = :d')
+        assert last['ExpressionAttributeValues'][':c'] == 10
+
+    def test_reconfigured_guild_not_touched(self, db):
+        """Verifica que un fallo del canal anterior no afecta al canal nuevo del servidor."""
+        db.table_config.update_item.side_effect = ClientError(
+            {'Error': {'Code': 'ConditionalCheckFailedException'}}, 'UpdateItem')
+
+        assert db.record_channel_failure('1', 10, 404) is False
+        assert db.table_config.update_item.call_count == 1
@@ -0,0 +1,185 @@
+"""
+Tests unitarios para la cola de envíos (delivery_queue.py).
+
+Ejecutar con: pytest tests/ -v
+"""
+
+import json
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import delivery_queue
+from delivery_queue import MemoryQueue, SqsQueue, deliver_job, drain, make_jobs
+
+PAYLOAD = {'content': 'Nuevo parche', 'components': []}
+
+
+def outcome(channel_id, ok=True, status=200, error_kind=None):
+    return {'channel_id': channel_id, 'ok': ok, 'status': status, 'attempts': 1, 'error': None,
+            'error_kind': error_kind}
+
+
+def broadcast(respond):
+    """Envío simulado a varios canales con `respond(channel_id)` por canal."""
+    def send(channel_ids, payload, on_result=None):
+        outcomes = []
+        for channel_id in channel_ids:
+            outcomes.append(respond(channel_id))
+            if on_result is not None:
+                on_result(outcomes[-1])
+        return outcomes
+    return MagicMock(side_effect=send)
+
+
+class MemoryLedger:
+    """Registro de envíos en memoria con la interfaz del adaptador de DynamoDB."""
+
+    def __init__(self):
+        self.delivered = set()
+
+    def get_delivered_channels(self, message_id, channel_ids):
+        return {c for c in channel_ids if (message_id, c) in self.delivered}
+
+    def record_delivery(self, message_id, channel_id):
+        if (message_id, channel_id) in self.delivered:
+            return False
+        self.delivered.add((message_id, channel_id))
+        return True
+
+
+class TestJobs:
+    """Tests para el armado de trabajos."""
+
+    def test_channels_split_in_batches(self):
+        """Verifica que se arma un trabajo por lote de canales."""
+        jobs = make_jobs(range(7), PAYLOAD, meta={'tag': 'event'}, batch_size=3)
+
+        assert [job['channel_ids'] for job in jobs] == [[0, 1, 2], [3, 4, 5], [6]]
+        assert all(job['attempt'] == 1 and job['meta'] == {'tag': 'event'} for job in jobs)
+        assert len({job['job_id'] for job in jobs}) == 3
+
+
+class TestDelivery:
+    """Tests para la entrega y los reintentos parciales."""
+
+    def test_only_unsent_failures_requeued(self):
+        """Verifica que se reencolan solo los canales a los que el mensaje seguro no llegó."""
+        queue = MemoryQueue()
+        results = {'1': outcome('1'), '2': outcome('2', False, 429, 'rate_limited'),
+                   '3': outcome('3', False, 403, 'http'), '4': outcome('4', False, None, 'connect'),
+                   '5': outcome('5', False, 503, 'http'), '6': outcome('6', False, None, 'network')}
+
+        deliver_job(make_jobs(['1', '2', '3', '4', '5', '6'], PAYLOAD)[0], queue, broadcast(results.get))
+
+        retry = queue.receive()
+        assert [job['channel_ids'] for job in retry] == [['2', '4']]
+        assert retry[0]['attempt'] == 2
+
+    def test_gives_up_after_max_attempts(self):
+        """Verifica que un canal que siempre falla no se reencola para siempre."""
+        queue = MemoryQueue()
+        queue.send(make_jobs(['1'], PAYLOAD))
+        send = broadcast(lambda cid: outcome(cid, False, 429, 'rate_limited'))
+
+        drain(queue, send)
+
+        assert send.call_count == delivery_queue.MAX_DELIVERY_ATTEMPTS
+        assert len(queue) == 0
+
+    def test_drain_delivers_everything(self):
+        """Verifica que vaciar la cola entrega cada canal una vez."""
+        queue = MemoryQueue()
+        queue.send(make_jobs(range(25), PAYLOAD, batch_size=4))
+        send = broadcast(outcome)
+
+        outcomes = drain(queue, send, max_jobs=2)
+
+        assert sorted(o['channel_id'] for o in outcomes) == list(range(25))
+        assert send.call_count == 7
+
+
+class TestLedger:
+    """Tests para la entrega reanudable con registro de envíos."""
+
+    def test_delivered_channels_skipped(self):
+        """Verifica que un trabajo reentregado solo envía a los canales pendientes."""
+        ledger = MagicMock()
+        ledger.get_delivered_channels.return_value = {'1', '2'}
+        send = broadcast(outcome)
+        job = make_jobs(['1', '2', '3'], PAYLOAD, meta={'message_id': 'abc'})[0]
+
+        deliver_job(job, MemoryQueue(), send, ledger)
+
+        assert send.call_args.args[:2] == (['3'], PAYLOAD)
+        ledger.record_delivery.assert_called_once_with('abc', '3')
+
+    def test_only_successes_recorded(self):
+        """Verifica que un canal fallido no queda registrado y se reintenta."""
+        ledger = MagicMock()
+        ledger.get_delivered_channels.return_value = set()
+        queue = MemoryQueue()
+        results = {'1': outcome('1'), '2': outcome('2', False, None, 'connect')}
+        job = make_jobs(['1', '2'], PAYLOAD, meta={'message_id': 'abc'})[0]
+
+        deliver_job(job, queue, broadcast(results.get), ledger)
+
+        ledger.record_delivery.assert_called_once_with('abc', '1')
+        assert queue.receive()[0]['channel_ids'] == ['2']
+
+    def test_crash_mid_job_resumes_pending_channels(self):
+        """Verifica que tras una caída a mitad del lote la reentrega solo envía lo pendiente."""
+        ledger = MemoryLedger()
+        job = make_jobs(['1', '2', '3', '4'], PAYLOAD, meta={'message_id': 'abc'})[0]
+
+        def crashing_send(channel_ids, payload, on_result=None):
+            for channel_id in channel_ids[:2]:
+                on_result(outcome(channel_id))
+            raise TimeoutError("Lambda sin tiempo")
+
+        with pytest.raises(TimeoutError):
+            deliver_job(job, MemoryQueue(), crashing_send, ledger)
+
+        send = broadcast(outcome)
+        deliver_job(job, MemoryQueue(), send, ledger)
+
+        assert send.call_args.args[0] == ['3', '4']
+        assert ledger.delivered == {('abc', '1'), ('abc', '2'), ('abc', '3'), ('abc', '4')}
+
+
+class TestBackends:
+    """Tests para la selección y los backends de la cola."""
+
+    def test_memory_queue_without_url(self):
+        """Verifica que sin DELIVERY_QUEUE_URL se usa la cola en memoria."""
+        with patch.object(delivery_queue, '_queue', None), patch.dict(os.environ, {}, clear=False):
+            os.environ.pop('DELIVERY_QUEUE_URL', None)
+            assert isinstance(delivery_queue.get_queue(), MemoryQueue)
+
+    def test_sqs_sends_in_batches_of_ten(self):
+        """Verifica que SQS recibe lotes de a 10 mensajes JSON."""
+        with patch('boto3.client') as mock_client:
+            queue = SqsQueue('https://sqs.example/queue')
+        client = mock_client.return_value
+        client.send_message_batch.return_value = {'Successful': []}
+
+        queue.send(make_jobs(range(12), PAYLOAD, batch_size=1), delay_seconds=30)
+
+        batches = [c.kwargs['Entries'] for c in client.send_message_batch.call_args_list]
+        assert [len(b) for b in batches] == [10, 2]
+        assert json.loads(batches[1][0]['MessageBody'])['channel_ids'] == [10]
+        assert batches[0][0]['DelaySeconds'] == 30
+
+    def test_sqs_rejection_raises(self):
+        """Verifica que un rechazo de SQS no se pierde en silencio."""
+        with patch('boto3.client') as mock_client:
+            queue = SqsQueue('https://sqs.example/queue')
+        mock_client.return_value.send_message_batch.return_value = {'Failed': [{'Id': '0'}]}
+
+        with pytest.raises(RuntimeError):
+            queue.send(make_jobs(['1'], PAYLOAD))
@@ -0,0 +1,203 @@
+"""
+Tests unitarios para el envío concurrente a canales (fanout.py).
+
+Ejecutar con: pytest tests/ -v
+"""
+
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import fanout
+from fanout import RateLimiter, broadcast, fan_out, post_channel_message
+
+HEADERS = {'Authorization': 'Bot mock_token'}
+
+
+def make_response(status_code=200, headers=None, body=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = body or {}
+    response.text = str(body or '')
+    return response
+
+
+@pytest.fixture
+def limiter():
+    """RateLimiter sin ritmo global apreciable, para aislar los buckets."""
+    return RateLimiter(global_per_second=10000)
+
+
+class TestRateLimiter:
+    """Tests para el seguimiento de buckets y del límite global."""
+
+    def test_exhausted_bucket_waits_for_reset(self, limiter):
+        """Verifica que un bucket sin cupo espera a X-RateLimit-Reset-After."""
+        limiter.update('1', make_response(headers={'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset-After': '0.2'}))
+
+        start = time.monotonic()
+        limiter.acquire('1')
+        limiter.acquire('2')
+
+        assert time.monotonic() - start >= 0.15
+
+    def test_other_buckets_not_blocked(self, limiter):
+        """Verifica que un canal limitado no frena a los demás."""
+        limiter.update('1', make_response(headers={'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset-After': '5'}))
+
+        start = time.monotonic()
+        limiter.acquire('2')
+
+        assert time.monotonic() - start < 0.1
+
+    def test_global_429_pauses_every_route(self, limiter):
+        """Verifica que un 429 global pausa todos los canales."""
+        retry = limiter.update('1', make_response(429, body={'retry_after': 0.2, 'global': True}))
+
+        start = time.monotonic()
+        limiter.acquire('2')
+
+        assert retry == 0.2
+        assert time.monotonic() - start >= 0.15
+
+    def test_global_limit_split_across_containers(self):
+        """Verifica que cada contenedor usa su parte del límite global de Discord."""
+        try:
+            with patch.dict(os.environ, {'FANOUT_CONTAINERS': '2'}):
+                importlib.reload(fanout)
+                assert fanout.limiter._interval == pytest.approx(2 / fanout.GLOBAL_RATE_LIMIT)
+        finally:
+            importlib.reload(fanout)
+
+    def test_global_rate_is_paced(self):
+        """Verifica que no se superan GLOBAL_RATE_LIMIT peticiones por segundo."""
+        paced = RateLimiter(global_per_second=20)
+
+        start = time.monotonic()
+        for channel in range(5):
+            paced.acquire(str(channel))
+
+        assert time.monotonic() - start >= 4 / 20
+
+
+class TestPostChannelMessage:
+    """Tests para el envío a un canal."""
+
+    def test_retries_after_429(self, limiter):
+        """Verifica que un 429 respeta retry_after y se reintenta."""
+        responses = [make_response(429, body={'retry_after': 0.1}), make_response(200)]
+
+        with patch.object(fanout.http_client, 'post', side_effect=responses) as mock_post:
+            start = time.monotonic()
+            outcome = post_channel_message('1', {'content': 'hola'}, HEADERS, limiter)
+            elapsed = time.monotonic() - start
+
+        assert outcome['ok'] and outcome['attempts'] == 2
+        assert elapsed >= 0.08
+        assert mock_post.call_args.kwargs['retries'] == 0
+
+    def test_client_error_not_retried(self, limiter):
+        """Verifica que un 403 (sin permisos) no se reintenta y se reporta."""
+        with patch.object(fanout.http_client, 'post', return_value=make_response(403, body={'code': 50013})) as mock_post:
+            outcome = post_channel_message('1', {'content': 'hola'}, HEADERS, limiter)
+
+        assert mock_post.call_count == 1
+        assert outcome == {'channel_id': '1', 'ok': False, 'status': 403, 'attempts': 1, 'error': "{'code': 50013}",
+                           'error_kind': 'http'}
+
+    def test_read_timeout_marked_as_possibly_sent(self, limiter):
+        """Verifica que un timeout de lectura no se reintenta ni se marca como reintentable."""
+        with patch.object(fanout.http_client, 'post', side_effect=requests.exceptions.ReadTimeout("lento")) as mock_post:
+            outcome = post_channel_message('1', {'content': 'hola'}, HEADERS, limiter)
+
+        assert mock_post.call_count == 1
+        assert outcome['error_kind'] == 'network'
+
+    def test_connect_timeout_marked_as_unsent(self, limiter):
+        """Verifica que un fallo de conexión se reintenta y queda como no enviado."""
+        with patch.object(fanout.http_client, 'post', side_effect=requests.exceptions.ConnectTimeout("caído")) as mock_post:
+            outcome = post_channel_message('1', {'content': 'hola'}, HEADERS, limiter)
+
+        assert mock_post.call_count == fanout.MAX_ATTEMPTS
+        assert outcome['error_kind'] == 'connect'
+
+
+class TestFanOut:
+    """Tests para el envío concurrente."""
+
+    def test_channels_sent_concurrently(self):
+        """Verifica que el tiempo total no es la suma de los envíos."""
+        def slow_send(channel_id):
+            time.sleep(0.1)
+            return {'channel_id': channel_id, 'ok': True}
+
+        start = time.monotonic()
+        outcomes = fan_out([str(i) for i in range(10)], slow_send, max_workers=10)
+        elapsed = time.monotonic() - start
+
+        assert elapsed < 0.5
+        assert [o['channel_id'] for o in outcomes] == [str(i) for i in range(10)]
+
+    def test_exception_reported_per_channel(self):
+        """Verifica que un canal que lanza excepción no corta a los demás."""
+        def send(channel_id):
+            if channel_id == '2':
+                raise RuntimeError("boom")
+            return {'channel_id': channel_id, 'ok': True}
+
+        outcomes = fan_out(['1', '2', '3'], send)
+
+        assert [o['ok'] for o in outcomes] == [True, False, True]
+        assert outcomes[1]['error'] == 'boom'
+
+    def test_results_reported_as_they_finish(self):
+        """Verifica que on_result recibe cada canal en el hilo que llama sin esperar al más lento."""
+        release = threading.Event()
+        seen = []
+
+        def send(channel_id):
+            if channel_id == 'slow':
+                release.wait(2)
+            return {'channel_id': channel_id, 'ok': True}
+
+        def on_result(outcome):
+            seen.append((outcome['channel_id'], threading.get_ident()))
+            release.set()
+
+        outcomes = fan_out(['slow', 'fast'], send, max_workers=2, on_result=on_result)
+
+        assert [channel_id for channel_id, _ in seen] == ['fast', 'slow']
+        assert {ident for _, ident in seen} == {threading.get_ident()}
+        assert [o['channel_id'] for o in outcomes] == ['slow', 'fast']
+
+
+class TestBroadcast:
+    """Tests para el envío de un mismo mensaje a muchos canales."""
+
+    def test_payload_encoded_once(self, limiter):
+        """Verifica que todos los canales envían el mismo buffer y las mismas cabeceras."""
+        payload = {'content': 'Nuevo parche 🐉', 'components': []}
+
+        with patch.object(fanout.http_client, 'post', return_value=make_response(200)) as mock_post, \
+             patch.object(fanout.json, 'dumps', wraps=fanout.json.dumps) as mock_dumps:
+            outcomes = broadcast([str(i) for i in range(20)], payload, 'mock_token', rate_limiter=limiter)
+
+        assert all(o['ok'] for o in outcomes)
+        assert mock_dumps.call_count == 1
+        bodies = {id(c.kwargs['data']) for c in mock_post.call_args_list}
+        headers = {id(c.kwargs['headers']) for c in mock_post.call_args_list}
+        assert len(bodies) == 1 and len(headers) == 1
+        assert 'json' not in mock_post.call_args.kwargs
+        assert json.loads(mock_post.call_args.kwargs['data']) == payload
+        assert mock_post.call_args.kwargs['headers']['Authorization'] == 'Bot mock_token'
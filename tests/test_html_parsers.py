@@ -0,0 +1,238 @@
+"""
+Tests de paridad de los backends HTML frente a BeautifulSoup.
+
+Ejecutar con: pytest tests/ -v
+"""
+
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+from bs4 import BeautifulSoup
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import core_logic
+import html_parsers
+
+
+BOARD_HTML = """<!DOCTYPE html>
+<html><head><title>MIR4 Forum</title><script>var board = 1;</script></head>
+<body>
+<!-- listado -->
+<article class="article">
+    <em class="article_category">Notice</em>
+    <a href="/board/notice/900"><span class="subject">Server Maintenance</span></a>
+</article>
+<article class="article highlighted">
+    <em class="article_category">Patch Note</em>
+    <a href="https://forum.mir4global.com/board/patchnote/300"><span class="subject"> Check our YouTube channel </span></a>
+</article>
+<article class="article">
+    <em class="article_category"> Patch Note </em>
+    <a href="/board/patchnote/299"><span class="subject">Patch Note &amp; Fixes v3.1</span> <i>new</i></a>
+</article>
+<article class="article"><span class="subject">Sin categoría</span></article>
+</body></html>
+"""
+
+ARTICLE_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Patch</title><style>p { color: red; }</style></head>
+<body>
+<div class="header"><a href="/">Home</a></div>
+<div class="article_content">
+    <p>Greetings, this is MIR4.</p>
+    <p>The following changes will be applied to <b>all</b> servers.</p>
+    <script>trackView();</script>
+    <!-- nota interna -->
+    <p>ASIA (UTC+8) 2025.01.01 10:00 AM ~ 2025.01.01 02:00 PM</p>
+    <div><p>Rewards: Darksteel x1000 &amp; Copper x5000</p>
+    <ul><li>Item A</li><li>Item B</li></ul></div>
+    <p>Thank you.</p>
+</div>
+</body></html>
+"""
+
+FALLBACK_HTML = """<html><body>
+<div class="wrapper"><div class="inner">
+<p>""" + "Long paragraph about the new Conquest Season schedule. " * 6 + """</p>
+<p>Second paragraph with more details for every region and server.</p>
+</div></div></body></html>"""
+
+
+def available_backends():
+    """Backends instalados en el entorno actual."""
+    names = []
+    for name, cls in html_parsers.BACKENDS.items():
+        try:
+            cls()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+BACKENDS = available_backends()
+
+
+def make_response(text):
+    """Crea una respuesta HTTP simulada."""
+    response = MagicMock()
+    response.status_code = 200
+    response.text = text
+    response.content = text.encode()
+    response.encoding = 'utf-8'
+    response.iter_content.side_effect = lambda chunk_size=1: (
+        response.content[i:i + chunk_size] for i in range(0, len(response.content), chunk_size)
+    )
+    response.headers = {}
+    return response
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+class TestNodeParity:
+    """Paridad de la API de nodos con BeautifulSoup."""
+
+    def test_select_and_text(self, backend):
+        """Verifica selectores y textos usados por el scraper."""
+        soup = BeautifulSoup(BOARD_HTML, 'html.parser')
+        doc = html_parsers.parse_html(BOARD_HTML, backend)
+
+        expected = soup.select('article.article')
+        posts = doc.select('article.article')
+        assert len(posts) == len(expected)
+
+        for post, ref in zip(posts, expected):
+            assert post.get_text(strip=True) == ref.get_text(strip=True)
+            category = post.select_one('em.article_category')
+            ref_category = ref.select_one('em.article_category')
+            assert (category is None) == (ref_category is None)
+            if category:
+                assert category.text.strip() == ref_category.text.strip()
+                assert post.select_one('a')['href'] == ref.find('a')['href']
+                assert post.select_one('span.subject').text == ref.find('span', class_='subject').text
+
+    def test_article_text_after_cleanup(self, backend):
+        """Verifica get_text con separador tras eliminar script/style."""
+        soup = BeautifulSoup(ARTICLE_HTML, 'html.parser')
+        ref = soup.select_one('div.article_content')
+        for unwanted in ref(['script', 'style', 'meta', 'link']):
+            unwanted.decompose()
+
+        content = html_parsers.parse_html(ARTICLE_HTML, backend).select_one('div.article_content')
+        content.remove_tags(['script', 'style', 'meta', 'link'])
+
+        assert content.get_text(separator='\n\n', strip=True) == ref.get_text(separator='\n\n', strip=True)
+
+    def test_select_excludes_self(self, backend):
+        """Verifica que select() solo devuelve descendientes."""
+        doc = html_parsers.parse_html('<div class="a"><div class="a">x</div></div>', backend)
+        outer = doc.select_one('div.a')
+        assert len(outer.select('div.a')) == 1
+        assert outer.select_one('div.a').text == 'x'
+
+    def test_missing_attribute(self, backend):
+        """Verifica get() y [] para atributos inexistentes."""
+        link = html_parsers.parse_html('<a>sin href</a>', backend).select_one('a')
+        assert link.get('href') is None
+        with pytest.raises(KeyError):
+            link['href']
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+class TestScraperParity:
+    """Paridad de las funciones del scraper con cada backend."""
+
+    def run_with_backend(self, backend, html, func, *args):
+        with patch.dict(os.environ, {'HTML_PARSER_BACKEND': backend}), \
+             patch('core_logic.http_client.get', return_value=make_response(html)):
+            return func(*args)
+
+    def test_latest_post(self, backend):
+        """Verifica que todos los backends eligen el mismo post."""
+        result = self.run_with_backend(backend, BOARD_HTML, core_logic.get_latest_post_by_tag, 'patch note', None, False)
+        reference = self.run_with_backend('bs4', BOARD_HTML, core_logic.get_latest_post_by_tag, 'patch note', None, False)
+
+        assert result == reference == ('Patch Note & Fixes v3.1', 'https://forum.mir4global.com/board/patchnote/299')
+
+    @pytest.mark.parametrize("html", [ARTICLE_HTML, FALLBACK_HTML], ids=['selector', 'fallback'])
+    def test_article_summary(self, backend, html):
+        """Verifica que el resumen extraído es idéntico al de BeautifulSoup."""
+        url = "https://forum.mir4global.com/board/patchnote/299"
+        result = self.run_with_backend(backend, html, core_logic.extract_and_summarize_article, url)
+        reference = self.run_with_backend('bs4', html, core_logic.extract_and_summarize_article, url)
+
+        assert result == reference
+        assert 'Darksteel' in result or 'Conquest' in result
+
+
+CONTENT_HTML = """<html><body><div id="wrap">
+<div class="nav"><a href="/1">Home</a><a href="/2">News</a><a href="/3">Events and more links</a></div>
+<div class="post"><div class="meta">Posted by GM</div>
+<div class="body"><p>""" + "Conquest season starts this week. " * 8 + """</p>
+<p>Second <b>bold</b> paragraph with rewards for every server.</p>
+<ul><li>Item A reward</li><li>Item B reward</li></ul></div>
+<div class="comments"><div>""" + '<a href="/c">comment link</a> ' * 30 + """</div></div>
+</div></div></body></html>"""
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+class TestMainContentDetector:
+    """Tests para el detector de contenido por densidad de texto."""
+
+    def test_events_match_text(self, backend):
+        """Verifica que los eventos de texto reproducen get_text()."""
+        doc = html_parsers.parse_html(ARTICLE_HTML, backend)
+        texts = [e[1].strip() for e in doc.events() if e[0] == 'text' and e[1].strip()]
+        assert texts == doc.get_text(separator='\n', strip=True).split('\n')
+
+    def test_events_are_balanced(self, backend):
+        """Verifica que cada start tiene su end en orden."""
+        stack = []
+        for event in html_parsers.parse_html(CONTENT_HTML, backend).events():
+            if event[0] == 'start':
+                stack.append(event[1])
+            elif event[0] == 'end':
+                assert stack.pop() == event[1]
+        assert stack == []
+
+    def test_picks_article_body_not_wrapper(self, backend):
+        """Verifica que gana el bloque de párrafos y no el wrapper ni los enlaces."""
+        content = html_parsers.find_main_content(html_parsers.parse_html(CONTENT_HTML, backend))
+
+        assert 'body' in str(content.get('class'))
+        assert content.get_text(strip=True).startswith('Conquest season')
+
+    def test_line_divs_group_into_container(self, backend):
+        """Verifica contenido escrito como una línea por <div>."""
+        html = ('<html><body><div class="wrap"><div class="content">'
+                + ''.join(f'<div>Line {i} of the maintenance notice text.</div>' for i in range(10))
+                + '</div><div class="footer">Footer</div></div></body></html>')
+        content = html_parsers.find_main_content(html_parsers.parse_html(html, backend))
+
+        assert 'content' in str(content.get('class'))
+
+    def test_short_page_returns_none(self, backend):
+        """Verifica que sin bloques suficientemente largos no hay contenido."""
+        doc = html_parsers.parse_html('<html><body><div>Corto</div></body></html>', backend)
+        assert html_parsers.find_main_content(doc, min_chars=200) is None
+
+
+class TestBackendSelection:
+    """Tests para la selección de backend."""
+
+    def test_unavailable_backend_falls_back(self):
+        """Verifica que un backend no instalado cae al siguiente disponible."""
+        class Missing:
+            name = 'missing'
+
+            def __init__(self):
+                raise ImportError("no instalado")
+
+        with patch.dict(html_parsers.BACKENDS, {'missing': Missing}), \
+             patch.dict(html_parsers._backends, clear=True):
+            backend = html_parsers.get_backend('missing')
+
+        assert backend.name in BACKENDS
@@ -0,0 +1,112 @@
+"""
+Tests unitarios para la capa HTTP compartida (http_client).
+
+Ejecutar con: pytest tests/ -v
+"""
+
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import http_client
+
+
+def make_response(status_code, headers=None):
+    """Crea una respuesta HTTP simulada."""
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+@pytest.fixture(autouse=True)
+def no_sleep():
+    """Evita esperas reales durante el backoff."""
+    with patch('http_client.time.sleep') as mock_sleep:
+        yield mock_sleep
+
+
+class TestSessions:
+    """Tests para el pool de sesiones por host."""
+
+    def test_session_reused_per_host(self):
+        """Verifica que cada host conserva su sesión entre llamadas."""
+        forum = http_client.get_session(http_client.FORUM_HOST)
+        assert http_client.get_session(http_client.FORUM_HOST) is forum
+        assert http_client.get_session(http_client.DISCORD_HOST) is not forum
+
+    def test_default_timeout_per_host(self):
+        """Verifica que toda llamada lleva timeout aunque no se indique."""
+        session = http_client.get_session(http_client.DISCORD_HOST)
+        with patch.object(session, 'request', return_value=make_response(200)) as mock_request:
+            http_client.post("https://discord.com/api/v10/channels/1/messages", json={})
+
+        assert mock_request.call_args.kwargs['timeout'] == http_client.HOST_TIMEOUTS[http_client.DISCORD_HOST]
+
+
+class TestRetries:
+    """Tests para los reintentos con backoff."""
+
+    def test_get_retries_transient_status(self, no_sleep):
+        """Verifica que un GET reintenta ante 503 y devuelve el 200."""
+        session = http_client.get_session(http_client.FORUM_HOST)
+        responses = [make_response(503), make_response(200)]
+        with patch.object(session, 'request', side_effect=responses) as mock_request:
+            response = http_client.get("https://forum.mir4global.com/board/notice")
+
+        assert response.status_code == 200
+        assert mock_request.call_count == 2
+        assert no_sleep.call_count == 1
+
+    def test_get_retries_connection_error(self):
+        """Verifica que un GET reintenta ante errores de red."""
+        session = http_client.get_session(http_client.FORUM_HOST)
+        side_effect = [requests.exceptions.ConnectionError("reset"), make_response(200)]
+        with patch.object(session, 'request', side_effect=side_effect):
+            response = http_client.get("https://forum.mir4global.com/board/notice")
+
+        assert response.status_code == 200
+
+    def test_gives_up_after_max_retries(self):
+        """Verifica que tras agotar reintentos se devuelve la última respuesta."""
+        session = http_client.get_session(http_client.FORUM_HOST)
+        with patch.object(session, 'request', return_value=make_response(502)) as mock_request:
+            response = http_client.get("https://forum.mir4global.com/board/notice")
+
+        assert response.status_code == 502
+        assert mock_request.call_count == http_client.MAX_RETRIES + 1
+
+    def test_post_not_retried_on_server_error(self):
+        """Verifica que un POST no se reintenta ante 5xx (evita duplicados)."""
+        session = http_client.get_session(http_client.DISCORD_HOST)
+        with patch.object(session, 'request', return_value=make_response(500)) as mock_request:
+            response = http_client.post("https://discord.com/api/v10/channels/1/messages", json={})
+
+        assert response.status_code == 500
+        assert mock_request.call_count == 1
+
+    def test_post_honors_retry_after(self, no_sleep):
+        """Verifica que un 429 en POST espera Retry-After y reintenta."""
+        session = http_client.get_session(http_client.DISCORD_HOST)
+        responses = [make_response(429, {'Retry-After': '1.5'}), make_response(200)]
+        with patch.object(session, 'request', side_effect=responses):
+            response = http_client.post("https://discord.com/api/v10/channels/1/messages", json={})
+
+        assert response.status_code == 200
+        no_sleep.assert_called_once_with(1.5)
+
+    def test_long_retry_after_returned_without_retry(self, no_sleep):
+        """Verifica que un Retry-After mayor a BACKOFF_MAX no se reintenta antes de tiempo."""
+        session = http_client.get_session(http_client.DISCORD_HOST)
+        with patch.object(session, 'request', return_value=make_response(429, {'Retry-After': '30'})) as mock_request:
+            response = http_client.post("https://discord.com/api/v10/channels/1/messages", json={})
+
+        assert response.status_code == 429
+        assert mock_request.call_count == 1
+        no_sleep.assert_not_called()
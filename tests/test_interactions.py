@@ -0,0 +1,172 @@
+"""
+Tests del handler de interacciones (interactions.py).
+
+Ejecutar con: pytest tests/ -v
+"""
+
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import interactions
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Presupuesto para importar el handler en frío (Discord da 3 s en total)
+IMPORT_BUDGET_SECONDS = 0.5
+
+HEAVY_MODULES = ['core_logic', 'lambda_function', 'bs4', 'lxml', 'newspaper', 'googletrans',
+                 'requests', 'boto3']
+
+
+def run_isolated(code):
+    """Ejecuta código en un intérprete nuevo (arranque en frío) y devuelve su salida JSON."""
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def interaction_event(body):
+    return {'headers': {}, 'body': json.dumps(body)}
+
+
+class TestColdStart:
+    """Tests para el arranque en frío del handler de interacciones."""
+
+    def test_import_within_budget(self):
+        """Verifica que importar el handler entra en el presupuesto de tiempo."""
+        elapsed = run_isolated(
+            "import json, time\n"
+            "start = time.perf_counter()\n"
+            "import interactions\n"
+            "print(json.dumps(time.perf_counter() - start))\n"
+        )
+        assert elapsed < IMPORT_BUDGET_SECONDS
+
+    def test_ping_does_not_load_heavy_stack(self):
+        """Verifica que un PING no carga scraping, traducción ni boto3."""
+        loaded = run_isolated(
+            "import json, sys\n"
+            "import interactions\n"
+            "interactions.verify_signature = lambda event: True\n"
+            "response = interactions.lambda_handler_interactions("
+            "{'headers': {}, 'body': json.dumps({'type': 1})}, None)\n"
+            "assert response == {'type': 1}\n"
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+        )
+        assert loaded == []
+
+
+class TestWorkerInvocation:
+    """Tests para la delegación al worker asíncrono."""
+
+    @pytest.fixture(autouse=True)
+    def lambda_client(self):
+        client = MagicMock()
+        with patch.object(interactions, '_lambda_client', client), \
+             patch.object(interactions, 'verify_signature', return_value=True):
+            yield client
+
+    def test_command_invokes_worker_function(self, lambda_client):
+        """Verifica que /verificar-* invoca a WorkerFunction y responde type 5."""
+        body = {'type': 2, 'id': '42', 'token': 't', 'application_id': 'app',
+                'data': {'name': 'verificar-parche'}}
+        context = MagicMock(function_name='interactions')
+
+        with patch.dict(os.environ, {'WORKER_FUNCTION_NAME': 'worker'}):
+            response = interactions.lambda_handler_interactions(interaction_event(body), context)
+
+        assert response['type'] == 5
+        kwargs = lambda_client.invoke.call_args.kwargs
+        assert kwargs['FunctionName'] == 'worker'
+        assert json.loads(kwargs['Payload'])['tag'] == 'patch note'
+
+    def test_falls_back_to_own_function(self, lambda_client):
+        """Verifica que sin WORKER_FUNCTION_NAME se invoca a sí misma."""
+        context = MagicMock(function_name='interactions')
+
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop('WORKER_FUNCTION_NAME', None)
+            interactions.invoke_worker({'type': 'async_worker'}, context)
+
+        assert lambda_client.invoke.call_args.kwargs['FunctionName'] == 'interactions'
+
+
+class TestButtonClick:
+    """Tests para la respuesta rápida de los botones de traducción."""
+
+    def test_cached_translation_answers_immediately(self):
+        """Verifica que una traducción cacheada responde con type 7 y conserva el link."""
+        db = MagicMock()
+        db.get_cached_translation.return_value = {
+            'original': 'Resumen', 'translations': {'es': 'x' * 3000},
+            'metadata': {'link': 'https://forum.mir4global.com/board/1'}
+        }
+        body = {'type': 3, 'data': {'custom_id': 'translate_es_abc'}}
+
+        with patch.object(interactions, 'get_db', return_value=db), \
+             patch.object(interactions, 'invoke_worker') as mock_invoke:
+            response = interactions.handle_button_click(body, None)
+
+        mock_invoke.assert_not_called()
+        assert response['type'] == 7
+        content = response['data']['content']
+        assert len(content) <= interactions.DISCORD_MESSAGE_LIMIT
+        assert content.endswith('🔗 https://forum.mir4global.com/board/1')
+
+    def test_translation_shared_across_messages(self):
+        """Verifica que el mismo texto traducido para otro mensaje responde al instante."""
+        db = MagicMock()
+        db.get_cached_translation.return_value = {'original': 'Resumen', 'translations': {}, 'metadata': {}}
+        db.get_translation.return_value = 'Resumo'
+        body = {'type': 3, 'data': {'custom_id': 'translate_pt_abc'}}
+
+        with patch.object(interactions, 'get_db', return_value=db), \
+             patch.object(interactions, 'invoke_worker') as mock_invoke:
+            response = interactions.handle_button_click(body, None)
+
+        mock_invoke.assert_not_called()
+        db.get_translation.assert_called_once_with('Resumen', 'pt')
+        assert response['type'] == 7
+        assert 'Resumo' in response['data']['content']
+
+
+class TestBotStatus:
+    """Tests para /estado-bot."""
+
+    def test_disabled_channel_reported(self):
+        """Verifica que /estado-bot avisa que el canal del servidor fue deshabilitado."""
+        db = MagicMock()
+        db.get_channels.return_value = {
+            '1': {'channel_id': 10, 'failure_count': 3, 'disabled': True},
+            '2': {'channel_id': 20, 'failure_count': 0, 'disabled': False},
+        }
+        db.get_last_post_info.return_value = None
+
+        with patch.object(interactions, 'get_db', return_value=db):
+            response = interactions.handle_command({'guild_id': '1', 'data': {'name': 'estado-bot'}}, None)
+
+        content = response['data']['content']
+        assert '🚫 Canal <#10> deshabilitado' in content
+        assert 'Canales activos: 1 (1 deshabilitados)' in content
+
+
+class TestFormatTranslation:
+    """Tests para el armado del mensaje traducido."""
+
+    def test_digest_links_kept(self):
+        """Verifica que la traducción de un resumen conserva los links de todos sus posts."""
+        links = ['https://forum.mir4global.com/board/1', 'https://forum.mir4global.com/board/2']
+
+        content = interactions.format_translation('es', 'x' * 3000, {'links': links})
+
+        assert len(content) <= interactions.DISCORD_MESSAGE_LIMIT
+        assert content.endswith('🔗 ' + links[0] + '\n🔗 ' + links[1])
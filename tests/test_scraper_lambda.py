@@ -0,0 +1,558 @@
+"""
+Tests de los handlers del scraper (lambda_handler_scraper) y del worker asíncrono.
+
+Ejecutar con: pytest tests/ -v
+"""
+
+import json
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault('DISCORD_TOKEN', 'mock_token')
+
+with patch('boto3.resource'):
+    import lambda_function
+    import delivery_queue
+    import fanout
+    from database import DatabaseAdapter
+
+SUMMARY = {'text': 'Resumen', 'bullets': 'Resumen', 'content_hash': 'abc', 'etag': None, 'last_modified': None}
+
+
+@pytest.fixture
+def db():
+    """DatabaseAdapter con DynamoDB simulado."""
+    mock_db = MagicMock()
+    mock_db.get_channels.return_value = {'123': {'channel_id': 999, 'failure_count': 0, 'disabled': False}}
+    mock_db.enabled_channels.side_effect = DatabaseAdapter.enabled_channels
+    mock_db.get_last_post.return_value = None
+    mock_db.get_board_state.return_value = {'etag': None, 'last_modified': None, 'seen': []}
+    mock_db.get_article_cache.return_value = None
+    mock_db.is_article_fresh.side_effect = DatabaseAdapter.is_article_fresh
+    mock_db.get_translations.return_value = {}
+    mock_db.lookup_translations.return_value = {}
+    mock_db.get_translation.return_value = None
+    mock_db.get_delivered_channels.return_value = set()
+    with patch.object(lambda_function, 'db', mock_db), \
+         patch.object(delivery_queue, '_queue', delivery_queue.MemoryQueue()):
+        yield mock_db
+
+
+def discord_posts(respond=None):
+    """Simula el envío por canal de fanout; `respond(channel_id, payload)` da el resultado."""
+    def post(channel_id, body, headers, rate_limiter=None):
+        if respond:
+            return respond(channel_id, json.loads(body))
+        return {'channel_id': channel_id, 'ok': True, 'status': 200}
+    return patch.object(fanout, 'post_channel_message', side_effect=post)
+
+
+def board_link(tag, n=1):
+    return f"https://forum.mir4global.com/{tag.replace(' ', '')}/{n}"
+
+
+def single_post(tag, seen_links, validators=None):
+    """Listado simulado con un único post nuevo por tag."""
+    link = board_link(tag)
+    if link in seen_links:
+        return [], [link]
+    return [(f"Titulo {tag}", link)], [link]
+
+
+def saved_seen(db, tag):
+    """Último set de vistos guardado para un tag."""
+    calls = [c for c in db.update_board_state.call_args_list if c.args[0] == tag and 'seen' in c.kwargs]
+    return calls[-1].kwargs['seen'] if calls else None
+
+
+class TestConcurrentScraper:
+    """Tests para el scraping concurrente de tags."""
+
+    def test_tags_run_in_parallel(self, db):
+        """Verifica que el tiempo total es el del tag más lento, no la suma."""
+        def slow_board(tag, seen_links, validators=None):
+            time.sleep(0.3)
+            return single_post(tag, seen_links)
+
+        with patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=slow_board), \
+             patch.object(lambda_function, 'fetch_article_summary', return_value=SUMMARY), \
+             discord_posts() as mock_send:
+            start = time.monotonic()
+            result = lambda_function.lambda_handler_scraper({}, None)
+            elapsed = time.monotonic() - start
+
+        assert result['statusCode'] == 200
+        assert elapsed < 0.8
+        assert mock_send.call_count == 3
+        updated = {c.args[0] for c in db.set_last_post.call_args_list}
+        assert updated == {'patch note', 'notice', 'event'}
+
+    def test_failed_tag_does_not_block_others(self, db):
+        """Verifica que un error en un tag no impide actualizar los demás."""
+        def flaky_board(tag, seen_links, validators=None):
+            if tag == 'notice':
+                raise RuntimeError("boom")
+            return single_post(tag, seen_links)
+
+        with patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=flaky_board), \
+             patch.object(lambda_function, 'fetch_article_summary', return_value=SUMMARY), \
+             discord_posts():
+            lambda_function.lambda_handler_scraper({}, None)
+
+        updated = {c.args[0] for c in db.set_last_post.call_args_list}
+        assert updated == {'patch note', 'event'}
+
+    def test_seen_post_is_skipped(self, db):
+        """Verifica que un post ya visto no se reenvía ni actualiza estado."""
+        db.get_board_state.side_effect = lambda tag: {
+            'etag': None, 'last_modified': None, 'seen': [board_link(tag)]
+        }
+
+        with patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=single_post), \
+             patch.object(lambda_function, 'fetch_article_summary') as mock_extract, \
+             discord_posts() as mock_send:
+            lambda_function.lambda_handler_scraper({}, None)
+
+        mock_extract.assert_not_called()
+        mock_send.assert_not_called()
+        db.set_last_post.assert_not_called()
+        db.update_board_state.assert_not_called()
+
+
+class TestConditionalPolling:
+    """Tests para el polling condicional con ETag/Last-Modified."""
+
+    def test_not_modified_skips_processing(self, db):
+        """Verifica que un 304 no procesa ni reescribe el estado."""
+        with patch.object(lambda_function, 'get_new_posts_by_tag',
+                          return_value=lambda_function.NOT_MODIFIED), \
+             patch.object(lambda_function, 'fetch_article_summary') as mock_extract:
+            lambda_function.lambda_handler_scraper({}, None)
+
+        mock_extract.assert_not_called()
+        db.set_last_post.assert_not_called()
+        db.update_board_state.assert_not_called()
+
+    def test_new_validators_saved_after_publish(self, db):
+        """Verifica que los validadores nuevos se guardan por tablero."""
+        def board_with_etag(tag, seen_links, validators=None):
+            validators['etag'] = f'"{tag}-v2"'
+            return single_post(tag, seen_links)
+
+        with patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=board_with_etag), \
+             patch.object(lambda_function, 'fetch_article_summary', return_value=SUMMARY), \
+             discord_posts():
+            lambda_function.lambda_handler_scraper({}, None)
+
+        saved = {c.args[0]: c.kwargs['etag'] for c in db.update_board_state.call_args_list if 'etag' in c.kwargs}
+        assert saved == {tag: f'"{tag}-v2"' for tag in lambda_function.SCRAPER_TAGS}
+
+
+class TestBoardDiff:
+    """Tests para el envío de todos los posts nuevos desde la última ejecución."""
+
+    def test_burst_is_published_in_order(self, db):
+        """Verifica que varios posts nuevos se publican del más viejo al más nuevo."""
+        burst = [("Parche 1", board_link('patch note', 1)), ("Parche 2", board_link('patch note', 2))]
+        page = [board_link('patch note', 2), board_link('patch note', 1), board_link('patch note', 0)]
+
+        def board(tag, seen_links, validators=None):
+            return (burst, page) if tag == 'patch note' else ([], [])
+
+        with patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=board), \
+             patch.object(lambda_function, 'fetch_article_summary', return_value=SUMMARY), \
+             discord_posts():
+            lambda_function.lambda_handler_scraper({}, None)
+
+        published = [c.args[1] for c in db.set_last_post.call_args_list]
+        assert published == [board_link('patch note', 1), board_link('patch note', 2)]
+        assert set(saved_seen(db, 'patch note')) == set(page)
+
+    def test_failed_send_retried_from_queue(self, db):
+        """Verifica que un envío fallido se reintenta desde la cola sin reenviar los demás."""
+        burst = [("Parche 1", board_link('patch note', 1)), ("Parche 2", board_link('patch note', 2))]
+        sent = []
+
+        def board(tag, seen_links, validators=None):
+            return (burst, [l for _, l in burst]) if tag == 'patch note' else ([], [])
+
+        def send(channel_id, payload):
+            content = payload['content']
+            if "Parche 2" in content:
+                return {'channel_id': channel_id, 'ok': False, 'status': None, 'error_kind': 'connect'}
+            sent.append(content)
+            return {'channel_id': channel_id, 'ok': True}
+
+        with patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=board), \
+             patch.object(lambda_function, 'fetch_article_summary', return_value=SUMMARY), \
+             discord_posts(send) as mock_send:
+            lambda_function.lambda_handler_scraper({}, None)
+
+        assert len(sent) == 1
+        assert mock_send.call_count == 1 + delivery_queue.MAX_DELIVERY_ATTEMPTS
+        assert saved_seen(db, 'patch note') == [board_link('patch note', 1), board_link('patch note', 2)]
+
+    def test_possibly_sent_failure_not_retried(self, db):
+        """Verifica que un 5xx (Discord pudo crear el mensaje) no se reenvía."""
+        with patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=single_post), \
+             patch.object(lambda_function, 'fetch_article_summary', return_value=SUMMARY), \
+             discord_posts(lambda cid, payload: {'channel_id': cid, 'ok': False, 'status': 502,
+                                                 'error_kind': 'http'}) as mock_send:
+            lambda_function.lambda_handler_scraper({}, None)
+
+        assert mock_send.call_count == 3
+
+    def test_legacy_last_post_seeds_seen_set(self, db):
+        """Verifica la migración desde last_post_{tag}."""
+        db.get_last_post.side_effect = lambda tag: board_link(tag, 7)
+
+        with patch.object(lambda_function, 'get_new_posts_by_tag', return_value=([], [])) as mock_board:
+            lambda_function.lambda_handler_scraper({}, None)
+
+        seen_args = {c.args[0]: c.args[1] for c in mock_board.call_args_list}
+        assert seen_args['event'] == [board_link('event', 7)]
+
+    def test_seen_set_is_bounded(self):
+        """Verifica que el set de vistos no crece sin límite."""
+        seen = [f"link{i}" for i in range(lambda_function.SEEN_LINKS_MAX)]
+        merged = lambda_function.remember_links(seen, ["link3", "nuevo"])
+
+        assert len(merged) == lambda_function.SEEN_LINKS_MAX
+        assert merged[-2:] == ["link3", "nuevo"]
+        assert "link0" not in merged
+
+
+class TestArticleCache:
+    """Tests para la cache de artículos en el scraper y el worker."""
+
+    def test_failed_revalidation_uses_stale_entry(self, db):
+        """Verifica que si el foro falla al revalidar se muestra el resumen cacheado."""
+        stale = {'text': 'Cacheado', 'bullets': '• Cacheado', 'fresh_until': time.time() - 60}
+        db.get_article_cache.return_value = stale
+        failed = {'text': lambda_function.EXTRACTION_ERROR, 'bullets': lambda_function.EXTRACTION_ERROR}
+
+        with patch.object(lambda_function, 'fetch_article_summary', return_value=failed):
+            assert lambda_function.get_article_summary('https://forum.mir4global.com/a') == ('Cacheado', '• Cacheado')
+
+        db.set_article_cache.assert_not_called()
+        db.touch_article_cache.assert_not_called()
+
+    def test_fresh_cache_skips_download(self, db):
+        """Verifica que un artículo cacheado y fresco no se descarga."""
+        db.get_article_cache.return_value = {'text': 'Cacheado', 'bullets': '• Cacheado', 'fresh_until': time.time() + 60}
+
+        with patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=single_post), \
+             patch.object(lambda_function, 'fetch_article_summary') as mock_fetch, \
+             discord_posts() as mock_send:
+            lambda_function.lambda_handler_scraper({}, None)
+
+        mock_fetch.assert_not_called()
+        assert '• Cacheado' in json.loads(mock_send.call_args.args[1])['content']
+
+    def test_downloaded_summary_is_cached(self, db):
+        """Verifica que el resumen descargado se guarda en la cache."""
+        with patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=single_post), \
+             patch.object(lambda_function, 'fetch_article_summary', return_value=SUMMARY), \
+             discord_posts():
+            lambda_function.lambda_handler_scraper({}, None)
+
+        cached_links = {c.args[0] for c in db.set_article_cache.call_args_list}
+        assert cached_links == {board_link(tag) for tag in lambda_function.SCRAPER_TAGS}
+
+    def test_stale_entry_revalidated(self, db):
+        """Verifica que una entrada vencida con 304 se reutiliza y se renueva."""
+        stale = {'text': 'Viejo', 'bullets': '• Viejo', 'etag': '"a"', 'fresh_until': 0}
+        db.get_article_cache.return_value = stale
+
+        with patch.object(lambda_function, 'fetch_article_summary', return_value=lambda_function.NOT_MODIFIED) as mock_fetch:
+            texto, bullets = lambda_function.get_article_summary("https://forum.mir4global.com/board/1")
+
+        assert bullets == '• Viejo'
+        mock_fetch.assert_called_once_with("https://forum.mir4global.com/board/1", stale)
+        db.touch_article_cache.assert_called_once()
+
+    def test_extraction_errors_not_cached(self, db):
+        """Verifica que los errores de extracción no se guardan en la cache."""
+        error = dict(SUMMARY, text=lambda_function.EXTRACTION_ERROR)
+        with patch.object(lambda_function, 'fetch_article_summary', return_value=error):
+            lambda_function.get_article_summary("https://forum.mir4global.com/board/1")
+
+        db.set_article_cache.assert_not_called()
+
+
+class TestPretranslation:
+    """Tests para la pre-traducción de resúmenes en el scraper."""
+
+    @pytest.fixture(autouse=True)
+    def enabled(self):
+        with patch.object(lambda_function, 'PRETRANSLATE_SUMMARIES', True):
+            yield
+
+    def test_translations_cached_before_publish(self, db):
+        """Verifica que cada resumen se cachea ya traducido a los tres idiomas."""
+        with patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=single_post), \
+             patch.object(lambda_function, 'fetch_article_summary', return_value=SUMMARY), \
+             patch.object(lambda_function, 'translate_text', side_effect=lambda text, dest: f"{dest}:{text}"), \
+             discord_posts():
+            lambda_function.lambda_handler_scraper({}, None)
+
+        assert db.cache_translation.call_count == 3
+        for call in db.cache_translation.call_args_list:
+            assert call.args[2] == {'es': 'es:Resumen', 'pt': 'pt:Resumen', 'zh': 'zh-cn:Resumen'}
+            assert call.kwargs['metadata']['link'].startswith('https://forum.mir4global.com/')
+
+    def test_languages_translated_in_parallel(self, db):
+        """Verifica que los idiomas se traducen a la vez y no en serie."""
+        def slow_translate(text, dest):
+            time.sleep(0.2)
+            return text
+
+        board = lambda tag, seen_links, validators=None: single_post(tag, seen_links) if tag == 'event' else ([], [])
+
+        with patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=board), \
+             patch.object(lambda_function, 'fetch_article_summary', return_value=SUMMARY), \
+             patch.object(lambda_function, 'translate_text', side_effect=slow_translate), \
+             discord_posts():
+            start = time.monotonic()
+            lambda_function.lambda_handler_scraper({}, None)
+            elapsed = time.monotonic() - start
+
+        assert elapsed < 0.5
+
+    def test_failed_language_left_for_click(self, db):
+        """Verifica que un idioma que falla no bloquea la publicación."""
+        def flaky_translate(text, dest):
+            if dest == 'pt':
+                raise RuntimeError("429")
+            return text
+
+        with patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=single_post), \
+             patch.object(lambda_function, 'fetch_article_summary', return_value=SUMMARY), \
+             patch.object(lambda_function, 'translate_text', side_effect=flaky_translate), \
+             discord_posts() as mock_send:
+            lambda_function.lambda_handler_scraper({}, None)
+
+        assert mock_send.call_count == 3
+        assert set(db.cache_translation.call_args.args[2]) == {'es', 'zh'}
+
+    def test_known_translations_not_requested(self, db):
+        """Verifica que solo se traducen los idiomas que no están en la cache por contenido."""
+        db.get_translations.return_value = {'es': 'Resumen ES', 'zh': 'Resumen ZH'}
+        board = lambda tag, seen_links, validators=None: single_post(tag, seen_links) if tag == 'event' else ([], [])
+
+        with patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=board), \
+             patch.object(lambda_function, 'fetch_article_summary', return_value=SUMMARY), \
+             patch.object(lambda_function, 'translate_text', return_value='Resumo') as mock_translate, \
+             discord_posts():
+            lambda_function.lambda_handler_scraper({}, None)
+
+        assert [c.args[1] for c in mock_translate.call_args_list] == ['pt']
+        db.store_translations.assert_any_call({('Resumen', 'pt'): 'Resumo'})
+        assert db.cache_translation.call_args.args[2] == {'es': 'Resumen ES', 'pt': 'Resumo', 'zh': 'Resumen ZH'}
+
+
+class TestTranslateWorker:
+    """Tests para la rama de traducción del worker asíncrono."""
+
+    def test_message_cache_updated_in_one_call(self, db):
+        """Verifica que el cache del mensaje se actualiza con un solo UpdateItem."""
+        db.get_translation.return_value = 'Resumo'
+        db.set_cached_translation.return_value = {
+            'original': 'Resumen', 'translations': {'pt': 'Resumo'},
+            'metadata': {'link': 'https://forum.mir4global.com/board/1'}
+        }
+        payload = {'type': 'async_worker', 'action': 'translate', 'lang': 'pt', 'message_id': 'abc',
+                   'application_id': 'app', 'token': 't', 'original_content': 'Resumen'}
+
+        with patch.object(lambda_function.http_client, 'patch') as mock_patch:
+            result = lambda_function.handle_async_worker(payload)
+
+        assert result['statusCode'] == 200
+        db.set_cached_translation.assert_called_once_with('abc', 'pt', 'Resumo')
+        db.get_cached_translation.assert_not_called()
+        db.cache_translation.assert_not_called()
+        assert mock_patch.call_args.kwargs['json']['content'].endswith('🔗 https://forum.mir4global.com/board/1')
+
+    def test_duplicate_delivery_dropped(self, db):
+        """Verifica que una reentrega del mismo evento no vuelve a procesarse."""
+        db.acquire_lease.side_effect = lambda name, owner, seconds: not name.startswith('worker_')
+        db.get_lease.return_value = {'owner': 'otro', 'expires_at': time.time() + 60, 'result': {'statusCode': 200}}
+        payload = {'type': 'async_worker', 'action': 'translate', 'lang': 'pt', 'message_id': 'abc',
+                   'interaction_id': '99', 'application_id': 'app', 'token': 't', 'original_content': 'Resumen'}
+
+        with patch.object(lambda_function.http_client, 'patch') as mock_patch:
+            result = lambda_function.handle_async_worker(payload)
+
+        assert result['body'] == 'Duplicate'
+        mock_patch.assert_not_called()
+        db.get_translation.assert_not_called()
+
+    def test_follower_reuses_translation(self, db):
+        """Verifica que un worker que llega tarde reutiliza la traducción del primero."""
+        db.acquire_lease.side_effect = lambda name, owner, seconds: name.startswith('worker_')
+        db.get_lease.return_value = {'owner': 'otro', 'expires_at': time.time() + 60, 'result': 'Resumo'}
+        payload = {'type': 'async_worker', 'action': 'translate', 'lang': 'pt', 'message_id': 'abc',
+                   'interaction_id': '100', 'application_id': 'app', 'token': 't', 'original_content': 'Resumen'}
+
+        with patch.object(lambda_function, 'translate_text') as mock_translate, \
+             patch.object(lambda_function.http_client, 'patch') as mock_patch:
+            lambda_function.handle_async_worker(payload)
+
+        mock_translate.assert_not_called()
+        db.get_translation.assert_not_called()
+        assert 'Resumo' in mock_patch.call_args.kwargs['json']['content']
+
+
+class TestCommandWorker:
+    """Tests para la rama de comandos del worker asíncrono."""
+
+    def test_forum_failure_not_shared(self, db):
+        """Verifica que tras un fallo del foro el siguiente comando vuelve a consultarlo."""
+        leases = {}
+
+        def acquire(name, owner, seconds):
+            if name in leases:
+                return False
+            leases[name] = {'owner': owner}
+            return True
+
+        def complete(name, owner, result, keep_seconds):
+            leases[name] = {'owner': owner, 'result': result}
+
+        db.acquire_lease.side_effect = acquire
+        db.complete_lease.side_effect = complete
+        db.release_lease.side_effect = lambda name, owner: leases.pop(name, None)
+        db.get_lease.side_effect = leases.get
+        payload = {'type': 'async_worker', 'command': 'parche', 'tag': 'patch notes',
+                   'application_id': 'app', 'token': 't', 'interaction_id': None}
+        posts = [None, ('Titulo', board_link('patch notes'))]
+
+        with patch.object(lambda_function, 'get_latest_post_by_tag', side_effect=posts) as mock_board, \
+             patch.object(lambda_function, 'get_article_summary', return_value=('Resumen', 'Resumen')), \
+             patch.object(lambda_function.http_client, 'patch') as mock_patch:
+            lambda_function.handle_async_worker(payload)
+            lambda_function.handle_async_worker(payload)
+
+        assert mock_board.call_count == 2
+        contents = [c.kwargs['json']['content'] for c in mock_patch.call_args_list]
+        assert contents[0].startswith('❌') and '**Titulo**' in contents[1]
+
+
+class TestDigestMode:
+    """Tests para el modo resumen (un mensaje por canal y ejecución)."""
+
+    @pytest.fixture(autouse=True)
+    def enabled(self):
+        with patch.object(lambda_function, 'DIGEST_MODE', True):
+            yield
+
+    def test_posts_combined_into_one_message(self, db):
+        """Verifica que los posts de todos los tags llegan en un solo mensaje."""
+        with patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=single_post), \
+             patch.object(lambda_function, 'fetch_article_summary', return_value=SUMMARY), \
+             discord_posts() as mock_send:
+            lambda_function.lambda_handler_scraper({}, None)
+
+        assert mock_send.call_count == 1
+        content = json.loads(mock_send.call_args.args[1])['content']
+        for tag in lambda_function.SCRAPER_TAGS:
+            assert f"Titulo {tag}" in content
+            assert saved_seen(db, tag) == [board_link(tag)]
+        assert {c.args[0] for c in db.set_last_post.call_args_list} == set(lambda_function.SCRAPER_TAGS)
+
+    def test_digest_translations_built_from_posts(self, db):
+        """Verifica que el resumen se cachea ya traducido si cada post lo está."""
+        with patch.object(lambda_function, 'PRETRANSLATE_SUMMARIES', True), \
+             patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=single_post), \
+             patch.object(lambda_function, 'fetch_article_summary', return_value=SUMMARY), \
+             patch.object(lambda_function, 'translate_text', side_effect=lambda text, dest: f"{dest}:{text}"), \
+             discord_posts():
+            lambda_function.lambda_handler_scraper({}, None)
+
+        db.cache_translation.assert_called_once()
+        _, original, translations = db.cache_translation.call_args.args
+        assert original == "Resumen\n\nResumen\n\nResumen"
+        assert translations['pt'] == "pt:Resumen\n\npt:Resumen\n\npt:Resumen"
+        assert len(db.cache_translation.call_args.kwargs['metadata']['links']) == 3
+
+    def test_failed_digest_keeps_posts_unseen(self, db):
+        """Verifica que si el resumen no se encola, los posts se reintentan en la próxima ejecución."""
+        with patch.object(lambda_function, 'get_new_posts_by_tag', side_effect=single_post), \
+             patch.object(lambda_function, 'fetch_article_summary', return_value=SUMMARY), \
+             patch.object(lambda_function, 'enqueue_delivery', side_effect=RuntimeError("SQS caído")):
+            lambda_function.lambda_handler_scraper({}, None)
+
+        db.update_board_state.assert_not_called()
+
+    def test_long_digest_split_within_limit(self):
+        """Verifica que un resumen largo se parte en mensajes dentro del límite de Discord."""
+        entries = [('event', {'titulo': f"Evento {i}", 'link': board_link('event', i), 'resumen_bullets': 'x' * 700})
+                   for i in range(5)]
+        entries.append(('notice', {'titulo': "Enorme", 'link': board_link('notice'), 'resumen_bullets': 'y' * 5000}))
+
+        messages = lambda_function.render_digest(entries)
+
+        assert all(len(content) <= lambda_function.DISCORD_MESSAGE_LIMIT for content, _ in messages)
+        assert [post for _, group in messages for post in group] == entries
+        assert len(messages) == 4
+
+    def test_long_title_clamped(self):
+        """Verifica que un título enorme tampoco pasa el límite de Discord."""
+        entries = [('event', {'titulo': 't' * 2100, 'link': board_link('event'), 'resumen_bullets': 'Resumen'})]
+
+        (content, _), = lambda_function.render_digest(entries)
+
+        assert len(content) <= lambda_function.DISCORD_MESSAGE_LIMIT
+
+
+class TestDeliveryHandler:
+    """Tests para el handler de la cola de envíos (DeliveryFunction)."""
+
+    def test_bad_record_reported_alone(self, db):
+        """Verifica que solo el mensaje que falla se reporta a SQS como fallido."""
+        job = delivery_queue.make_jobs(['1', '2'], {'content': 'hola', 'components': []})[0]
+        event = {'Records': [
+            {'messageId': 'm1', 'body': json.dumps(job)},
+            {'messageId': 'm2', 'body': 'no es json'},
+        ]}
+
+        with discord_posts() as mock_send:
+            result = lambda_function.lambda_handler_delivery(event, None)
+
+        assert result == {'batchItemFailures': [{'itemIdentifier': 'm2'}]}
+        assert mock_send.call_count == 2
+
+    def test_redelivered_job_skips_delivered_channels(self, db):
+        """Verifica que un trabajo reentregado no reenvía a los canales ya entregados."""
+        job = delivery_queue.make_jobs(['1', '2'], {'content': 'hola', 'components': []},
+                                       meta={'message_id': 'abc'})[0]
+        db.get_delivered_channels.return_value = {'1'}
+
+        with discord_posts() as mock_send:
+            lambda_function.lambda_handler_delivery({'Records': [{'messageId': 'm1', 'body': json.dumps(job)}]}, None)
+
+        assert [c.args[0] for c in mock_send.call_args_list] == ['2']
+        db.record_delivery.assert_called_once_with('abc', '2')
+
+    def test_channel_outcomes_tracked(self, db):
+        """Verifica que los 403 suman fallos y un canal que se recupera se reinicia."""
+        job = delivery_queue.make_jobs([10, 20, 30], {'content': 'hola', 'components': []},
+                                       guilds={10: 'a', 20: 'b', 30: 'c'}, failing=[20])[0]
+        outcomes = {10: (False, 403), 20: (True, 200), 30: (True, 200)}
+
+        def send(cid, payload):
+            ok, status = outcomes[cid]
+            return {'channel_id': cid, 'ok': ok, 'status': status}
+
+        with discord_posts(send):
+            lambda_function.lambda_handler_delivery({'Records': [{'messageId': 'm1', 'body': json.dumps(job)}]}, None)
+
+        db.record_channel_failure.assert_called_once_with('a', 10, 403)
+        db.reset_channel_failures.assert_called_once_with('b', 20)
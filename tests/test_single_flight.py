@@ -0,0 +1,110 @@
+"""
+Tests unitarios para el single-flight de workers (single_flight.py).
+
+Ejecutar con: pytest tests/ -v
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import single_flight
+from single_flight import SingleFlightTimeout, run_once
+
+
+class FakeLeases:
+    """Leases en memoria con la misma semántica condicional que DynamoDB."""
+
+    def __init__(self):
+        self.items = {}
+        self.lock = threading.Lock()
+
+    def acquire_lease(self, name, owner, seconds):
+        with self.lock:
+            item = self.items.get(name)
+            if item and item['expires_at'] >= time.time():
+                return False
+            self.items[name] = {'owner': owner, 'expires_at': time.time() + seconds}
+            return True
+
+    def get_lease(self, name):
+        with self.lock:
+            item = self.items.get(name)
+            if not item or item['expires_at'] < time.time():
+                return None
+            return dict(item)
+
+    def complete_lease(self, name, owner, result, keep_seconds):
+        with self.lock:
+            if self.items.get(name, {}).get('owner') == owner:
+                self.items[name] = {'owner': owner, 'expires_at': time.time() + keep_seconds, 'result': result}
+
+    def release_lease(self, name, owner):
+        with self.lock:
+            if self.items.get(name, {}).get('owner') == owner:
+                del self.items[name]
+
+
+@pytest.fixture(autouse=True)
+def fast_polling():
+    with patch.object(single_flight, 'POLL_INTERVAL', 0.01):
+        yield
+
+
+class TestRunOnce:
+    """Tests para run_once."""
+
+    def test_concurrent_callers_share_one_execution(self):
+        """Verifica que varios workers simultáneos hacen el trabajo una sola vez."""
+        leases = FakeLeases()
+        work = MagicMock(side_effect=lambda: time.sleep(0.1) or "Resumo")
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(run_once, leases, 'translate_abc_pt', work) for _ in range(5)]
+            results = [f.result() for f in futures]
+
+        assert work.call_count == 1
+        assert [r for r, _ in results] == ["Resumo"] * 5
+        assert sum(ran for _, ran in results) == 1
+
+    def test_failed_leader_lets_follower_retry(self):
+        """Verifica que si el dueño falla, otro worker toma el lease y reintenta."""
+        leases = FakeLeases()
+
+        with pytest.raises(RuntimeError):
+            run_once(leases, 'command_x', MagicMock(side_effect=RuntimeError("429")))
+
+        assert run_once(leases, 'command_x', lambda: "ok") == ("ok", True)
+
+    def test_no_wait_returns_immediately(self):
+        """Verifica que con wait_seconds=0 un duplicado no espera ni trabaja."""
+        leases = FakeLeases()
+        leases.acquire_lease('worker_1', 'otro', 30)
+        work = MagicMock()
+
+        assert run_once(leases, 'worker_1', work, wait_seconds=0) == (None, False)
+        work.assert_not_called()
+
+    def test_follower_times_out(self):
+        """Verifica que un seguidor no espera indefinidamente a un dueño colgado."""
+        leases = FakeLeases()
+        leases.acquire_lease('translate_abc_es', 'colgado', 30)
+
+        with pytest.raises(SingleFlightTimeout):
+            run_once(leases, 'translate_abc_es', MagicMock(), wait_seconds=0.05)
+
+    def test_expired_lease_is_taken_over(self):
+        """Verifica que un lease vencido (worker muerto) se puede volver a tomar."""
+        leases = FakeLeases()
+        leases.acquire_lease('worker_2', 'muerto', 0)
+        time.sleep(0.01)
+
+        assert run_once(leases, 'worker_2', lambda: "ok", wait_seconds=0) == ("ok", True)
@@ -0,0 +1,61 @@
+"""
+Tests unitarios para los filtros de frases compilados.
+
+Ejecutar con: pytest tests/ -v
+"""
+
+import os
+import sys
+
+import pytest
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from text_filters import PhraseFilter, BOILERPLATE_PHRASES, SOCIAL_KEYWORDS, boilerplate_filter, social_filter
+
+
+LINES = [
+    "Greetings, this is MIR4.",
+    "Please refer to the details below.",
+    "ASIA (UTC+8) 2025.01.01 10:00 AM ~ 02:00 PM",
+    "Go to the Event menu to claim rewards",
+    "Rewards: Darksteel x1000",
+    "THANK YOU for your support",
+    "We look forward to seeing you!",
+    "From My Battle To Our War",
+    "Goto is not a phrase here",
+    "",
+]
+
+
+class TestPhraseFilter:
+    """Paridad con el filtro lineal original (any(phrase in line.lower()))."""
+
+    @pytest.mark.parametrize("line", LINES)
+    def test_boilerplate_parity(self, line):
+        expected = any(phrase in line.lower() for phrase in BOILERPLATE_PHRASES)
+        assert boilerplate_filter.matches(line) == expected
+
+    @pytest.mark.parametrize("text", [
+        "Nueva actualización de Facebook Event",
+        "Instagram Giveaway",
+        "Check our YouTube channel",
+        "Nuevo Patch Note v2.0",
+        "Evento de Halloween",
+    ])
+    def test_social_parity(self, text):
+        expected = any(keyword in text.lower() for keyword in SOCIAL_KEYWORDS)
+        assert social_filter.matches(text) == expected
+
+    def test_shared_prefixes(self):
+        """Verifica frases que comparten prefijo o son prefijo de otra."""
+        phrase_filter = PhraseFilter(["go to", "go to market", "good", "g.o"])
+
+        assert phrase_filter.matches("please GO TO town")
+        assert phrase_filter.matches("Good morning")
+        assert phrase_filter.matches("g.o!")
+        assert not phrase_filter.matches("gxo gone")
+
+    def test_empty_filter_matches_nothing(self):
+        assert not PhraseFilter([]).matches("cualquier texto")
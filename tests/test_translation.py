@@ -0,0 +1,232 @@
+"""
+Tests unitarios para translation.py (memoria por segmentos y traducción en paralelo).
+
+Ejecutar con: pytest tests/ -v
+"""
+
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import translation
+from database import DatabaseAdapter
+from translation import (
+    LocalProvider, SegmentedText, TranslationRequest, split_chunks, translate_multi, translate_segments,
+    translate_with_memory
+)
+
+NOTICE = "• Maintenance: 10:00 ~ 14:00\n\n• ASIA, INMENA, EU\n\n• Reward: Darksteel x100"
+NEXT_NOTICE = "• Maintenance: 10:00 ~ 14:00\n\n• ASIA, INMENA, EU\n\n• Reward: Copper x500"
+
+
+@pytest.fixture
+def db():
+    """DatabaseAdapter sin DynamoDB: la memoria vive en la LRU."""
+    with patch('boto3.resource', side_effect=Exception("sin AWS")):
+        return DatabaseAdapter()
+
+
+def fake_translate(text, dest):
+    """Traductor falso que, como uno real, conserva los párrafos."""
+    return "\n\n".join(f"[{dest}] {paragraph}" for paragraph in text.split("\n\n"))
+
+
+class TestSegmentedText:
+    """Tests para la división en segmentos."""
+
+    def test_bullets_are_not_translated(self):
+        """Verifica que las viñetas y separadores se conservan al rearmar."""
+        segmented = SegmentedText(NOTICE)
+
+        assert segmented.segments[0] == "Maintenance: 10:00 ~ 14:00"
+        assert segmented.assemble({s: s for s in segmented.segments}) == NOTICE
+
+    def test_repeated_segments_listed_once(self):
+        """Verifica que un segmento repetido se traduce una sola vez."""
+        segmented = SegmentedText("• EU\n\n• NA\n\n• EU")
+
+        assert segmented.segments == ["EU", "NA"]
+        assert segmented.assemble({"EU": "UE", "NA": "AN"}) == "• UE\n\n• AN\n\n• UE"
+
+
+class TestTranslationMemory:
+    """Tests para la traducción reutilizando segmentos conocidos."""
+
+    def test_only_unseen_segments_translated(self, db):
+        """Verifica que el segundo aviso solo traduce la línea que cambió."""
+        translate_with_memory(NOTICE, {'es': 'es'}, db, fake_translate)
+        translate = MagicMock(side_effect=fake_translate)
+
+        result = translate_with_memory(NEXT_NOTICE, {'es': 'es'}, db, translate)
+
+        translate.assert_called_once_with("Reward: Copper x500", 'es')
+        assert result['es'] == (
+            "• [es] Maintenance: 10:00 ~ 14:00\n\n• [es] ASIA, INMENA, EU\n\n• [es] Reward: Copper x500"
+        )
+
+    def test_languages_are_independent(self, db):
+        """Verifica que un segmento conocido en un idioma se traduce en otro."""
+        translate_with_memory(NOTICE, {'es': 'es'}, db, fake_translate)
+
+        request = TranslationRequest(NOTICE, {'es': 'es', 'zh': 'zh-cn'}, db)
+
+        assert {lang for _, lang in request.missing} == {'zh'}
+
+    def test_incomplete_language_left_out(self, db):
+        """Verifica que un idioma con segmentos sin traducir no se rearma ni a medias."""
+        request = TranslationRequest(NOTICE, {'es': 'es', 'pt': 'pt'}, db)
+        results = {pair: fake_translate(*pair) for pair in request.missing if pair != ("ASIA, INMENA, EU", 'pt')}
+
+        translated = request.complete(results)
+
+        assert set(translated) == {'es'}
+        assert db.get_translation("ASIA, INMENA, EU", 'pt') is None
+        assert db.get_translation("Reward: Darksteel x100", 'pt') == "[pt] Reward: Darksteel x100"
+
+
+class TestParallelTranslation:
+    """Tests para la traducción en fragmentos e idiomas en paralelo."""
+
+    def test_chunks_cut_at_paragraph_boundaries(self):
+        """Verifica que los fragmentos respetan el tamaño sin cortar párrafos."""
+        paragraphs = [f"• Parrafo {i} " + "x" * 80 for i in range(6)]
+        text = "\n\n".join(paragraphs)
+
+        chunks = split_chunks(text, max_chars=200)
+
+        assert "\n\n".join(chunks) == text
+        assert all(len(chunk) <= 200 for chunk in chunks)
+        assert len(chunks) == 3
+
+    def test_long_paragraph_kept_whole(self):
+        """Verifica que un párrafo más largo que el límite no se parte."""
+        chunks = split_chunks("corto\n\n" + "y" * 300, max_chars=100)
+
+        assert chunks == ["corto", "y" * 300]
+
+    def test_chunks_and_languages_run_concurrently(self):
+        """Verifica que la latencia es la de un fragmento y no idiomas x fragmentos."""
+        def slow_translate(text, dest):
+            time.sleep(0.1)
+            return f"[{dest}] {text}"
+
+        text = "\n\n".join("z" * 500 for _ in range(3))
+        start = time.monotonic()
+        result = translate_multi(text, {'es': 'es', 'zh': 'zh-cn'}, slow_translate, max_workers=6)
+        elapsed = time.monotonic() - start
+
+        assert elapsed < 0.3
+        assert result['zh'].split("\n\n") == ["[zh-cn] " + "z" * 500] * 3
+
+    def test_failure_propagates(self):
+        """Verifica que un fragmento que falla hace fallar la traducción."""
+        def flaky(text, dest):
+            if dest == 'zh-cn':
+                raise RuntimeError("429")
+            return text
+
+        with pytest.raises(RuntimeError):
+            translate_multi("hola", {'es': 'es', 'zh': 'zh-cn'}, flaky)
+
+
+class TestSegmentBatching:
+    """Tests para la traducción agrupada de segmentos."""
+
+    def test_fresh_summary_needs_one_request_per_language(self, db):
+        """Verifica que un resumen nuevo de 15 bullets no hace una petición por bullet."""
+        summary = "\n\n".join(f"• Bullet {i}" for i in range(15))
+        translate = MagicMock(side_effect=fake_translate)
+
+        result = translate_with_memory(summary, {'es': 'es', 'pt': 'pt'}, db, translate)
+
+        assert translate.call_count == 2
+        assert result['pt'].split("\n\n")[14] == "• [pt] Bullet 14"
+
+    def test_long_batch_split_in_chunks(self):
+        """Verifica que los segmentos se agrupan en fragmentos de TRANSLATION_CHUNK_CHARS (600)."""
+        segments = [f"{i} " + "x" * 250 for i in range(6)]
+        translate = MagicMock(side_effect=fake_translate)
+
+        result = translate_segments([(s, 'es') for s in segments], {'es': 'es'}, translate)
+
+        assert translate.call_count == 3
+        assert result[(segments[5], 'es')] == "[es] " + segments[5]
+
+    def test_mismatched_split_falls_back_per_segment(self):
+        """Verifica que si el traductor junta párrafos se traduce segmento por segmento."""
+        def merging(text, dest):
+            return f"[{dest}] " + text.replace("\n\n", " ")
+
+        translate = MagicMock(side_effect=merging)
+        result = translate_segments([("A", 'es'), ("B", 'es')], {'es': 'es'}, translate)
+
+        assert result == {("A", 'es'): "[es] A", ("B", 'es'): "[es] B"}
+        assert translate.call_count == 3
+
+    def test_failed_language_skipped(self):
+        """Verifica que con skip_errors un idioma que falla no tumba a los demás."""
+        def flaky(text, dest):
+            if dest == 'pt':
+                raise RuntimeError("429")
+            return fake_translate(text, dest)
+
+        result = translate_segments([("A", 'es'), ("A", 'pt')], {'es': 'es', 'pt': 'pt'}, flaky, skip_errors=True)
+
+        assert result == {("A", 'es'): "[es] A"}
+
+
+class TestProviders:
+    """Tests para los proveedores de traducción."""
+
+    @pytest.fixture(autouse=True)
+    def clean_cache(self):
+        with patch.dict(translation._providers, clear=True):
+            yield
+
+    def test_local_provider_is_deterministic(self):
+        """Verifica que el proveedor local no usa red y siempre responde igual."""
+        provider = LocalProvider(latency=0.05)
+
+        start = time.monotonic()
+        result = provider.translate("Hello", 'pt')
+        elapsed = time.monotonic() - start
+
+        assert result == provider.translate("Hello", 'pt') == "[pt] Hello"
+        assert elapsed >= 0.05
+        assert provider.calls == 2
+
+    def test_provider_created_once_per_container(self):
+        """Verifica que el proveedor se crea una vez y se reutiliza."""
+        with patch.dict(os.environ, {'TRANSLATION_PROVIDER': 'local'}):
+            first = translation.get_provider()
+            second = translation.get_provider()
+
+        assert isinstance(first, LocalProvider)
+        assert first is second
+
+    def test_unknown_provider_uses_default(self):
+        """Verifica que un nombre desconocido cae al proveedor por defecto."""
+        default = MagicMock()
+        with patch.dict(translation.PROVIDERS, {'googletrans': lambda: default}):
+            assert translation.get_provider('deepl') is default
+
+    def test_translate_text_uses_configured_provider(self):
+        """Verifica que core_logic traduce con el proveedor configurado."""
+        import core_logic
+
+        with patch.dict(os.environ, {'TRANSLATION_PROVIDER': 'local'}):
+            assert core_logic.translate_text("Hello", 'es') == "[es] Hello"
+
+    def test_benchmark_runs_offline(self):
+        """Verifica que el benchmark corre sin red y que la memoria solo traduce la línea nueva."""
+        import bench_translation
+
+        rows = dict((label, calls) for label, _, calls in bench_translation.bench_segment_memory(LocalProvider(latency=0)))
+
+        assert rows["aviso repetido, memoria por segmentos"] == len(bench_translation.LANGS)
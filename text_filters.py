@@ -0,0 +1,74 @@
+"""
+Filtros de frases compilados una sola vez al importar el módulo.
+
+Cada filtro convierte su lista de frases en un trie y lo serializa como una
+única expresión regular (p. ej. "go to" y "greetings" -> "g(?:o to|reetings)"),
+de modo que cada posición del texto se examina una sola vez recorriendo el
+trie, sin importar cuántas frases haya. Agregar frases no agrega pasadas.
+
+Las listas se pueden ampliar sin tocar código con variables de entorno
+separadas por comas: EXTRA_BOILERPLATE_PHRASES y EXTRA_SOCIAL_KEYWORDS.
+"""
+
+import os
+import re
+
+# Líneas de relleno que se descartan del contenido de los artículos
+BOILERPLATE_PHRASES = [
+    "from my battle to our war",
+    "greetings, this is mir4",
+    "thank you",
+    "please refer to the details below",
+    "we look forward to",
+    "go to"
+]
+
+# Posts del listado que son promociones de redes sociales
+SOCIAL_KEYWORDS = ['facebook', 'instagram', 'youtube']
+
+
+def _env_phrases(name):
+    return [p.strip() for p in os.environ.get(name, '').split(',') if p.strip()]
+
+
+def _trie_pattern(phrases):
+    """Serializa un trie de frases como expresión regular.
+
+    Como solo interesa saber si alguna frase aparece, una frase que es
+    prefijo de otra la vuelve redundante y el trie se corta ahí.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def render(node):
+        if '' in node:
+            return ''
+        alternatives = [re.escape(ch) + render(child) for ch, child in sorted(node.items())]
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return '(?:' + '|'.join(alternatives) + ')'
+
+    return render(trie)
+
+
+class PhraseFilter:
+    """Detecta, sin distinguir mayúsculas, si un texto contiene alguna frase."""
+
+    def __init__(self, phrases):
+        self.phrases = tuple(dict.fromkeys(p.lower() for p in phrases if p))
+        self._pattern = re.compile(_trie_pattern(self.phrases), re.IGNORECASE) if self.phrases else None
+
+    def matches(self, text):
+        """Indica si `text` contiene alguna de las frases."""
+        return self._pattern is not None and self._pattern.search(text) is not None
+
+    def __repr__(self):
+        return f"PhraseFilter({len(self.phrases)} frases)"
+
+
+boilerplate_filter = PhraseFilter(BOILERPLATE_PHRASES + _env_phrases('EXTRA_BOILERPLATE_PHRASES'))
+social_filter = PhraseFilter(SOCIAL_KEYWORDS + _env_phrases('EXTRA_SOCIAL_KEYWORDS'))
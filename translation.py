@@ -0,0 +1,273 @@
+"""
+Traducción: proveedores, memoria por segmentos y traducción en paralelo.
+
+El proveedor (TRANSLATION_PROVIDER) se crea una vez por contenedor con
+get_provider(): 'googletrans' en producción, o 'local', un traductor
+determinista sin red (con latencia configurable) para tests y benchmarks.
+
+Los avisos de MIR4 repiten mucho texto entre posts (horarios por región,
+ventanas de mantenimiento, tablas de recompensas). En vez de traducir el
+resumen completo, se divide en los párrafos/bullets que arma
+format_as_bullets y cada segmento se busca por hash en la cache de
+traducciones de DatabaseAdapter: solo los segmentos nuevos van al
+traductor, y luego se rearma el texto en el mismo orden.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('BicheonTranslation')
+logger.setLevel(logging.INFO)
+
+# Separador de párrafos/bullets de format_as_bullets
+SEGMENT_SEPARATOR = '\n\n'
+
+# Hilos para traducir fragmentos e idiomas a la vez, y tamaño máximo de
+# cada fragmento (se corta solo en límites de párrafo)
+TRANSLATION_MAX_WORKERS = int(os.environ.get('TRANSLATION_MAX_WORKERS', '6'))
+TRANSLATION_CHUNK_CHARS = int(os.environ.get('TRANSLATION_CHUNK_CHARS', '600'))
+
+# Prefijo que no se traduce (viñeta y espacios) y cuerpo del segmento
+_SEGMENT_RE = re.compile(r'^(\s*(?:•\s*)?)(.*?)(\s*)$', re.DOTALL)
+
+
+class SegmentedText:
+    """Texto dividido en segmentos traducibles, conservando viñetas y separadores."""
+
+    def __init__(self, text):
+        self.parts = []
+        for chunk in (text or '').split(SEGMENT_SEPARATOR):
+            prefix, body, suffix = _SEGMENT_RE.match(chunk).groups()
+            self.parts.append((prefix, body, suffix))
+
+    @property
+    def segments(self):
+        """Cuerpos únicos no vacíos, en orden de aparición."""
+        return list(dict.fromkeys(body for _, body, _ in self.parts if body))
+
+    def assemble(self, translated):
+        """Rearma el texto reemplazando cada cuerpo por su traducción."""
+        return SEGMENT_SEPARATOR.join(
+            prefix + (translated[body] if body else '') + suffix
+            for prefix, body, suffix in self.parts
+        )
+
+
+class GoogleTransProvider:
+    """Proveedor sobre googletrans (API no oficial de Google Translate)."""
+
+    name = 'googletrans'
+
+    def __init__(self):
+        from googletrans import Translator
+        self._translator = Translator()
+
+    def translate(self, text, dest):
+        return self._translator.translate(text, dest=dest).text
+
+
+class LocalProvider:
+    """Traductor determinista sin red: devuelve "[destino] texto" por párrafo.
+
+    `latency` (o TRANSLATION_LOCAL_LATENCY, en segundos) simula la demora de
+    cada petición; `calls` cuenta las peticiones hechas.
+    """
+
+    name = 'local'
+
+    def __init__(self, latency=None):
+        if latency is None:
+            latency = float(os.environ.get('TRANSLATION_LOCAL_LATENCY', '0'))
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text, dest):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return SEGMENT_SEPARATOR.join(f"[{dest}] {paragraph}" for paragraph in text.split(SEGMENT_SEPARATOR))
+
+
+PROVIDERS = {
+    'googletrans': GoogleTransProvider,
+    'local': LocalProvider,
+}
+
+DEFAULT_PROVIDER = 'googletrans'
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(name=None):
+    """Devuelve (y cachea por contenedor) la instancia del proveedor pedido."""
+    name = (name or os.environ.get('TRANSLATION_PROVIDER', DEFAULT_PROVIDER)).lower()
+    if name not in PROVIDERS:
+        logger.warning(f"⚠️ Proveedor de traducción desconocido: {name}, se usa {DEFAULT_PROVIDER}")
+        name = DEFAULT_PROVIDER
+
+    with _providers_lock:
+        provider = _providers.get(name)
+        if provider is None:
+            provider = PROVIDERS[name]()
+            _providers[name] = provider
+            logger.debug(f"Proveedor de traducción: {provider.name}")
+        return provider
+
+
+def split_chunks(text, max_chars=TRANSLATION_CHUNK_CHARS):
+    """Agrupa párrafos consecutivos en fragmentos de hasta `max_chars`.
+
+    Nunca corta un párrafo: uno más largo que `max_chars` queda solo en su
+    fragmento.
+    """
+    chunks = []
+    current = ''
+    for paragraph in (text or '').split(SEGMENT_SEPARATOR):
+        candidate = current + SEGMENT_SEPARATOR + paragraph if current else paragraph
+        if current and len(candidate) > max_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def translate_parallel(jobs, translate, max_workers=None, skip_errors=False):
+    """Traduce {clave: (texto, destino)} en paralelo con un pool acotado.
+
+    Devuelve {clave: traducción}. Si alguna traducción falla se propaga la
+    primera excepción o, con `skip_errors`, esa clave queda fuera.
+    """
+    if not jobs:
+        return {}
+
+    def run(text, dest):
+        try:
+            return translate(text, dest)
+        except Exception as e:
+            if not skip_errors:
+                raise
+            logger.warning(f"⚠️ Traducción a {dest} falló: {e}")
+            return None
+
+    workers = max(1, min(max_workers or TRANSLATION_MAX_WORKERS, len(jobs)))
+    if workers == 1:
+        results = {key: run(text, dest) for key, (text, dest) in jobs.items()}
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {key: executor.submit(run, text, dest) for key, (text, dest) in jobs.items()}
+            results = {key: future.result() for key, future in futures.items()}
+    return {key: value for key, value in results.items() if value is not None}
+
+
+def translate_multi(text, langs, translate, max_workers=None, skip_errors=False):
+    """Traduce `text` a todos los idiomas de `langs` ({idioma: destino}).
+
+    Divide el texto en fragmentos por párrafo y traduce todos los fragmentos
+    de todos los idiomas a la vez, así la latencia total se acerca a la de
+    un solo fragmento. Devuelve {idioma: texto traducido}; con `skip_errors`
+    un idioma con algún fragmento fallido queda fuera en vez de propagar.
+    """
+    chunks = split_chunks(text)
+    jobs = {
+        (i, lang): (chunk, dest)
+        for lang, dest in langs.items()
+        for i, chunk in enumerate(chunks)
+    }
+    results = translate_parallel(jobs, translate, max_workers, skip_errors)
+    return {
+        lang: SEGMENT_SEPARATOR.join(results[(i, lang)] for i in range(len(chunks)))
+        for lang in langs
+        if all((i, lang) in results for i in range(len(chunks)))
+    }
+
+
+def translate_segments(pairs, langs, translate, max_workers=None, skip_errors=False):
+    """Traduce pares (segmento, idioma) en pocas peticiones.
+
+    Los segmentos que le faltan a cada idioma se unen por párrafo y se
+    traducen con translate_multi (fragmentos de TRANSLATION_CHUNK_CHARS, los
+    idiomas con los mismos segmentos en la misma tanda). Si la traducción no
+    se puede volver a partir en la misma cantidad de segmentos, ese idioma
+    se traduce segmento por segmento. Devuelve {(segmento, idioma): traducción}.
+    """
+    by_lang = {}
+    for segment, lang in pairs:
+        by_lang.setdefault(lang, []).append(segment)
+    groups = {}
+    for lang, segments in by_lang.items():
+        groups.setdefault(tuple(segments), {})[lang] = langs[lang]
+
+    results = {}
+    fallback = {}
+    for segments, group_langs in groups.items():
+        translated = translate_multi(SEGMENT_SEPARATOR.join(segments), group_langs, translate,
+                                     max_workers, skip_errors)
+        for lang, text in translated.items():
+            pieces = [piece.strip() for piece in text.split(SEGMENT_SEPARATOR)]
+            if len(pieces) == len(segments):
+                results.update({(segment, lang): piece for segment, piece in zip(segments, pieces)})
+            else:
+                logger.warning(f"⚠️ Traducción a {lang} sin los {len(segments)} segmentos, se traducen por separado")
+                fallback.update({(segment, lang): (segment, group_langs[lang]) for segment in segments})
+
+    results.update(translate_parallel(fallback, translate, max_workers, skip_errors))
+    return results
+
+
+class TranslationRequest:
+    """Traducción de un texto a varios idiomas reutilizando segmentos conocidos.
+
+    Al crearla busca cada (segmento, idioma) en la memoria (`db`); `missing`
+    queda con los pares a traducir, que quien llama traduce (normalmente con
+    translate_segments), y `complete()` guarda los nuevos y rearma el texto.
+
+    `langs` es {idioma: código destino del traductor}, p. ej. {'zh': 'zh-cn'}.
+    """
+
+    def __init__(self, text, langs, db):
+        self.text = SegmentedText(text)
+        self.langs = dict(langs)
+        self.db = db
+        pairs = [(segment, lang) for lang in self.langs for segment in self.text.segments]
+        self.known = db.lookup_translations(pairs) if pairs else {}
+        self.missing = [pair for pair in pairs if pair not in self.known]
+        if pairs:
+            logger.info(f"🧠 Memoria de traducción: {len(pairs) - len(self.missing)}/{len(pairs)} segmentos conocidos")
+
+    def complete(self, results):
+        """Guarda las traducciones nuevas y devuelve {idioma: texto traducido}.
+
+        `results` es {(segmento, idioma): traducción}. Un idioma al que le
+        falta algún segmento queda fuera del resultado.
+        """
+        new = {pair: results[pair] for pair in self.missing if pair in results}
+        self.db.store_translations(new)
+        done = {**self.known, **new}
+
+        translated = {}
+        for lang in self.langs:
+            segments = {segment: done.get((segment, lang)) for segment in self.text.segments}
+            if all(value is not None for value in segments.values()):
+                translated[lang] = self.text.assemble(segments)
+        return translated
+
+
+def translate_with_memory(text, langs, db, translate):
+    """Traduce `text` a cada idioma de `langs` enviando solo los segmentos nuevos.
+
+    `translate(texto, destino)` hace la traducción real; los segmentos que
+    faltan se agrupan en pocas peticiones (translate_segments) y sus
+    excepciones se propagan.
+    """
+    request = TranslationRequest(text, langs, db)
+    return request.complete(translate_segments(request.missing, request.langs, translate))